@@ -8,6 +8,7 @@ app = Flask(__name__)
 app.config.from_object(Config)
 
 from data_models.model_store import db
+
 db.init_app(app)
 
 migrate = Migrate(app=app, db=db, render_as_batch=True)
@@ -15,11 +16,13 @@ login = LoginManager(app)
 login.login_view = "login"
 
 from aesops import routes
+from aesops import commands
 from data_models import model_store
 
 from .blueprints.login_blueprint import login_blueprint
 from .blueprints.markdown_blueprint import markdown_blueprint
 from .blueprints.tournament_blueprint import tournament_blueprint
+
 app.register_blueprint(login_blueprint)
 app.register_blueprint(markdown_blueprint)
-app.register_blueprint(tournament_blueprint)
\ No newline at end of file
+app.register_blueprint(tournament_blueprint)
@@ -5,6 +5,8 @@ from data_models.players import Player
 from data_models.tournaments import Tournament
 from data_models.model_store import db
 import aesops.business_logic.players as p_logic
+import aesops.business_logic.read_model as read_model
+import aesops.business_logic.snapshots as snapshots
 import aesops.business_logic.top_cut as tc_logic
 import aesops.business_logic.tournament as t_logic
 import aesops.business_logic.decklist as d_logic
@@ -18,7 +20,6 @@ from aesops.utility import (
     render_side_bias,
     format_results,
     get_faction,
-    rank_tables,
 )
 
 tournament_blueprint = Blueprint("tournaments", __name__)
@@ -32,32 +33,39 @@ def redirect_for_tournament(tid):
 @tournament_blueprint.route("/tournament/<int:tid>", methods=["GET", "POST"])
 @tournament_blueprint.route("/<int:tid>/standings", methods=["GET", "POST"])
 def tournament(tid):
-    tournament = Tournament.query.get(tid)
-
-    # Rank the players in the tournament and calculate their info required
-    # to be rendered on the page
-    result = t_logic.calculate_player_ranks(tournament)
+    # Everything the page shows is loaded up front, so it renders in the same
+    # number of queries however many players there are
+    tournament = read_model.load_tournament(tid)
+    snapshot = read_model.snapshot_of(tournament)
+    last_concluded_round = t_logic.last_concluded_round(snapshot)
+    rnd = request.args.get("rnd", last_concluded_round, type=int)
+
+    # Concluded rounds are read from their standings snapshot, otherwise rank
+    # the players in the tournament and calculate their info required to be
+    # rendered on the page
+    result = snapshots.get_standings(tournament, rnd)
+    if result is None:
+        rnd = last_concluded_round
+        result = t_logic.calculate_player_ranks(tournament)
 
     # Generate the cut standings
     cut_standings = None
-    if tournament.cut is not None:
-        cut_standings = tc_logic.get_standings(tournament.cut)
+    if snapshot.cut is not None:
+        cut_standings = tc_logic.get_standings(snapshot.cut)
 
     return render_template(
         "tournament.html",
-        tournament=tournament,
+        tournament=snapshot,
         admin=u_logic.has_admin_rights(current_user, tid),
         render_side_bias=render_side_bias,
         get_faction=get_faction,
         t_logic=t_logic,
         cut_standings=cut_standings,
-        result=result,
+        result=snapshot.standings(result),
         p_logic=p_logic,
-        last_concluded_round=(
-            tournament.current_round
-            if t_logic.is_current_round_finished(tournament)
-            else tournament.current_round - 1
-        ),
+        last_concluded_round=last_concluded_round,
+        shown_round=rnd,
+        snapshot_rounds=snapshots.snapshot_rounds(tournament),
     )
 
 
@@ -75,6 +83,7 @@ def create_tournament():
             visible=form.visible.data,
             require_decklist=form.require_decklist.data,
             require_login=form.require_login.data,
+            solver=form.solver.data or None,
         )
         db.session.add(tournament)
         db.session.commit()
@@ -126,18 +135,18 @@ def add_player(tid: int):
 
 @tournament_blueprint.route("/<int:tid>/<int:rnd>", methods=["GET", "POST"])
 def round(tid, rnd):
-    tournament = Tournament.query.get(tid)
+    tournament = read_model.load_round_snapshot(tid, rnd)
+    matches = tournament.round(rnd)
     return render_template(
         "round.html",
         tournament=tournament,
         rnd=rnd,
+        matches=matches,
         format_results=format_results,
         admin=u_logic.has_admin_rights(current_user, tid),
-        rank_tables=rank_tables,
         get_faction=get_faction,
-        t_logic=t_logic,
         match_report=MatchReport,
-        has_reporting_rights=u_logic.has_reporting_rights,
+        reportable=u_logic.reportable_match_ids(current_user, matches),
     )
 
 
@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from data_models.match import Match
+from data_models.model_store import db
+from data_models.tournaments import Tournament
+
+
+class MatchHistory:
+    """
+    Who has played whom, on which side, across a whole tournament.
+
+    Built from a single query over the tournament's matches so that pairing
+    doesn't have to walk every player's corp_matches/runner_matches
+    relationships (and fire a handful of SELECTs per player) to find out.
+    The answers match p_logic.get_opponent_ids and p_logic.get_side_balance.
+    """
+
+    def __init__(self, rows):
+        self.corp_opponents = defaultdict(set)
+        self.runner_opponents = defaultdict(set)
+        self.corp_games = defaultdict(int)
+        self.runner_games = defaultdict(int)
+        self.byes = defaultdict(int)
+        for corp_id, runner_id, is_bye, concluded in rows:
+            # Byes are recorded with the player as corp and no runner
+            if is_bye:
+                self.byes[corp_id] += 1
+                continue
+            if not concluded:
+                continue
+            self.corp_opponents[corp_id].add(runner_id)
+            self.runner_opponents[runner_id].add(corp_id)
+            self.corp_games[corp_id] += 1
+            self.runner_games[runner_id] += 1
+
+    def opponent_ids(self, player_id: int, side=None) -> set[int]:
+        if side == "corp":
+            return set(self.corp_opponents[player_id])
+        if side == "runner":
+            return set(self.runner_opponents[player_id])
+        return self.corp_opponents[player_id] | self.runner_opponents[player_id]
+
+    def side_balance(self, player_id: int) -> int:
+        return self.corp_games[player_id] - self.runner_games[player_id]
+
+    def received_bye(self, player_id: int) -> bool:
+        return self.byes[player_id] > 0
+
+
+def load_history(tournament: Tournament) -> MatchHistory:
+    rows = db.session.execute(
+        db.select(
+            Match.corp_player_id,
+            Match.runner_player_id,
+            Match.is_bye,
+            Match.concluded,
+        ).where(Match.tid == tournament.id)
+    ).all()
+    return MatchHistory(rows)
@@ -0,0 +1,212 @@
+"""
+Runs pairing and round conclusion off the request thread.
+
+enqueue records a Job and hands it to a small thread pool, so the route can
+return straight away and the page can poll the job's status. Each job runs in
+its own app context and database session. The jobs table, not this process,
+guarantees a tournament never has two jobs queued or running at once, so it
+holds across gunicorn workers too. Changes a route makes itself, like committing
+a previewed round or unpairing one, go through run_now so they take the same
+slot and can't overlap a job.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import threading
+from typing import Callable
+
+from flask import current_app
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+
+from data_models.exceptions import ConclusionError, JobException
+from data_models.jobs import Job, JobStatus
+from data_models.model_store import db
+from data_models.tournaments import Tournament
+import aesops.business_logic.matchmaking as mm
+import aesops.business_logic.tournament as t_logic
+
+
+def run_pair_round(t: Tournament) -> str:
+    proposal = mm.pair_round(t)
+    if not proposal.optimal:
+        return "Pairing ran out of time, these are best-effort pairings"
+    return None
+
+
+def run_conclude_round(t: Tournament) -> str:
+    t_logic.conclude_round(t)
+    return None
+
+
+# Each kind of job takes the tournament and returns an optional message
+JOB_KINDS = {
+    "pair_round": run_pair_round,
+    "conclude_round": run_conclude_round,
+}
+
+executor = None
+executor_lock = threading.Lock()
+# Jobs submitted by this process that haven't finished, for wait()
+futures = {}
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=current_app.config.get("JOB_WORKERS", 2),
+                thread_name_prefix="aesops-job",
+            )
+        return executor
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands datetimes back without their time zone
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def enqueue(t: Tournament, kind: str) -> Job:
+    """
+    Queues a job for the tournament and returns it. Raises JobException if the
+    tournament already has one queued or running.
+
+    With BACKGROUND_JOBS off the job runs before this returns.
+    """
+    if kind not in JOB_KINDS:
+        raise JobException(f"Unknown job: {kind}")
+    job = claim(t, Job(tid=t.id, kind=kind, active_tid=t.id, created=utc_now()))
+    app = current_app._get_current_object()
+    if not app.config.get("BACKGROUND_JOBS", True):
+        run_job(app, job.id)
+        db.session.refresh(job)
+        return job
+    job_id = job.id
+    future = get_executor().submit(run_job, app, job_id)
+    futures[job_id] = future
+    # Added after the entry, so it's removed however soon the job finishes
+    future.add_done_callback(lambda _: futures.pop(job_id, None))
+    return job
+
+
+def run_now(t: Tournament, kind: str, change: Callable[[], object]):
+    """
+    Makes a change to the tournament in this request, recorded as a job so it
+    holds the tournament's slot while it runs. Raises JobException if a job is
+    already queued or running, otherwise returns what change() does and lets
+    any exception it raises through.
+    """
+    now = utc_now()
+    job = Job(
+        tid=t.id,
+        kind=kind,
+        active_tid=t.id,
+        status=JobStatus.RUNNING.value,
+        created=now,
+        started=now,
+    )
+    job_id = claim(t, job).id
+    try:
+        result = change()
+    except Exception as e:
+        db.session.rollback()
+        finish_job(job_id, JobStatus.FAILED, str(e) or type(e).__name__)
+        raise
+    finish_job(job_id, JobStatus.FINISHED, None)
+    return result
+
+
+def claim(t: Tournament, job: Job) -> Job:
+    """Saves a new active job, or raises JobException if the slot is taken"""
+    expire_stale_jobs(t)
+    db.session.add(job)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        raise JobException(
+            "This tournament is already being paired or concluded, please wait"
+        )
+    return job
+
+
+def run_job(app, job_id: int):
+    with app.app_context():
+        # A job that timed out while queued may have been replaced already, so
+        # it only runs if it can still be claimed
+        claimed = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == JobStatus.QUEUED.value)
+            .values(status=JobStatus.RUNNING.value, started=utc_now())
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            job = db.session.get(Job, job_id)
+            try:
+                message = JOB_KINDS[job.kind](db.session.get(Tournament, job.tid))
+                status = JobStatus.FINISHED
+            except (Exception, ConclusionError) as e:
+                db.session.rollback()
+                message = str(e) or type(e).__name__
+                status = JobStatus.FAILED
+            finish_job(job_id, status, message)
+        db.session.remove()
+
+
+def finish_job(job_id: int, status: JobStatus, message: str):
+    job = db.session.get(Job, job_id)
+    job.status = status.value
+    job.message = message
+    job.rnd = db.session.get(Tournament, job.tid).current_round
+    job.finished = utc_now()
+    job.active_tid = None
+    db.session.commit()
+
+
+def wait(job_id: int, timeout: float = None):
+    """Blocks until a job this process started has finished"""
+    future = futures.get(job_id)
+    if future is not None:
+        future.result(timeout=timeout)
+
+
+def expire_stale_jobs(t: Tournament):
+    """
+    Fails jobs that have been running for longer than JOB_TIMEOUT seconds, or
+    queued for longer than JOB_QUEUE_TIMEOUT, which only happens if the process
+    holding them died, so they stop blocking new jobs for the tournament. A job
+    waiting behind other tournaments' jobs isn't timed until it starts.
+    """
+    now = utc_now()
+    config = current_app.config
+    run_cutoff = now - timedelta(seconds=config.get("JOB_TIMEOUT", 600))
+    queue_cutoff = now - timedelta(seconds=config.get("JOB_QUEUE_TIMEOUT", 3600))
+    stale = [
+        job
+        for job in Job.query.filter_by(active_tid=t.id)
+        if (job.status == JobStatus.RUNNING.value and as_utc(job.started) < run_cutoff)
+        or (job.status == JobStatus.QUEUED.value and as_utc(job.created) < queue_cutoff)
+    ]
+    for job in stale:
+        job.status = JobStatus.FAILED.value
+        job.message = "Timed out"
+        job.active_tid = None
+    if stale:
+        db.session.commit()
+
+
+def latest_job(tid: int) -> Job:
+    return (
+        Job.query.filter_by(tid=tid).order_by(Job.created.desc(), Job.id.desc()).first()
+    )
+
+
+def is_done(job: Job) -> bool:
+    return job.status in (JobStatus.FINISHED.value, JobStatus.FAILED.value)
@@ -1,10 +1,13 @@
 from data_models.exceptions import ConclusionError
 from data_models.match import Match, MatchResult
 from data_models.model_store import db
+from . import played_matrix
 from . import players as p_logic
+from . import snapshots
+from . import standings
 
 
-def conclude(match: Match):
+def check_reported(match: Match):
     if match.result not in [
         MatchResult.CORP_WIN.value,
         MatchResult.RUNNER_WIN.value,
@@ -12,32 +15,41 @@ def conclude(match: Match):
         MatchResult.INTENTIONAL_DRAW.value,
     ]:
         raise ConclusionError("No result recorded")
+
+
+def conclude(match: Match):
+    check_reported(match)
     match.concluded = True
     db.session.add(match)
+    refresh_standings(match)
     db.session.commit()
 
 
 def corp_win(match: Match):
     match.result = MatchResult.CORP_WIN.value
     db.session.add(match)
+    refresh_standings(match)
     db.session.commit()
 
 
 def runner_win(match: Match):
     match.result = MatchResult.RUNNER_WIN.value
     db.session.add(match)
+    refresh_standings(match)
     db.session.commit()
 
 
 def tie(match: Match):
     match.result = MatchResult.DRAW.value
     db.session.add(match)
+    refresh_standings(match)
     db.session.commit()
 
 
 def intentional_draw(match: Match):
     match.result = MatchResult.INTENTIONAL_DRAW.value
     db.session.add(match)
+    refresh_standings(match)
     db.session.commit()
 
 
@@ -45,15 +57,39 @@ def reset(match: Match):
     match.result = None
     match.concluded = False
     db.session.add(match)
+    refresh_standings(match)
     db.session.commit()
 
 
 def delete(match: Match):
+    tid, player_ids = match.tid, [match.corp_player_id, match.runner_player_id]
+    tournament, rnd = match.tournament, match.rnd
+    concluded = played_matrix.was_concluded(match)
+    discard(match)
+    standings.update_standings(tid, player_ids)
+    if concluded:
+        snapshots.rebuild_snapshots(tournament, rnd)
+    db.session.commit()
+
+
+def refresh_standings(match: Match):
+    """
+    Brings the standings up to date after a change to the match, along with the
+    snapshots of its round on if it was already concluded. Call it before the
+    change is flushed.
+    """
+    concluded = played_matrix.was_concluded(match)
+    standings.update_for_match(match)
+    if concluded:
+        snapshots.rebuild_snapshots(match.tournament, match.rnd)
+
+
+def discard(match: Match):
+    """Deletes the match without updating standings or committing"""
     if match.is_bye:
-        match.corp_player.recieved_bye = False
+        match.corp_player.received_bye = False
         # p_logic.reset(match.corp_player)
     # else:
     #     p_logic.reset(match.corp_player)
     #     p_logic.reset(match.runner_player)
     db.session.delete(match)
-    db.session.commit()
@@ -1,4 +1,13 @@
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import repeat
+import json
+import logging
+import multiprocessing
 from random import random, shuffle
+import time
 from data_models.exceptions import PairingException
 from data_models.match import Match
 from data_models.model_store import db
@@ -6,50 +15,99 @@ from data_models.players import Player
 from data_models.tournaments import Tournament
 import aesops.business_logic.players as p_logic
 import aesops.business_logic.tournament as t_logic
-from networkx import Graph, max_weight_matching
-from itertools import combinations
+import aesops.business_logic.pairing_search as pairing_search
+import aesops.business_logic.played_matrix as played_matrix
+import aesops.business_logic.standings as standings
+import aesops.business_logic.telemetry as telemetry
+from aesops.business_logic.history import MatchHistory, load_history
+from pairing.cost_matrix import get_pairing_state
+import pairing.anytime_pairing as anytime_pairing
+import pairing.score_groups as score_groups
+from pairing.solvers import (
+    MATCHING_SOLVERS,
+    build_pairing_graph,
+    dense_solver,
+    networkx_solver,
+    pairing_edges,
+    seeded_pairings,
+    solver_pool,
+)
+from flask import current_app
+import numpy as np
 
+logger = logging.getLogger(__name__)
 
-def create_match(
+# Below this many players the score groups are solved one after another, and
+# solve_by_deadline solves in process, as starting worker processes would take
+# longer than the matching itself
+MIN_PARALLEL_POOL = 100
+# Score group pairings costing more than this are re-paired across groups
+FLOAT_COST = 9
+
+
+def build_match(
     tournament: Tournament,
     corp_player: Player,
     runner_player: Player,
     is_bye=False,
     table_number=None,
-):
+) -> Match:
+    """
+    Creates a match for the tournament's current round without committing it,
+    so that a whole round can be written in one transaction.
+    """
     if is_bye:
         m = Match(
             tid=tournament.id,
-            corp_player_id=corp_player.id,
+            corp_player=corp_player,
             rnd=tournament.current_round,
             is_bye=is_bye,
             result=1,
         )
-        corp_player.recieved_bye = True
+        corp_player.received_bye = True
         db.session.add(corp_player)
     else:
         m = Match(
             tid=tournament.id,
-            corp_player_id=corp_player.id,
-            runner_player_id=runner_player.id,
+            corp_player=corp_player,
+            runner_player=runner_player,
             rnd=tournament.current_round,
             is_bye=is_bye,
         )
     if table_number:
         m.table_number = table_number
     db.session.add(m)
+    if is_bye:
+        # Byes count as soon as they're made
+        standings.update_standings(tournament.id, [corp_player.id])
+    return m
+
+
+def create_match(
+    tournament: Tournament,
+    corp_player: Player,
+    runner_player: Player,
+    is_bye=False,
+    table_number=None,
+):
+    m = build_match(tournament, corp_player, runner_player, is_bye, table_number)
     db.session.commit()
     return m
 
 
 class CachedPlayer:
-    def __init__(self, player: Player):
+    def __init__(self, player: Player, history: MatchHistory = None):
         self.id = player.id
         self.score = player.score
-        self.side_bias = p_logic.get_side_balance(player)
         self.active = player.active
-        self.corp_matches = p_logic.get_opponent_ids(player, side="corp")
-        self.runner_matches = p_logic.get_opponent_ids(player, side="runner")
+        if history is None:
+            self.side_bias = p_logic.get_side_balance(player)
+            self.corp_matches = p_logic.get_opponent_ids(player, side="corp")
+            self.runner_matches = p_logic.get_opponent_ids(player, side="runner")
+        else:
+            self.side_bias = history.side_balance(player.id)
+            self.corp_matches = history.opponent_ids(player.id, side="corp")
+            self.runner_matches = history.opponent_ids(player.id, side="runner")
         self.fixed_table = player.fixed_table
         self.table_number = player.table_number
 
@@ -57,79 +115,443 @@ class CachedPlayer:
         return f"<CachedPlayer {self.name} ({self.id})>"
 
 
-def pair_round(t: Tournament):
+@dataclass
+class ProposedMatch:
+    corp_player_id: int
+    # None for a bye
+    runner_player_id: int = None
+    table_number: int = None
+    cost: int = 0
+    rematch: bool = False
+
+    @property
+    def is_bye(self) -> bool:
+        return self.runner_player_id is None
+
+
+@dataclass
+class PairingProposal:
+    """
+    A round's pairings worked out in memory, before anything is written.
+
+    It can be shown to the TO as a preview, round tripped through JSON, and then
+    written with commit_proposal exactly as it is.
+    """
+
+    tid: int
+    rnd: int
+    matches: list[ProposedMatch] = field(default_factory=list)
+    # False when PAIRING_DEADLINE cut the exact matching short
+    optimal: bool = True
+    # Timings and graph measures for telemetry.record_pairing_run
+    stats: dict = field(default_factory=dict)
+
+    @property
+    def total_cost(self) -> int:
+        return sum(m.cost for m in self.matches)
+
+    @property
+    def rematches(self) -> int:
+        return sum(m.rematch for m in self.matches)
+
+    @property
+    def byes(self) -> int:
+        return sum(m.is_bye for m in self.matches)
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, data: str) -> "PairingProposal":
+        try:
+            raw = json.loads(data)
+            return cls(
+                tid=int(raw["tid"]),
+                rnd=int(raw["rnd"]),
+                matches=[ProposedMatch(**m) for m in raw["matches"]],
+                optimal=bool(raw.get("optimal", True)),
+                stats=dict(raw.get("stats", {})),
+            )
+        except (ValueError, KeyError, TypeError):
+            raise PairingException("Could not read the proposed pairings")
+
+
+def check_can_pair(t: Tournament):
     if not all([m.concluded for m in t.active_matches]):
         raise PairingException(
             f"Not all active matches are finished in current round: {t.current_round}"
         )
     if t.cut is not None:
         raise PairingException("Tournament is in cut - cannot pair swiss rounds")
-    t.current_round += 1
-    db.session.add(t)
-    db.session.commit()
-    fixed_table_numbers = []
-    graph = Graph()
-    pairing_pool, bye_players = t_logic.bye_setup(t)
+
+
+def propose_round(t: Tournament, solver: str = None) -> PairingProposal:
+    """
+    Pairs the next round without writing anything to the database.
+
+    Returns the matches, their tables and what each pairing cost, for
+    commit_proposal to save or for the TO to look over first. The solver
+    defaults to the tournament's own, then the PAIRING_SOLVER setting.
+    """
+    check_can_pair(t)
+    solver = solver or t.solver or current_app.config.get("PAIRING_SOLVER", "networkx")
+    get_solver(solver)
+    rnd = t.current_round + 1
+    pairing_pool, bye_players = t_logic.bye_setup(t, rnd)
     shuffle(pairing_pool)
-    pairing_pool_dict = {player.id: CachedPlayer(player) for player in pairing_pool}
+    started = time.perf_counter()
+    history = load_history(t)
+    pairing_pool_dict = {
+        player.id: CachedPlayer(player, history) for player in pairing_pool
+    }
+    reserved_tables = set()
     for pid, player in pairing_pool_dict.items():
-        graph.add_node(pid)
         if player.fixed_table:
-            fixed_table_numbers.append(player.table_number)
-    for pair in combinations(pairing_pool_dict, 2):
-        pair_weight = find_min_edge(
-            pairing_pool_dict[pair[0]], pairing_pool_dict[pair[1]]
-        )
-        if pair_weight < 100:
-            graph.add_edge(pair[0], pair[1], weight=1000 - pair_weight)
-        else:
-            continue
-    pairings = max_weight_matching(graph, maxcardinality=True)
+            reserved_tables.add(player.table_number)
+    pool = list(pairing_pool_dict.values())
+    index = {player.id: i for i, player in enumerate(pool)}
+    played = played_matrix.load_played_matrix(t)
+    costs = get_pairing_state(t.id).update(pool, played)
+    costs_built = time.perf_counter()
+    deadline = current_app.config.get("PAIRING_DEADLINE")
+    if deadline is None:
+        pairings = solve_pairings(pool, costs, solver=solver)
+        optimal = True
+    else:
+        pairings, optimal = solve_by_deadline(pool, costs, deadline, solver=solver)
+    matched = time.perf_counter()
+    matches = []
+    table_scores = []
+    imbalance = Counter()
     for pair in pairings:
-        corp, runner = assign_side(
-            pairing_pool_dict[pair[0]], pairing_pool_dict[pair[1]]
-        )
+        p1 = pairing_pool_dict[pair[0]]
+        p2 = pairing_pool_dict[pair[1]]
+        corp, runner = choose_sides(p1, p2)
         table_number = None
         if corp.fixed_table or runner.fixed_table:
             table_number = (
                 corp.table_number if corp.fixed_table else runner.table_number
             )
-        create_match(
-            tournament=t,
-            corp_player=corp,
-            runner_player=runner,
-            table_number=table_number,
+        i, j = sorted((index[p1.id], index[p2.id]))
+        matches.append(
+            ProposedMatch(
+                corp_player_id=corp.id,
+                runner_player_id=runner.id,
+                table_number=table_number,
+                cost=int(costs[i, j]),
+                rematch=played.has_played(p1.id, p2.id),
+            )
         )
+        table_scores.append(p1.score + p2.score)
+        imbalance[abs(corp.side_bias + 1)] += 1
+        imbalance[abs(runner.side_bias - 1)] += 1
     if bye_players is not None:
         for player in bye_players:
-            create_match(
-                tournament=t, corp_player=player, runner_player=None, is_bye=True
-            )
-    ranked_matches = sorted(
-        t.active_matches,
-        key=lambda m: (
-            (
-                p_logic.get_record(m.corp_player)["score"]
-                + p_logic.get_record(m.runner_player)["score"]
-            )
-            if not m.is_bye
-            else -1
+            matches.append(ProposedMatch(corp_player_id=player.id))
+            table_scores.append(-1)
+            imbalance[abs(history.side_balance(player.id))] += 1
+    tables = allocate_tables(
+        table_scores, [m.table_number for m in matches], reserved_tables
+    )
+    for match, table_number in zip(matches, tables):
+        match.table_number = table_number
+    matches.sort(key=lambda m: m.table_number)
+    stats = {
+        "solver": solver,
+        "player_count": len(pool) + len(bye_players or []),
+        "edge_count": solver_edge_count(
+            pool, costs, pairings, optimal, grouped=deadline is None
         ),
-        reverse=True,
+        "cost_time": costs_built - started,
+        "matching_time": matched - costs_built,
+        # JSON object keys are strings, so store them that way from the start
+        "side_imbalance": {str(k): v for k, v in sorted(imbalance.items())},
+    }
+    return PairingProposal(
+        tid=t.id, rnd=rnd, matches=matches, optimal=optimal, stats=stats
     )
 
-    i = 1
-    for match in ranked_matches:
-        if match.table_number:
-            continue
-        while i in fixed_table_numbers:
-            i += 1
-        match.table_number = i
-        db.session.add(match)
-        i += 1
+
+def commit_proposal(t: Tournament, proposal: PairingProposal):
+    """
+    Writes a proposed round in one transaction, without pairing it again.
+
+    The proposal is rejected if the tournament has moved on since it was made,
+    a round paired or a paired player dropped in the meantime. Active players
+    it leaves out, such as anyone registered since, are left unpaired for the
+    TO to pair by hand.
+    """
+    check_can_pair(t)
+    if proposal.tid != t.id or proposal.rnd != t.current_round + 1:
+        raise PairingException(
+            "These pairings are out of date, preview the round again"
+        )
+    players = {p.id: p for p in t.active_players}
+    paired_ids = [
+        pid
+        for m in proposal.matches
+        for pid in (m.corp_player_id, m.runner_player_id)
+        if pid is not None
+    ]
+    if len(paired_ids) != len(set(paired_ids)):
+        raise PairingException(
+            "These pairings list a player more than once, preview the round again"
+        )
+    if not set(paired_ids) <= set(players):
+        raise PairingException(
+            "The players in these pairings have changed, preview the round again"
+        )
+    # The round number, matches, byes and tables are all one transaction, if
+    # anything fails none of it is kept
+    try:
+        started = time.perf_counter()
+        t.current_round = proposal.rnd
+        db.session.add(t)
+        for m in proposal.matches:
+            build_match(
+                tournament=t,
+                corp_player=players[m.corp_player_id],
+                runner_player=None if m.is_bye else players[m.runner_player_id],
+                is_bye=m.is_bye,
+                table_number=m.table_number,
+            )
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    # Recorded once the round is saved, so the write time includes the commit
+    telemetry.record_pairing_run(t, proposal, time.perf_counter() - started)
     db.session.commit()
 
 
+def pair_round(t: Tournament, solver: str = None) -> PairingProposal:
+    proposal = propose_round(t, solver=solver)
+    commit_proposal(t, proposal)
+    return proposal
+
+
+def allocate_tables(
+    scores: list[int], fixed_tables: list[int], reserved_tables: set[int]
+) -> list[int]:
+    """
+    Numbers tables from the highest combined score down, skipping any table
+    numbers reserved for players with fixed tables.
+
+    Takes each table's combined score and any table number it is already fixed
+    to, and returns the table numbers in the same order. Tables on equal scores
+    keep the order they were given in.
+    """
+    order = sorted(range(len(scores)), key=lambda i: scores[i], reverse=True)
+    tables = list(fixed_tables)
+    table_number = 1
+    for i in order:
+        if tables[i]:
+            continue
+        while table_number in reserved_tables:
+            table_number += 1
+        tables[i] = table_number
+        table_number += 1
+    return tables
+
+
+def get_solver(solver: str = None):
+    solver = solver or current_app.config.get("PAIRING_SOLVER", "networkx")
+    if solver not in MATCHING_SOLVERS:
+        raise PairingException(f"Unknown pairing solver: {solver}")
+    return MATCHING_SOLVERS[solver]
+
+
+def solve_pairings(
+    pool: list[CachedPlayer], costs: np.ndarray, solver: str = None
+) -> set[tuple[int, int]]:
+    """
+    Finds the maximum cardinality, minimum cost set of pairings for the pool.
+
+    The solver defaults to the PAIRING_SOLVER setting. If PAIRING_SCORE_WINDOW is
+    set the sparse graph is tried first, falling back to the full graph when it
+    can't pair everyone. With PAIRING_SEARCH_SEEDS above 1 that many shuffles of
+    the pool are paired in parallel, keeping the one with the least side
+    imbalance (see pairing_search). PAIRING_SCORE_GROUPS pairs each score group
+    separately instead (see grouped_pairings).
+    """
+    solve = get_solver(solver)
+    config = current_app.config
+    if config.get("PAIRING_SCORE_GROUPS"):
+        return grouped_pairings(
+            pool, costs, solve, workers=config.get("PAIRING_SEARCH_WORKERS")
+        )
+    attempt = partial(
+        seeded_pairings,
+        solve,
+        solver_pool(pool),
+        costs,
+        config.get("PAIRING_SCORE_WINDOW"),
+    )
+    return pairing_search.search(
+        attempt,
+        seeds=config.get("PAIRING_SEARCH_SEEDS", 1),
+        key=partial(pairing_quality, pool, costs),
+        workers=config.get("PAIRING_SEARCH_WORKERS"),
+        timeout=config.get("PAIRING_SEARCH_TIMEOUT"),
+    )
+
+
+def grouped_pairings(
+    pool: list[CachedPlayer], costs: np.ndarray, solve, workers: int = None
+) -> set[tuple[int, int]]:
+    """
+    Pairs each score group on its own, in parallel for large pools, and
+    stitches the results together.
+
+    Anyone a group couldn't pair internally (everyone left has already played
+    each other, say) or could only pair at more than FLOAT_COST is paired across
+    groups afterwards, which is how players float up. If that still leaves
+    players unpaired the whole pool is solved globally instead.
+    """
+    groups = pool_score_groups(pool, costs)
+    group_pools = [solver_pool(pool[i] for i in group) for group in groups]
+    group_costs = [costs[np.ix_(group, group)] for group in groups]
+    if workers == 1 or len(groups) == 1 or len(pool) < MIN_PARALLEL_POOL:
+        results = map(seeded_pairings, repeat(solve), group_pools, group_costs)
+        results = list(results)
+    else:
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=pairing_search.worker_context()
+        ) as executor:
+            results = list(
+                executor.map(seeded_pairings, repeat(solve), group_pools, group_costs)
+            )
+    index = {player.id: i for i, player in enumerate(pool)}
+    # Pairs worse than a one game score gap, usually forced onto the same side,
+    # are re-paired across groups along with anyone left over
+    pairings = {
+        pair
+        for pair in set().union(*results)
+        if costs[index[pair[0]], index[pair[1]]] <= FLOAT_COST
+    }
+    paired = {pid for pair in pairings for pid in pair}
+    leftovers = np.array(
+        [i for i, player in enumerate(pool) if player.id not in paired],
+        dtype=np.int64,
+    )
+    if len(leftovers):
+        pairings |= solve(
+            [pool[i] for i in leftovers], costs[np.ix_(leftovers, leftovers)]
+        )
+    if len(pairings) * 2 < len(pool) - 1:
+        return solve(pool, costs)
+    return pairings
+
+
+def pool_score_groups(pool: list[CachedPlayer], costs: np.ndarray) -> list[np.ndarray]:
+    allowed = pairing_edges(pool, costs)
+    allowed |= allowed.T
+    return score_groups.score_groups([player.score for player in pool], costs, allowed)
+
+
+def solver_edge_count(
+    pool: list[CachedPlayer],
+    costs: np.ndarray,
+    pairings: set[tuple[int, int]],
+    optimal: bool = True,
+    grouped: bool = True,
+) -> int:
+    """
+    How many edges the solver was given for these pairings, picking the graph
+    as solve_pairings does: each score group's with PAIRING_SCORE_GROUPS (which
+    solve_by_deadline doesn't use, so `grouped` is False for it), the score
+    window's when that paired everyone, otherwise the whole pool's. Best-effort
+    pairings are built on the whole pool too.
+    """
+    config = current_app.config
+    if optimal and grouped and config.get("PAIRING_SCORE_GROUPS"):
+        edges = 0
+        for group in pool_score_groups(pool, costs):
+            group_pool = [pool[i] for i in group]
+            group_costs = costs[np.ix_(group, group)]
+            edges += np.count_nonzero(pairing_edges(group_pool, group_costs))
+        return int(edges)
+    window = config.get("PAIRING_SCORE_WINDOW")
+    if optimal and window is not None and len(pairings) * 2 == len(pool):
+        sparse = pairing_edges(pool, costs, window)
+        allowed = sparse | sparse.T
+        index = {player.id: i for i, player in enumerate(pool)}
+        if all(allowed[index[p1], index[p2]] for p1, p2 in pairings):
+            return int(np.count_nonzero(sparse))
+    return int(np.count_nonzero(pairing_edges(pool, costs)))
+
+
+def solve_by_deadline(
+    pool: list[CachedPlayer], costs: np.ndarray, deadline: float, solver: str = None
+) -> tuple[set[tuple[int, int]], bool]:
+    """
+    Pairs the pool within `deadline` seconds, for events big enough that an
+    exact matching could outlast a web request.
+
+    The exact solver runs in a separate process while a greedy pairing is
+    built and improved here (see anytime_pairing). If the exact solver
+    finishes in time its result is used and reported as optimal, otherwise it
+    is stopped (or has failed, which is logged) and the best greedy pairing is
+    returned as best-effort. Pools
+    smaller than MIN_PARALLEL_POOL are solved exactly in this process, as they
+    take less time than starting the worker would.
+    """
+    solve = get_solver(solver)
+    score_window = current_app.config.get("PAIRING_SCORE_WINDOW")
+    if len(pool) < MIN_PARALLEL_POOL:
+        return seeded_pairings(solve, pool, costs, score_window), True
+    started = time.monotonic()
+
+    def time_left():
+        return max(deadline - (time.monotonic() - started), 0)
+
+    workers = pairing_search.worker_context().Pool(processes=1)
+    try:
+        exact = workers.apply_async(
+            seeded_pairings, (solve, solver_pool(pool), costs, score_window, 0)
+        )
+        allowed = pairing_edges(pool, costs)
+        allowed |= allowed.T
+        mates = anytime_pairing.greedy_pairing(
+            np.array([player.score for player in pool]), costs, allowed
+        )
+        mates = anytime_pairing.improve_pairing(
+            mates, costs, allowed, stop=lambda: exact.ready() or not time_left()
+        )
+        try:
+            return exact.get(timeout=time_left()), True
+        except multiprocessing.TimeoutError:
+            pass
+        except Exception:
+            # The greedy pairing doesn't depend on the worker, so still use it
+            logger.exception("Exact pairing failed, returning best-effort pairing")
+    finally:
+        # Don't leave an unfinished exact solve burning a CPU
+        workers.terminate()
+    return {(pool[i].id, pool[j].id) for i, j in enumerate(mates) if j > i}, False
+
+
+def pairing_quality(
+    pool: list[CachedPlayer], costs: np.ndarray, pairings: set[tuple[int, int]]
+) -> tuple[int, int, int]:
+    """
+    Sort key for alternative pairings of the same pool, lower is better.
+
+    Most pairings first, then lowest total cost, then the least total side
+    imbalance once each pair has been given sides.
+    """
+    index = {player.id: i for i, player in enumerate(pool)}
+    total_cost = 0
+    imbalance = 0
+    for p1_id, p2_id in pairings:
+        p1 = pool[index[p1_id]]
+        p2 = pool[index[p2_id]]
+        total_cost += int(costs[index[p1_id], index[p2_id]])
+        corp, runner = choose_sides(p1, p2)
+        imbalance += abs(corp.side_bias + 1) + abs(runner.side_bias - 1)
+    return (-len(pairings), total_cost, imbalance)
+
+
 def legal_options(p1: CachedPlayer, p2: CachedPlayer) -> list[bool]:
     p1_can_corp = True
     p2_can_corp = True
@@ -182,6 +604,13 @@ def has_played(p1: CachedPlayer, p2: CachedPlayer):
 
 
 def assign_side(p1: CachedPlayer, p2: CachedPlayer) -> tuple[Player, Player]:
+    corp, runner = choose_sides(p1, p2)
+    return (db.session.get(Player, corp.id), db.session.get(Player, runner.id))
+
+
+def choose_sides(
+    p1: CachedPlayer, p2: CachedPlayer
+) -> tuple[CachedPlayer, CachedPlayer]:
 
     # Currently this sorta breaks if it's the third times players are matched
     if p1.id in p2.runner_matches:
@@ -202,4 +631,4 @@ def assign_side(p1: CachedPlayer, p2: CachedPlayer) -> tuple[Player, Player]:
     else:
         corp = p2
         runner = p1
-    return (db.session.get(Player, corp.id), db.session.get(Player, runner.id))
+    return (corp, runner)
@@ -0,0 +1,71 @@
+"""
+Runs several independently seeded pairing attempts at once and keeps the best.
+
+Blossom returns one of possibly many maximum weight matchings, and which one
+depends on the order the players were given in. Trying a handful of orders in
+parallel lets a multi-core server pick the one that is best on a secondary
+measure (side imbalance, say) in about the time a single attempt takes.
+
+Worker processes are never forked from the web server, as a fork copies its
+database connections and any locks held by other threads. They come from a fork
+server with the solvers (which don't import the app) already loaded where the
+platform has one, and are spawned otherwise. The fork server starts with the
+first pool a process makes and is reused after that.
+"""
+
+import multiprocessing
+import time
+from typing import Callable
+
+# Imported once by the fork server rather than by every worker
+PRELOAD = ["pairing.solvers"]
+
+
+def worker_context():
+    """The multiprocessing context pairing worker processes are started from"""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def search(
+    attempt: Callable[[int], object],
+    seeds: int,
+    key: Callable[[object], object],
+    workers: int = None,
+    timeout: float = None,
+):
+    """
+    Calls attempt(seed) for every seed in range(seeds) and returns the result
+    with the lowest key.
+
+    Seed 0 runs in this process so there is always a result to return. The
+    others run in a process pool and are only considered if they finish within
+    `timeout` seconds of the search starting, anything slower is stopped.
+    `attempt` must be picklable, a module level function or a partial of one.
+    """
+    started = time.monotonic()
+    if seeds <= 1:
+        return attempt(0)
+
+    def time_left():
+        if timeout is None:
+            return None
+        return max(timeout - (time.monotonic() - started), 0)
+
+    pool = worker_context().Pool(processes=workers)
+    try:
+        pending = [pool.apply_async(attempt, (seed,)) for seed in range(1, seeds)]
+        results = [attempt(0)]
+        for result in pending:
+            try:
+                results.append(result.get(timeout=time_left()))
+            except Exception:
+                # Failed, or still running at the deadline
+                continue
+    finally:
+        # Stop any attempts that ran past the deadline
+        pool.terminate()
+    return min(results, key=key)
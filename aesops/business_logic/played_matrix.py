@@ -0,0 +1,195 @@
+"""
+Who has played whom in a tournament, kept as two boolean matrices.
+
+played_corp[i, j] is True once player i has corped against player j in a
+concluded match, played_runner[i, j] once player i has run against player j.
+Players are indexed densely in the order they were first seen. The matrices are
+stored bit packed on the tournament row and updated as rounds conclude, so
+rematch and side checks are a single lookup, or one slice for a whole pool.
+
+Deleting or reopening a concluded match, however it's done through the ORM,
+drops the stored matrix (see invalidate_on_flush) and it is rebuilt from the
+matches when next needed. Statements that bypass the ORM must call
+invalidate_played_matrix themselves.
+"""
+
+import json
+from typing import Iterable, Sequence
+
+import numpy as np
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import attributes
+
+from data_models.match import Match
+from data_models.model_store import db
+from data_models.tournaments import Tournament
+
+
+class PlayedMatrix:
+    def __init__(
+        self,
+        player_ids: Sequence[int] = (),
+        played_corp: np.ndarray = None,
+        played_runner: np.ndarray = None,
+    ):
+        n = len(player_ids)
+        self.player_ids = list(player_ids)
+        self.index = {pid: i for i, pid in enumerate(self.player_ids)}
+        self.played_corp = (
+            np.zeros((n, n), dtype=bool) if played_corp is None else played_corp
+        )
+        self.played_runner = (
+            np.zeros((n, n), dtype=bool) if played_runner is None else played_runner
+        )
+
+    def add_players(self, player_ids: Iterable[int]):
+        new_ids = [pid for pid in player_ids if pid not in self.index]
+        if not new_ids:
+            return
+        for pid in new_ids:
+            self.index[pid] = len(self.player_ids)
+            self.player_ids.append(pid)
+        self.played_corp = np.pad(self.played_corp, (0, len(new_ids)))
+        self.played_runner = np.pad(self.played_runner, (0, len(new_ids)))
+
+    def record(self, corp_id: int, runner_id: int):
+        self.add_players([corp_id, runner_id])
+        corp = self.index[corp_id]
+        runner = self.index[runner_id]
+        self.played_corp[corp, runner] = True
+        self.played_runner[runner, corp] = True
+
+    def has_played(self, p1_id: int, p2_id: int) -> bool:
+        i = self.index.get(p1_id)
+        j = self.index.get(p2_id)
+        if i is None or j is None:
+            return False
+        return bool(self.played_corp[i, j] or self.played_runner[i, j])
+
+    def can_corp(self, corp_id: int, runner_id: int) -> bool:
+        """False if this pairing would repeat a match on the same sides"""
+        i = self.index.get(corp_id)
+        j = self.index.get(runner_id)
+        if i is None or j is None:
+            return True
+        return not self.played_corp[i, j]
+
+    def block(
+        self, row_ids: Sequence[int], col_ids: Sequence[int]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The played_corp and played_runner entries for `row_ids` against
+        `col_ids`, in the order given. Players the matrix hasn't seen have no
+        history.
+        """
+        rows = np.array([self.index.get(pid, -1) for pid in row_ids], dtype=np.int64)
+        cols = np.array([self.index.get(pid, -1) for pid in col_ids], dtype=np.int64)
+        played_corp = np.zeros((len(rows), len(cols)), dtype=bool)
+        played_runner = np.zeros((len(rows), len(cols)), dtype=bool)
+        known = np.ix_(np.flatnonzero(rows >= 0), np.flatnonzero(cols >= 0))
+        stored = np.ix_(rows[rows >= 0], cols[cols >= 0])
+        played_corp[known] = self.played_corp[stored]
+        played_runner[known] = self.played_runner[stored]
+        return played_corp, played_runner
+
+    def submatrices(self, player_ids: Sequence[int]) -> tuple[np.ndarray, np.ndarray]:
+        """The same matrices as cost_matrix.pack_history, for `player_ids`"""
+        return self.block(player_ids, player_ids)
+
+    def to_bytes(self) -> bytes:
+        return np.packbits(np.stack([self.played_corp, self.played_runner])).tobytes()
+
+    @classmethod
+    def from_bytes(cls, player_ids: Sequence[int], data: bytes) -> "PlayedMatrix":
+        n = len(player_ids)
+        bits = np.unpackbits(np.frombuffer(data, dtype=np.uint8), count=2 * n * n)
+        bits = bits.astype(bool).reshape(2, n, n)
+        return cls(player_ids, bits[0].copy(), bits[1].copy())
+
+
+def rebuild_played_matrix(tournament: Tournament) -> PlayedMatrix:
+    rows = db.session.execute(
+        db.select(Match.corp_player_id, Match.runner_player_id).where(
+            Match.tid == tournament.id,
+            Match.concluded == True,
+            Match.is_bye == False,
+        )
+    ).all()
+    played = PlayedMatrix(sorted({pid for row in rows for pid in row}))
+    for corp_id, runner_id in rows:
+        played.record(corp_id, runner_id)
+    return played
+
+
+def load_played_matrix(tournament: Tournament) -> PlayedMatrix:
+    """
+    The tournament's stored matrix, or one rebuilt from its matches if there
+    is none (new tournaments, or after invalidate_played_matrix).
+    """
+    if inspect(tournament).unloaded & {"played_ids", "played_bits"}:
+        # Both deferred columns in one query
+        db.session.refresh(tournament, ["played_ids", "played_bits"])
+    if tournament.played_bits is None or tournament.played_ids is None:
+        return rebuild_played_matrix(tournament)
+    return PlayedMatrix.from_bytes(
+        json.loads(tournament.played_ids), tournament.played_bits
+    )
+
+
+def save_played_matrix(tournament: Tournament, played: PlayedMatrix):
+    tournament.played_ids = json.dumps(played.player_ids)
+    tournament.played_bits = played.to_bytes()
+    db.session.add(tournament)
+
+
+def record_matches(tournament: Tournament, matches: Iterable[Match]):
+    """
+    Adds concluded matches to the stored matrix, without committing. Recording
+    a match twice is harmless.
+    """
+    played = load_played_matrix(tournament)
+    for match in matches:
+        if match.concluded and not match.is_bye:
+            played.record(match.corp_player_id, match.runner_player_id)
+    save_played_matrix(tournament, played)
+
+
+def invalidate_played_matrix(tournament: Tournament):
+    """
+    Drops the stored matrix when matches are deleted or reopened, it is
+    rebuilt from the matches the next time it's needed.
+    """
+    tournament.played_ids = None
+    tournament.played_bits = None
+    db.session.add(tournament)
+
+
+def was_concluded(match: Match) -> bool:
+    """Whether the match was concluded as last loaded, before any pending change"""
+    history = attributes.get_history(match, "concluded")
+    return True in (history.deleted or history.unchanged)
+
+
+@event.listens_for(db.session, "before_flush")
+def invalidate_on_flush(session, flush_context, instances):
+    tids = {
+        obj.tid
+        for obj in session.deleted
+        if isinstance(obj, Match) and was_concluded(obj) and not obj.is_bye
+    }
+    for obj in session.dirty:
+        if not isinstance(obj, Match) or not was_concluded(obj):
+            continue
+        changed = (
+            attributes.get_history(obj, name).has_changes()
+            for name in ("concluded", "corp_player_id", "runner_player_id")
+        )
+        if any(changed):
+            tids.add(obj.tid)
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Tournament)}
+    with session.no_autoflush:
+        for tid in tids - deleted - {None}:
+            tournament = session.get(Tournament, tid)
+            if tournament is not None:
+                tournament.played_ids = None
+                tournament.played_bits = None
@@ -37,12 +37,8 @@ def get_record(player: Player, count_byes=True) -> dict[str, float]:
 
 
 def get_side_balance(player: Player):
-    played_corp_matchest = [
-        m for m in player.corp_matches if m.is_bye == False and m.concluded
-    ]
-    return len(played_corp_matchest) - len(
-        [m for m in player.runner_matches if m.concluded]
-    )
+    # Read from the player's result counters, which count concluded matches
+    return player.side_balance
 
 
 # def get_average_score(player: Player) -> float:
@@ -120,25 +116,13 @@ def is_paired(player: Player, rnd):
 
 
 def side_record(player: Player, side):
-    results = {"W": 0, "L": 0, "T": 0}
-    side_function = {"runner": player.runner_matches, "corp": player.corp_matches}
-    for match in side_function[side]:
-        if match.is_bye:
-            continue
-        if match.concluded:
-            if match.result == MatchResult.RUNNER_WIN.value:
-                if side == "runner":
-                    results["W"] += 1
-                else:
-                    results["L"] += 1
-            elif match.result == MatchResult.CORP_WIN.value:
-                if side == "corp":
-                    results["W"] += 1
-                else:
-                    results["L"] += 1
-            else:
-                results["T"] += 1
-    return results
+    if side not in ["corp", "runner"]:
+        raise ValueError("Side must be either 'corp' or 'runner'")
+    return {
+        "W": getattr(player, f"{side}_wins"),
+        "L": getattr(player, f"{side}_losses"),
+        "T": getattr(player, f"{side}_ties"),
+    }
 
 
 def get_opponent_ids(player: Player, side=None):
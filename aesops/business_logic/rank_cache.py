@@ -0,0 +1,90 @@
+"""
+Caches calculate_player_ranks per tournament, keyed by the tournament's version.
+
+Every flush that adds, changes or deletes one of a tournament's matches or
+players, or the tournament itself, bumps tournament.version in the same
+transaction (see bump_versions). A cached ranking is only returned while the
+version it was computed at is still current, so a stale ranking can't be served
+after a change, whichever process made it. Statements that bypass the ORM must
+call bump_version themselves.
+
+Only the computed numbers are cached. The Player objects are re-attached from
+the current session on every read, so callers can use them as usual.
+"""
+
+from collections import OrderedDict
+from itertools import chain
+import threading
+
+from sqlalchemy import event
+
+from data_models.match import Match
+from data_models.model_store import db
+from data_models.players import Player
+from data_models.tournaments import Tournament
+
+# How many tournaments keep their rankings in memory
+MAX_CACHED_RANKS = 64
+
+# tid -> (version, entries without their "player"), most recently used last
+cached_ranks = OrderedDict()
+cached_ranks_lock = threading.Lock()
+
+
+def bump_version(tournament: Tournament):
+    # Incremented in SQL, so concurrent changes from other processes all count
+    tournament.version = Tournament.version + 1
+
+
+@event.listens_for(db.session, "before_flush")
+def bump_versions(session, flush_context, instances):
+    tids = set()
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, (Match, Player)):
+            tids.add(obj.tid)
+        elif (
+            isinstance(obj, Tournament)
+            and obj.id is not None
+            and session.is_modified(obj)
+        ):
+            tids.add(obj.id)
+    deleted = {obj.id for obj in session.deleted if isinstance(obj, Tournament)}
+    with session.no_autoflush:
+        for tid in tids - deleted - {None}:
+            tournament = session.get(Tournament, tid)
+            if tournament is not None:
+                bump_version(tournament)
+
+
+def has_pending_changes() -> bool:
+    return bool(db.session.new or db.session.dirty or db.session.deleted)
+
+
+def get(tournament: Tournament) -> list[dict]:
+    """
+    Returns the cached ranking for the tournament's current version, or None.
+    """
+    if has_pending_changes():
+        # Not flushed yet, so the version doesn't account for them
+        return None
+    with cached_ranks_lock:
+        cached = cached_ranks.get(tournament.id)
+        if cached is None or cached[0] != tournament.version:
+            return None
+        cached_ranks.move_to_end(tournament.id)
+        entries = cached[1]
+    players = {p.id: p for p in tournament.players}
+    if players.keys() != {entry["id"] for entry in entries}:
+        return None
+    return [{**entry, "player": players[entry["id"]]} for entry in entries]
+
+
+def put(tournament: Tournament, result: list[dict]):
+    if has_pending_changes():
+        return
+    entries = [{k: v for k, v in entry.items() if k != "player"} for entry in result]
+    with cached_ranks_lock:
+        cached_ranks[tournament.id] = (tournament.version, entries)
+        cached_ranks.move_to_end(tournament.id)
+        while len(cached_ranks) > MAX_CACHED_RANKS:
+            cached_ranks.popitem(last=False)
@@ -0,0 +1,268 @@
+"""
+A read-only copy of a whole tournament, for rendering its public pages.
+
+load_tournament fetches the tournament with its players, matches, cut, cut
+players and elim matches in a fixed handful of queries. snapshot_of copies
+them into plain dataclasses that reference each other directly, so templates
+can follow match.corp_player.name or cut_match.corp_player.player.corp as much
+as they like without anything being lazily loaded, however big the field is.
+Nothing here is attached to the session, changes still go through the models.
+
+A swiss round's page only needs that round, so load_round_snapshot copies just
+its matches and the players in them.
+"""
+
+from dataclasses import dataclass, field, fields
+from datetime import datetime
+from typing import Iterable, Optional
+
+from sqlalchemy.orm import configure_mappers, joinedload, selectinload
+
+from data_models.match import Match
+from data_models.players import Player
+from data_models.top_cut import Cut
+from data_models.tournaments import Tournament
+import aesops.business_logic.tournament as t_logic
+
+
+@dataclass
+class PlayerView:
+    id: int
+    name: str
+    pronouns: str
+    corp: str
+    runner: str
+    active: bool
+    received_bye: bool
+    first_round_bye: bool
+    score: int
+    sos: float
+    esos: float
+    uid: int
+    # Set when the player made the cut, as Player.cut_player is. Left out of
+    # the repr and comparisons as the cut player points back here
+    cut_player: Optional["CutPlayerView"] = field(
+        default=None, repr=False, compare=False
+    )
+
+
+@dataclass
+class MatchView:
+    id: int
+    rnd: int
+    table_number: int
+    result: int
+    concluded: bool
+    is_bye: bool
+    corp_player: PlayerView
+    runner_player: Optional[PlayerView]
+
+
+@dataclass
+class CutPlayerView:
+    id: int
+    seed: int
+    elim_round: int
+    player: PlayerView
+
+
+@dataclass
+class ElimMatchView:
+    id: int
+    rnd: int
+    table_number: int
+    result: int
+    concluded: bool
+    corp_player: CutPlayerView
+    runner_player: CutPlayerView
+
+
+@dataclass
+class CutView:
+    id: int
+    rnd: int
+    num_players: int
+    double_elim: bool
+    players: list[CutPlayerView] = field(default_factory=list)
+    matches: list[ElimMatchView] = field(default_factory=list)
+
+    def round(self, rnd: int) -> list[ElimMatchView]:
+        return in_table_order(m for m in self.matches if m.rnd == rnd)
+
+
+@dataclass
+class TournamentSnapshot:
+    id: int
+    admin_id: int
+    name: str
+    description: str
+    date: datetime
+    current_round: int
+    allow_self_registration: bool
+    allow_self_results_report: bool
+    visible: bool
+    require_decklist: bool
+    reveal_cut_decklists: bool
+    reveal_decklists: bool
+    require_login: bool
+    players: dict[int, PlayerView] = field(default_factory=dict)
+    matches: list[MatchView] = field(default_factory=list)
+    cut: Optional[CutView] = None
+
+    def round(self, rnd: int) -> list[MatchView]:
+        """The round's matches in table order, as t_logic.get_round"""
+        return in_table_order(m for m in self.matches if m.rnd == rnd)
+
+    @property
+    def active_matches(self) -> list[MatchView]:
+        return [m for m in self.matches if m.rnd == self.current_round]
+
+    def standings(self, entries: list[dict]) -> list[dict]:
+        """
+        calculate_player_ranks style entries, with each "player" swapped for
+        its view
+        """
+        return [{**entry, "player": self.players[entry["id"]]} for entry in entries]
+
+
+def in_table_order(matches):
+    # Matches without a table number go last, as in get_round
+    return sorted(
+        matches, key=lambda m: (m.table_number is None, m.table_number or 0, m.id)
+    )
+
+
+def load_tournament(tid: int) -> Optional[Tournament]:
+    """
+    The tournament with its players, matches and cut all loaded, in six
+    queries whatever its size
+    """
+    # The cut's relationships are backrefs, which only exist once the mappers
+    # have been configured
+    configure_mappers()
+    return (
+        Tournament.query.options(
+            selectinload(Tournament.players),
+            selectinload(Tournament.matches),
+            selectinload(Tournament.cut).options(
+                selectinload(Cut.players), selectinload(Cut.matches)
+            ),
+        )
+        .filter(Tournament.id == tid)
+        .one_or_none()
+    )
+
+
+def snapshot_of(tournament: Tournament) -> TournamentSnapshot:
+    """Copies a tournament loaded by load_tournament, without further queries"""
+    snapshot = build_snapshot(tournament, tournament.players, tournament.matches)
+    if tournament.cut is not None:
+        snapshot.cut = cut_view(tournament.cut, snapshot.players)
+    return snapshot
+
+
+def load_snapshot(tid: int) -> Optional[TournamentSnapshot]:
+    tournament = load_tournament(tid)
+    if tournament is None:
+        return None
+    return snapshot_of(tournament)
+
+
+def load_round_snapshot(tid: int, rnd: int) -> Optional[TournamentSnapshot]:
+    """
+    A snapshot holding only the round's matches and the players in them, in
+    two queries whatever the size of the event. The cut is there for its round
+    count, without its players or matches.
+    """
+    tournament = (
+        Tournament.query.options(joinedload(Tournament.cut))
+        .filter(Tournament.id == tid)
+        .one_or_none()
+    )
+    if tournament is None:
+        return None
+    matches = t_logic.get_round(tournament, rnd)
+    players = {m.corp_player for m in matches}
+    players |= {m.runner_player for m in matches if m.runner_player is not None}
+    snapshot = build_snapshot(tournament, players, matches)
+    if tournament.cut is not None:
+        snapshot.cut = empty_cut_view(tournament.cut)
+    return snapshot
+
+
+def build_snapshot(
+    tournament: Tournament, players: Iterable[Player], matches: Iterable[Match]
+) -> TournamentSnapshot:
+    players = {p.id: player_view(p) for p in players}
+    snapshot = TournamentSnapshot(
+        **{
+            f.name: getattr(tournament, f.name)
+            for f in fields(TournamentSnapshot)
+            if f.name not in ("players", "matches", "cut")
+        },
+        players=players,
+    )
+    snapshot.matches = [
+        MatchView(
+            id=m.id,
+            rnd=m.rnd,
+            table_number=m.table_number,
+            result=m.result,
+            concluded=m.concluded,
+            is_bye=m.is_bye,
+            corp_player=players[m.corp_player_id],
+            runner_player=players.get(m.runner_player_id),
+        )
+        for m in matches
+    ]
+    return snapshot
+
+
+def player_view(player: Player) -> PlayerView:
+    return PlayerView(
+        id=player.id,
+        name=player.name,
+        pronouns=player.pronouns,
+        corp=player.corp,
+        runner=player.runner,
+        active=player.active,
+        received_bye=player.received_bye,
+        first_round_bye=player.first_round_bye,
+        score=player.score,
+        sos=player.sos,
+        esos=player.esos,
+        uid=player.uid,
+    )
+
+
+def empty_cut_view(cut: Cut) -> CutView:
+    return CutView(
+        id=cut.id, rnd=cut.rnd, num_players=cut.num_players, double_elim=cut.double_elim
+    )
+
+
+def cut_view(cut: Cut, players: dict[int, PlayerView]) -> CutView:
+    view = empty_cut_view(cut)
+    cut_players = {}
+    for cut_player in cut.players:
+        cut_players[cut_player.id] = CutPlayerView(
+            id=cut_player.id,
+            seed=cut_player.seed,
+            elim_round=cut_player.elim_round,
+            player=players[cut_player.player_id],
+        )
+        players[cut_player.player_id].cut_player = cut_players[cut_player.id]
+    view.players = list(cut_players.values())
+    view.matches = [
+        ElimMatchView(
+            id=m.id,
+            rnd=m.rnd,
+            table_number=m.table_number,
+            result=m.result,
+            concluded=m.concluded,
+            corp_player=cut_players.get(m.corp_player_id),
+            runner_player=cut_players.get(m.runner_player_id),
+        )
+        for m in cut.matches
+    ]
+    return view
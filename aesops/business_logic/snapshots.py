@@ -0,0 +1,215 @@
+"""
+Standings as they stood at the end of each swiss round.
+
+conclude_round writes a snapshot row per player in the same transaction as the
+round's results, so any round's standings are one indexed read rather than a
+replay of the matches. Correcting a result in a concluded round rebuilds the
+snapshots from that round on, and unpairing a round discards its snapshot.
+"""
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import joinedload
+
+from data_models.match import Match
+from data_models.model_store import db
+from data_models.players import Player
+from data_models.standings_snapshots import StandingsSnapshot
+from data_models.tournaments import Tournament
+import aesops.business_logic.standings as standings
+import aesops.business_logic.tiebreaks as tiebreaks
+
+
+def record_snapshot(tournament: Tournament, rnd: int, ranked: list[dict]):
+    """
+    Stores the round's standings, given calculate_player_ranks style entries
+    in rank order. Doesn't commit.
+    """
+    db.session.execute(
+        delete(StandingsSnapshot).where(
+            StandingsSnapshot.tid == tournament.id, StandingsSnapshot.rnd == rnd
+        )
+    )
+    if not ranked:
+        return
+    db.session.execute(
+        insert(StandingsSnapshot),
+        [
+            {
+                "tid": tournament.id,
+                "rnd": rnd,
+                "pid": entry["id"],
+                "rank": rank,
+                "score": entry["score"],
+                "sos": entry["sos"],
+                "esos": entry["esos"],
+                "side_bias": entry["side_bias"],
+                "corp_wins": entry["corp_record"]["W"],
+                "corp_losses": entry["corp_record"]["L"],
+                "corp_ties": entry["corp_record"]["T"],
+                "runner_wins": entry["runner_record"]["W"],
+                "runner_losses": entry["runner_record"]["L"],
+                "runner_ties": entry["runner_record"]["T"],
+            }
+            for rank, entry in enumerate(ranked, start=1)
+        ],
+    )
+
+
+def get_snapshot(tournament: Tournament, rnd: int) -> list[StandingsSnapshot]:
+    return (
+        StandingsSnapshot.query.options(joinedload(StandingsSnapshot.player))
+        .filter_by(tid=tournament.id, rnd=rnd)
+        .order_by(StandingsSnapshot.rank)
+        .all()
+    )
+
+
+def snapshot_rounds(tournament: Tournament) -> list[int]:
+    return [
+        rnd
+        for (rnd,) in db.session.query(StandingsSnapshot.rnd)
+        .filter_by(tid=tournament.id)
+        .distinct()
+        .order_by(StandingsSnapshot.rnd)
+    ]
+
+
+def get_standings(tournament: Tournament, rnd: int) -> list[dict]:
+    """
+    Returns a round's standings in the same form as calculate_player_ranks,
+    or None if that round has no snapshot. Players who registered after the
+    round are listed at the bottom with no results.
+    """
+    rows = get_snapshot(tournament, rnd)
+    if not rows:
+        return None
+    result = [
+        {
+            "player": row.player,
+            "id": row.pid,
+            "rank": row.rank,
+            "score": row.score,
+            "sos": row.sos,
+            "esos": row.esos,
+            "corp_record": {
+                "W": row.corp_wins,
+                "L": row.corp_losses,
+                "T": row.corp_ties,
+            },
+            "runner_record": {
+                "W": row.runner_wins,
+                "L": row.runner_losses,
+                "T": row.runner_ties,
+            },
+            "side_bias": row.side_bias,
+            "active": row.player.active,
+            "received_bye": row.player.received_bye,
+        }
+        for row in rows
+    ]
+    seen = {row.pid for row in rows}
+    late_joiners = sorted(
+        (p for p in tournament.players if p.id not in seen),
+        key=lambda p: p.name.lower(),
+    )
+    for player in late_joiners:
+        result.append(
+            {
+                "player": player,
+                "id": player.id,
+                "rank": len(result) + 1,
+                "score": 0,
+                "sos": 0,
+                "esos": 0,
+                "corp_record": {"W": 0, "L": 0, "T": 0},
+                "runner_record": {"W": 0, "L": 0, "T": 0},
+                "side_bias": 0,
+                "active": player.active,
+                "received_bye": player.received_bye,
+            }
+        )
+    return result
+
+
+def rebuild_snapshots(tournament: Tournament, from_rnd: int):
+    """
+    Re-records the snapshots of from_rnd and any later round from the matches,
+    for when a result in an already concluded round is corrected. Each keeps
+    the players it had. Doesn't commit.
+    """
+    matches = Match.query.filter(Match.tid == tournament.id).all()
+    rounds = [rnd for rnd in snapshot_rounds(tournament) if rnd >= from_rnd]
+    for rnd in rounds:
+        in_snapshot = {
+            pid
+            for (pid,) in db.session.query(StandingsSnapshot.pid).filter_by(
+                tid=tournament.id, rnd=rnd
+            )
+        }
+        player_ids = [p.id for p in tournament.players if p.id in in_snapshot]
+        played = [m for m in matches if m.rnd <= rnd]
+        values = tiebreaks.compute_tiebreaks(player_ids, played)
+        records = standings.build_records(played)
+        ranked = []
+        for pid in player_ids:
+            record = records[pid]
+            corp = {
+                "W": record.corp_wins,
+                "L": record.corp_losses,
+                "T": record.corp_ties,
+            }
+            runner = {
+                "W": record.runner_wins,
+                "L": record.runner_losses,
+                "T": record.runner_ties,
+            }
+            score, sos, esos = values[pid]
+            ranked.append(
+                {
+                    "id": pid,
+                    "score": score,
+                    "sos": sos,
+                    "esos": esos,
+                    "side_bias": sum(corp.values()) - sum(runner.values()),
+                    "corp_record": corp,
+                    "runner_record": runner,
+                }
+            )
+        ranked.sort(key=lambda p: (p["score"], p["sos"], p["esos"]), reverse=True)
+        record_snapshot(tournament, rnd, ranked)
+
+
+def discard_snapshots(tournament: Tournament, from_rnd: int):
+    """Drops the snapshots of from_rnd and any later round, without committing"""
+    db.session.execute(
+        delete(StandingsSnapshot).where(
+            StandingsSnapshot.tid == tournament.id, StandingsSnapshot.rnd >= from_rnd
+        )
+    )
+
+
+def restore_standings(tournament: Tournament, rnd: int):
+    """
+    Puts every player's score, SoS, ESoS and result counters back to how they
+    were at the end of `rnd`. They're recomputed from the remaining matches
+    rather than read from the round's snapshot, as an earlier result may have
+    been corrected since. Doesn't commit.
+    """
+    player_ids = [p.id for p in tournament.players]
+    matches = Match.query.filter(Match.tid == tournament.id, Match.rnd <= rnd).all()
+    values = tiebreaks.compute_tiebreaks(player_ids, matches)
+    records = standings.build_records(matches)
+    if values:
+        db.session.execute(
+            update(Player),
+            [
+                {
+                    "id": pid,
+                    "score": score,
+                    "sos": sos,
+                    "esos": esos,
+                    **standings.counters(records[pid]),
+                }
+                for pid, (score, sos, esos) in values.items()
+            ],
+        )
@@ -0,0 +1,230 @@
+"""
+Keeps each player's score, SoS and ESoS current as results are reported.
+
+A result only changes the two players' scores. That changes the SoS of everyone
+who has played either of them and the ESoS of everyone who has played *those*
+players, so only that neighbourhood is recomputed rather than the whole event.
+A match counts as soon as its result is reported, so standings are live during
+a round, and once every result is in they are what conclusion used to compute.
+
+Each player's result counters (wins, losses and ties per side, and byes) are
+recounted for the changed players from the matches already loaded too. Unlike
+the standings they only count concluded matches, as the records shown with the
+standings and the side balance used for pairing always have, so conclude_round
+brings them up to date for the whole round. find_counter_drift checks them
+against a full recount.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable
+
+from sqlalchemy import or_, select
+
+from data_models.match import Match, MatchResult, convert_result_to_score
+from data_models.model_store import db
+from data_models.players import Player
+from data_models.tournaments import Tournament
+
+# The result counter columns on Player, which Record counts the same way
+COUNTERS = (
+    "corp_wins",
+    "corp_losses",
+    "corp_ties",
+    "runner_wins",
+    "runner_losses",
+    "runner_ties",
+    "byes",
+)
+
+
+@dataclass
+class Record:
+    score: int = 0
+    # Opponents in reported matches, runner games first then corp games as the
+    # original per-player loops summed them. Byes score but aren't games.
+    runner_opponents: list[int] = field(default_factory=list)
+    corp_opponents: list[int] = field(default_factory=list)
+    # The counters, from concluded matches only
+    corp_wins: int = 0
+    corp_losses: int = 0
+    corp_ties: int = 0
+    runner_wins: int = 0
+    runner_losses: int = 0
+    runner_ties: int = 0
+    byes: int = 0
+
+    @property
+    def opponents(self) -> list[int]:
+        return self.runner_opponents + self.corp_opponents
+
+    @property
+    def games_played(self) -> int:
+        return len(self.runner_opponents) + len(self.corp_opponents)
+
+    @property
+    def average_score(self) -> float:
+        return self.score / max(self.games_played, 1)
+
+
+def build_records(matches: Iterable[Match]) -> dict[int, Record]:
+    records = defaultdict(Record)
+    for match in sorted(matches, key=lambda m: m.id):
+        if match.result is None:
+            continue
+        corp = records[match.corp_player_id]
+        corp.score += convert_result_to_score(match.result, "corp")
+        if match.is_bye:
+            if match.concluded:
+                corp.byes += 1
+            continue
+        runner = records[match.runner_player_id]
+        runner.score += convert_result_to_score(match.result, "runner")
+        corp.corp_opponents.append(match.runner_player_id)
+        runner.runner_opponents.append(match.corp_player_id)
+        if not match.concluded:
+            continue
+        if match.result == MatchResult.CORP_WIN.value:
+            corp.corp_wins += 1
+            runner.runner_losses += 1
+        elif match.result == MatchResult.RUNNER_WIN.value:
+            corp.corp_losses += 1
+            runner.runner_wins += 1
+        else:
+            corp.corp_ties += 1
+            runner.runner_ties += 1
+    return records
+
+
+def counters(record: Record) -> dict[str, int]:
+    return {name: getattr(record, name) for name in COUNTERS}
+
+
+def get_sos(record: Record, records: dict[int, Record]) -> float:
+    # Summed per side and then added, as floats don't add up associatively and
+    # a different order can round the third decimal the other way
+    opp_average_score = sum(
+        records[opp].average_score for opp in record.runner_opponents
+    )
+    opp_average_score += sum(
+        records[opp].average_score for opp in record.corp_opponents
+    )
+    return round(opp_average_score / max(record.games_played, 1), 3)
+
+
+def get_esos(record: Record, sos: dict[int, float]) -> float:
+    # SoS is summed as the Decimals the database hands back, so halves round to
+    # even exactly as they always have
+    opp_total_sos = sum(as_decimal(sos[opp]) for opp in record.opponents)
+    return float(round(opp_total_sos / max(record.games_played, 1), 3))
+
+
+def as_decimal(value) -> Decimal:
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+def compute_standings(
+    player_ids: Iterable[int], matches: Iterable[Match]
+) -> dict[int, tuple[int, float, float]]:
+    """
+    Returns (score, SoS, ESoS) for every player from scratch, given all of the
+    tournament's matches.
+    """
+    player_ids = list(player_ids)
+    records = build_records(matches)
+    sos = {pid: get_sos(records[pid], records) for pid in player_ids}
+    return {
+        pid: (records[pid].score, sos[pid], get_esos(records[pid], sos))
+        for pid in player_ids
+    }
+
+
+def opponents_of(player_ids: set[int], records: dict[int, Record]) -> set[int]:
+    return {opp for pid in player_ids for opp in records[pid].opponents}
+
+
+def update_standings(tid: int, player_ids: Iterable[int]):
+    """
+    Brings the standings up to date after a change to these players' matches.
+    Doesn't commit, so it can share the caller's transaction.
+    """
+    changed = {pid for pid in player_ids if pid is not None}
+    if not changed:
+        return
+    # Two reports at once would each recompute the players they share from
+    # what they had read, and the last to commit would win. Locking the
+    # tournament's row first makes them take turns, and everything below is
+    # read fresh once the lock is held. SQLite only has one writer anyway.
+    db.session.execute(
+        select(Tournament.id).where(Tournament.id == tid).with_for_update()
+    )
+    matches = {}
+
+    def load_matches(pids: set[int]) -> dict[int, Record]:
+        if pids:
+            matches.update(
+                (m.id, m)
+                for m in Match.query.populate_existing().filter(
+                    Match.tid == tid,
+                    or_(
+                        Match.corp_player_id.in_(pids),
+                        Match.runner_player_id.in_(pids),
+                    ),
+                )
+            )
+        return build_records(matches.values())
+
+    # Each hop loads the matches of the players just reached, so every player
+    # whose SoS or ESoS is recomputed has a complete record
+    records = load_matches(changed)
+    sos_changed = changed | opponents_of(changed, records)
+    records = load_matches(sos_changed - changed)
+    esos_changed = sos_changed | opponents_of(sos_changed, records)
+    records = load_matches(esos_changed - sos_changed)
+
+    players = {
+        p.id: p
+        for p in Player.query.populate_existing().filter(
+            Player.id.in_(esos_changed | opponents_of(esos_changed, records))
+        )
+    }
+    sos = {pid: player.sos or 0 for pid, player in players.items()}
+    for pid in sos_changed:
+        sos[pid] = get_sos(records[pid], records)
+        players[pid].sos = sos[pid]
+    for pid in changed:
+        players[pid].score = records[pid].score
+        for name, value in counters(records[pid]).items():
+            setattr(players[pid], name, value)
+    for pid in esos_changed:
+        players[pid].esos = get_esos(records[pid], sos)
+
+
+def update_for_match(match: Match):
+    update_standings(match.tid, [match.corp_player_id, match.runner_player_id])
+
+
+def find_counter_drift(tournament: Tournament) -> list[tuple[Player, str, int, int]]:
+    """
+    Recounts every player's result counters from the tournament's matches,
+    returning (player, counter, stored, recounted) for each that disagrees
+    """
+    records = build_records(tournament.matches)
+    return [
+        (player, name, getattr(player, name), value)
+        for player in sorted(tournament.players, key=lambda p: p.id)
+        for name, value in counters(records[player.id]).items()
+        if getattr(player, name) != value
+    ]
+
+
+def repair_counters(tournament: Tournament) -> list[tuple[Player, str, int, int]]:
+    """Puts right and returns the drift find_counter_drift reports"""
+    drift = find_counter_drift(tournament)
+    for player, name, _, value in drift:
+        setattr(player, name, value)
+    db.session.commit()
+    return drift
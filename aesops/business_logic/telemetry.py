@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+
+from data_models.model_store import db
+from data_models.pairing_runs import PairingRun
+from data_models.tournaments import Tournament
+
+# Columns of the CSV export, in order
+RUN_FIELDS = [
+    "tid",
+    "rnd",
+    "created",
+    "solver",
+    "optimal",
+    "player_count",
+    "edge_count",
+    "cost_time",
+    "matching_time",
+    "write_time",
+    "total_weight",
+    "rematches",
+    "side_imbalance",
+]
+
+
+def record_pairing_run(t: Tournament, proposal, write_time: float) -> PairingRun:
+    """
+    Adds a PairingRun for a proposal that has just been written, given how long
+    writing and committing it took. Doesn't commit.
+    """
+    stats = proposal.stats
+    run = PairingRun(
+        tid=t.id,
+        rnd=proposal.rnd,
+        solver=stats.get("solver"),
+        optimal=proposal.optimal,
+        player_count=stats.get("player_count"),
+        edge_count=stats.get("edge_count"),
+        cost_time=stats.get("cost_time"),
+        matching_time=stats.get("matching_time"),
+        write_time=write_time,
+        total_weight=sum(1000 - m.cost for m in proposal.matches if not m.is_bye),
+        rematches=proposal.rematches,
+        side_imbalance=json.dumps(stats.get("side_imbalance", {})),
+    )
+    db.session.add(run)
+    return run
+
+
+def get_pairing_runs(tid: int = None) -> list[PairingRun]:
+    query = db.select(PairingRun).order_by(PairingRun.tid, PairingRun.id)
+    if tid is not None:
+        query = query.where(PairingRun.tid == tid)
+    return db.session.execute(query).scalars().all()
+
+
+def side_imbalance(run: PairingRun) -> dict[int, int]:
+    return {int(k): v for k, v in json.loads(run.side_imbalance or "{}").items()}
+
+
+def runs_to_csv(runs: list[PairingRun]) -> str:
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(RUN_FIELDS)
+    for run in runs:
+        writer.writerow([getattr(run, field) for field in RUN_FIELDS])
+    return output.getvalue()
@@ -0,0 +1,101 @@
+"""
+Score, SoS and ESoS for a whole tournament at once, as matrix products.
+
+With A the opponent matrix (A[i, j] is how many reported games i and j have
+played each other) and g each player's number of games:
+
+    average = score / g
+    SoS = A @ average / g
+    ESoS = A @ SoS / g
+
+each rounded to three decimals. Byes add to a player's score but aren't games,
+and players with no games divide by one, as in standings.
+
+The results are identical to the per-player sums in standings, not just close.
+ESoS only adds up three-decimal SoS values, so it is done exactly in integer
+thousandths, halves rounding to even as the Decimal sum did. A matrix product
+adds SoS terms in a different order than the per-player loop, which can only
+matter when a value lands on a rounding boundary, so those few players are
+recomputed the original way.
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+from data_models.match import Match, MatchResult, convert_result_to_score
+import aesops.business_logic.standings as standings
+
+# Match points for (corp, runner) by result
+POINTS = {
+    result.value: (
+        convert_result_to_score(result.value, "corp"),
+        convert_result_to_score(result.value, "runner"),
+    )
+    for result in MatchResult
+}
+# How close to a rounding boundary, in thousandths, a float SoS must be for it
+# to be recomputed in the original order
+BOUNDARY = 1e-6
+
+
+def opponent_matrix(
+    index: dict[int, int], matches: list[Match]
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns every player's score and the opponent matrix, from the reported
+    matches. `index` maps player ids to rows.
+    """
+    n = len(index)
+    scores = np.zeros(n, dtype=np.int64)
+    opponents = np.zeros((n, n), dtype=np.int64)
+    reported = [m for m in matches if m.result is not None]
+    if not reported:
+        return scores, opponents
+    corp = np.array([index[m.corp_player_id] for m in reported])
+    points = np.array([POINTS[m.result] for m in reported], dtype=np.int64)
+    np.add.at(scores, corp, points[:, 0])
+    games = np.array([not m.is_bye for m in reported])
+    runner = np.array([index[m.runner_player_id] for m in reported if not m.is_bye])
+    if len(runner):
+        np.add.at(scores, runner, points[games, 1])
+        np.add.at(opponents, (corp[games], runner), 1)
+        np.add.at(opponents, (runner, corp[games]), 1)
+    return scores, opponents
+
+
+def compute_tiebreaks(
+    player_ids: Iterable[int], matches: Iterable[Match]
+) -> dict[int, tuple[int, float, float]]:
+    """
+    Returns (score, SoS, ESoS) for every player, given all of the tournament's
+    matches. A drop-in for standings.compute_standings.
+    """
+    player_ids = list(player_ids)
+    matches = list(matches)
+    index = {pid: i for i, pid in enumerate(player_ids)}
+    scores, opponents = opponent_matrix(index, matches)
+    divisor = np.maximum(opponents.sum(axis=1), 1)
+
+    sos = opponents @ (scores / divisor) / divisor
+    sos_milli = sos * 1000
+    boundary = np.abs(sos_milli - np.floor(sos_milli) - 0.5) < BOUNDARY
+    sos = np.round(sos, 3)
+    if boundary.any():
+        records = standings.build_records(matches)
+        for i in np.flatnonzero(boundary):
+            sos[i] = standings.get_sos(records[player_ids[i]], records)
+
+    total = opponents @ np.rint(sos * 1000).astype(np.int64)
+    quotient, remainder = np.divmod(total, divisor)
+    round_up = (2 * remainder > divisor) | (
+        (2 * remainder == divisor) & (quotient % 2 == 1)
+    )
+    esos = (quotient + round_up) / 1000
+
+    return {
+        pid: (score, sos_value, esos_value)
+        for pid, score, sos_value, esos_value in zip(
+            player_ids, scores.tolist(), sos.tolist(), esos.tolist()
+        )
+    }
@@ -1,11 +1,16 @@
-from typing import Sequence
-
 import aesops.business_logic.match as m_logic
+import aesops.business_logic.played_matrix as played_matrix
 import aesops.business_logic.players as p_logic
+import aesops.business_logic.rank_cache as rank_cache
+import aesops.business_logic.snapshots as snapshots
+import aesops.business_logic.standings as standings
+import aesops.business_logic.tiebreaks as tiebreaks
 from data_models.match import Match, MatchResult
 from data_models.model_store import db, Tournament
 from data_models.players import Player
 from random import shuffle
+from sqlalchemy import update
+from sqlalchemy.orm import joinedload
 
 
 def add_player(
@@ -131,25 +136,54 @@ def update_esos_from_memory(player: Player, matches: dict, players: dict):
 
 
 def conclude_round(tournament: Tournament):
-    for match in tournament.active_matches:
-        m_logic.conclude(match)
-    local_players = {p.id: p for p in tournament.players}
-    matches = {m.id: m for m in tournament.matches}
-    for player in local_players.values():
-        player.score = update_score_from_memory(player, matches)
-        db.session.add(player)
-    db.session.commit()
-    for player in tournament.players:
-        player.sos = update_sos_from_memory(player, matches, local_players)
-        db.session.add(player)
-    db.session.commit()
-
-    for player in tournament.players:
-        player.esos = update_esos_from_memory(player, matches, local_players)
-        db.session.add(player)
-    db.session.commit()
-    db.session.add(tournament)
-    db.session.commit()
+    """
+    Concludes the current round and recomputes every player's score, SoS and
+    ESoS from scratch.
+
+    The players and matches are loaded once, the standings are worked out in
+    memory (see tiebreaks) and everything is written back
+    with bulk updates in a single transaction, along with a snapshot of the
+    round's standings. Standings are already kept current as results come in,
+    so this mostly confirms them.
+    """
+    matches = tournament.matches
+    active_matches = [m for m in matches if m.rnd == tournament.current_round]
+    for match in active_matches:
+        m_logic.check_reported(match)
+    results = tiebreaks.compute_tiebreaks([p.id for p in tournament.players], matches)
+    try:
+        db.session.execute(
+            update(Match)
+            .where(Match.tid == tournament.id, Match.rnd == tournament.current_round)
+            .values(concluded=True)
+        )
+        # The result counters only count concluded matches, so are recounted
+        # now the round's are
+        records = standings.build_records(matches)
+        db.session.execute(
+            update(Player),
+            [
+                {
+                    "id": pid,
+                    "score": score,
+                    "sos": sos,
+                    "esos": esos,
+                    **standings.counters(records[pid]),
+                }
+                for pid, (score, sos, esos) in results.items()
+            ],
+        )
+        played_matrix.record_matches(tournament, active_matches)
+        ranked = tally_results(tournament)
+        for entry in ranked:
+            entry["score"], entry["sos"], entry["esos"] = results[entry["id"]]
+        ranked.sort(key=lambda p: (p["score"], p["sos"], p["esos"]), reverse=True)
+        snapshots.record_snapshot(tournament, tournament.current_round, ranked)
+        rank_cache.bump_version(tournament)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
     return tournament
 
 
@@ -158,89 +192,54 @@ def calculate_player_ranks(tournament: Tournament):
     Calculates the rankings for players in this tournament.
 
     Also gathers required information about the tournament results used to render
-    the tournament page in a single pass of the results.
+    the tournament page in a single pass of the results. The result is cached
+    until the tournament next changes (see rank_cache).
     """
-    players = tournament.players
-
-    # We're going to look at each match individually, but we need to keep
-    # information about each player. So we keep this in a handy dictionary
-    # for fast access
-    player_map = {}
-    for player in players:
-        player_map[player.id] = {
-            "player": player,
-            "id": player.id,
-            "score": 0,
-            "games_played": 0,
-            "corp_record": {"W": 0, "L": 0, "T": 0},
-            "runner_record": {"W": 0, "L": 0, "T": 0},
-            "side_bias": 0,
-            "active": player.active,
-            "received_bye": player.received_bye,
-        }
-
-    # To avoid multiple trips to the database per player, we iterate the
-    # matches instead, updating the relevant player's results for each match
-    for match in tournament.matches:
-        # Select the player data for the current set of players
-        corp_id = match.corp_player_id
-        runner_id = match.runner_player_id
-        corp_data = player_map[corp_id]
-        if runner_id is not None:
-            runner_data = player_map[runner_id]
-
-        if match.concluded:
-            # Players on a bye are set as the corp player
-            # For the purposes of display we always count a bye as a game
-            # but no change to the side bias
-            if match.is_bye:
-                corp_data["games_played"] += 1
-                corp_data["score"] += 3
-                continue
-
-            # Each side played a game, so bump their counts
-            corp_data["games_played"] += 1
-            runner_data["games_played"] += 1
-
-            # Adjust the bias score based upon which side they played
-            corp_data["side_bias"] += 1
-            runner_data["side_bias"] -= 1
-
-            # Update each player's results based upon the result of the match
-            if match.result == MatchResult.RUNNER_WIN.value:
-                corp_data["corp_record"]["L"] += 1
-                runner_data["runner_record"]["W"] += 1
-
-                runner_data["score"] += 3
-
-            elif match.result == MatchResult.CORP_WIN.value:
-                corp_data["corp_record"]["W"] += 1
-                runner_data["runner_record"]["L"] += 1
-
-                corp_data["score"] += 3
-            else:
-                corp_data["corp_record"]["T"] += 1
-                runner_data["runner_record"]["T"] += 1
-
-                corp_data["score"] += 1
-                runner_data["score"] += 1
-
+    result = rank_cache.get(tournament)
+    if result is not None:
+        return result
+    result = tally_results(tournament)
     # This ranking matches what is done in the `rank_players` function below
     # However in the case of a tournament that has begun, we sort this list of players
     # 3 times which is not very efficient
     # A potential improvement here is to only sort the result once, and use a more complex function
     # to determine the final rank, but do it in a single pass (which is going to be much quicker
     # over larger tournaments)
-    result = list(player_map.values())
     if tournament.current_round == 0:
         result.sort(key=lambda p: p["player"].name.lower())
     else:
-        result.sort(
-            key=lambda p: (p["score"], p["player"].sos, p["player"].esos), reverse=True
-        )
+        result.sort(key=lambda p: (p["score"], p["sos"], p["esos"]), reverse=True)
+    rank_cache.put(tournament, result)
     return result
 
 
+def tally_results(tournament: Tournament) -> list[dict]:
+    """
+    Each player's record from the concluded matches, in no particular order.
+    Read from the players' result counters, so no matches are loaded.
+    """
+    return [
+        {
+            "player": player,
+            "id": player.id,
+            "score": 3 * (player.corp_wins + player.runner_wins + player.byes)
+            + player.corp_ties
+            + player.runner_ties,
+            "sos": player.sos,
+            "esos": player.esos,
+            # For the purposes of display we always count a bye as a game
+            "games_played": player.games_played + player.byes,
+            "byes": player.byes,
+            "corp_record": p_logic.side_record(player, "corp"),
+            "runner_record": p_logic.side_record(player, "runner"),
+            "side_bias": player.side_balance,
+            "active": player.active,
+            "received_bye": player.received_bye,
+        }
+        for player in tournament.players
+    ]
+
+
 def first_round_byes(tournament: Tournament) -> tuple[list[Player], list[Player]]:
     guranteed_byes = [p for p in tournament.players if p.first_round_bye and p.active]
     non_bye_players = [
@@ -255,66 +254,76 @@ def first_round_byes(tournament: Tournament) -> tuple[list[Player], list[Player]
         return (non_bye_players, guranteed_byes)
 
 
-def bye_setup(tournament: Tournament) -> tuple[list[Player], Player]:
-    if tournament.current_round == 1:
+def bye_setup(tournament: Tournament, rnd: int = None) -> tuple[list[Player], Player]:
+    """
+    Splits the active players into those to pair and those getting a bye.
+
+    After the first round the bye is chosen from the (cached) rankings alone:
+    the lowest ranked active player who hasn't had a bye and has played a game,
+    or failing that whoever has had the fewest byes.
+    """
+    # The round being paired, which may not have been started yet
+    if rnd is None:
+        rnd = tournament.current_round
+    if rnd == 1:
         return first_round_byes(tournament)
-    if len(tournament.active_players) % 2 == 0:
-        return (tournament.active_players, None)
-    player_list = calculate_player_ranks(tournament)
-    if tournament.current_round > 1:
+    active_players = tournament.active_players
+    if len(active_players) % 2 == 0:
+        return (active_players, None)
+    player_list = [p for p in calculate_player_ranks(tournament) if p["active"]]
+    if rnd > 1:
+        # Players need a game behind them, so late joiners don't get a bye in
+        # their first round
         elible_player_list = [
             p
             for p in player_list
-            if not p["received_bye"]
-            and p["active"]
-            and (
-                p_logic.get_record(db.session.get(Player, p["id"]), count_byes=False)[
-                    "games_played"
-                ]
-                > 0
-            )  # This is to prevent late joiners from getting a bye their first round
+            if not p["received_bye"] and p["games_played"] - p["byes"] > 0
         ]
     else:
-        elible_player_list = [
-            p for p in player_list if not p["received_bye"] and p["active"]
-        ]
+        elible_player_list = [p for p in player_list if not p["received_bye"]]
         shuffle(elible_player_list)
     if len(elible_player_list) == 0:
-        elible_player_list = least_byes(tournament, tournament.active_players)
+        elible_player_list = least_byes(player_list)
     elible_player_list.sort(key=lambda x: x["score"], reverse=True)
-    bye_player_dict = elible_player_list.pop(-1)
-    bye_player = db.session.get(Player, bye_player_dict["id"])
-    pairable_players = tournament.active_players.copy()
-    pairable_players.remove(bye_player)
+    bye_player = elible_player_list.pop(-1)["player"]
+    pairable_players = [p for p in active_players if p.id != bye_player.id]
     return (pairable_players, [bye_player])
 
 
-def least_byes(tournament: Tournament, all_players: Sequence[Player]) -> list[Player]:
-    bye_count = {p: 0 for p in all_players if p.active}
-    for match in tournament.matches:
-        if not match.is_bye:
-            continue
-        player = match.corp_player
-        if not player.active:
-            continue
-        bye_count[player] += 1
-    min_num_byes = min(bye_count.values())
-    return [player for player, count in bye_count.items() if count < min_num_byes + 1]
+def least_byes(player_list: list[dict]) -> list[dict]:
+    """The calculate_player_ranks entries with the fewest byes"""
+    min_num_byes = min(p["byes"] for p in player_list)
+    return [p for p in player_list if p["byes"] == min_num_byes]
 
 
 def get_round(tournament: Tournament, round) -> list[Match]:
-    return [m for m in tournament.matches if m.rnd == round]
+    """
+    The round's matches in table order, with both players loaded, in one query
+    """
+    return (
+        Match.query.options(
+            joinedload(Match.corp_player), joinedload(Match.runner_player)
+        )
+        .filter(Match.tid == tournament.id, Match.rnd == round)
+        # Matches without a table number go last, as in rank_tables
+        .order_by(Match.table_number.is_(None), Match.table_number, Match.id)
+        .all()
+    )
 
 
 def unpair_round(tournament: Tournament):
     if tournament.cut is not None:
         raise Exception("Cannot unpair a round after a cut has been made")
+    rnd = tournament.current_round
     for match in tournament.active_matches:
-        m_logic.delete(match)
+        m_logic.discard(match)
+    # Standings go back to the end of the previous round, recomputed from the
+    # matches that are left
+    snapshots.discard_snapshots(tournament, rnd)
+    snapshots.restore_standings(tournament, rnd - 1)
     tournament.current_round -= 1
-    db.session.add(tournament)
+    rank_cache.bump_version(tournament)
     db.session.commit()
-    conclude_round(tournament)  # calling this to recalculate scores
     return tournament
 
 
@@ -330,13 +339,26 @@ def top_n_cut(tournament: Tournament, n):
     return cut_players
 
 
-def get_unpaired_players(tournament: Tournament):
-    return [
-        p
-        for p in tournament.active_players
-        if not p_logic.is_paired(p, tournament.current_round)
-    ]
+def paired_player_ids(tournament: Tournament, rnd: int = None) -> set[int]:
+    """The ids of everyone with a match (or bye) in the round, in one query"""
+    if rnd is None:
+        rnd = tournament.current_round
+    rows = db.session.query(Match.corp_player_id, Match.runner_player_id).filter(
+        Match.tid == tournament.id, Match.rnd == rnd
+    )
+    return {pid for row in rows for pid in row if pid is not None}
+
+
+def get_unpaired_players(tournament: Tournament, rnd: int = None):
+    paired = paired_player_ids(tournament, rnd)
+    return [p for p in tournament.active_players if p.id not in paired]
 
 
 def is_current_round_finished(tournament: Tournament):
     return all([m.concluded for m in tournament.active_matches])
+
+
+def last_concluded_round(tournament: Tournament) -> int:
+    if is_current_round_finished(tournament):
+        return tournament.current_round
+    return tournament.current_round - 1
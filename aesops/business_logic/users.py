@@ -48,6 +48,26 @@ def has_reporting_rights(user: User, mid: int):
     return False
 
 
+def reportable_match_ids(user: User, matches) -> set[int]:
+    """
+    The matches, of those given, that has_reporting_rights would let the user
+    report, from the matches' own players rather than a query per match
+    """
+    if user.is_anonymous:
+        return set()
+    if user.admin_rights:
+        return {match.id for match in matches}
+    return {
+        match.id
+        for match in matches
+        if not match.concluded
+        and (
+            match.corp_player.uid == user.id
+            or (match.runner_player is not None and match.runner_player.uid == user.id)
+        )
+    }
+
+
 @login.user_loader
 def load_user(id):
     return User.query.get(int(id))
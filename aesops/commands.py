@@ -0,0 +1,44 @@
+# Maintenance commands, run with `flask <command>`
+import click
+
+from aesops import app
+from data_models.model_store import db
+from data_models.tournaments import Tournament
+import aesops.business_logic.standings as standings
+
+
+@app.cli.command("repair-counters")
+@click.option("--tid", type=int, help="Only check this tournament.")
+@click.option("--dry-run", is_flag=True, help="Report drift without fixing it.")
+def repair_counters(tid, dry_run):
+    """
+    Recounts every player's result counters from their matches, reporting and
+    fixing any that have drifted.
+    """
+    if tid is None:
+        tids = list(
+            db.session.scalars(db.select(Tournament.id).order_by(Tournament.id))
+        )
+    elif db.session.get(Tournament, tid) is None:
+        raise click.BadParameter(f"No tournament {tid}", param_hint="--tid")
+    else:
+        tids = [tid]
+
+    drifted = 0
+    for tid in tids:
+        tournament = db.session.get(Tournament, tid)
+        if dry_run:
+            drift = standings.find_counter_drift(tournament)
+        else:
+            drift = standings.repair_counters(tournament)
+        for player, name, stored, value in drift:
+            click.echo(
+                f"{tournament.name} ({tournament.id}) - {player.name} ({player.id}):"
+                f" {name} {stored} -> {value}"
+            )
+        drifted += len(drift)
+        # Keep memory flat over a large database
+        db.session.expunge_all()
+
+    action = "found" if dry_run else "repaired"
+    click.echo(f"{drifted} drifted counters {action} in {len(tids)} tournaments")
@@ -15,6 +15,7 @@ from data_models.tournaments import Tournament
 from aesops.utility import get_corp_ids, get_runner_ids
 from data_models.users import User
 from aesops.business_logic.decklist import decklist_parser
+from aesops.business_logic.matchmaking import MATCHING_SOLVERS
 
 
 class LoginForm(FlaskForm):
@@ -119,6 +120,11 @@ class TournamentForm(FlaskForm):
     )
     visible = BooleanField("Visible", default=True)
     require_decklist = BooleanField("Require Decklist", default=False)
+    solver = SelectField(
+        "Pairing Solver",
+        choices=[("", "Site default")] + [(k, k) for k in MATCHING_SOLVERS],
+        default="",
+    )
     submit = SubmitField("Submit")
 
 
@@ -8,23 +8,26 @@ from aesops.forms import (
     TournamentForm,
     EditMatchesForm,
 )
-from flask import render_template, flash, redirect, url_for, request, Response
+from flask import render_template, flash, redirect, url_for, request, Response, jsonify
 from flask_login import current_user, login_required
-from data_models.exceptions import ConclusionError, PairingException
+from data_models.exceptions import ConclusionError, JobException, PairingException
+from data_models.jobs import Job, JobStatus
 from data_models.match import Match, MatchReport
 from data_models.players import Player
 from data_models.top_cut import Cut, ElimMatch
 from data_models.tournaments import Tournament
 from data_models.users import User
 import aesops.business_logic.elim_match as e_logic
+import aesops.business_logic.jobs as jobs
 import aesops.business_logic.match as m_logic
 import aesops.business_logic.matchmaking as mm
 import aesops.business_logic.players as p_logic
+import aesops.business_logic.read_model as read_model
+import aesops.business_logic.telemetry as telemetry
 import aesops.business_logic.top_cut as tc_logic
 import aesops.business_logic.tournament as t_logic
 import aesops.business_logic.users as u_logic
 from aesops.utility import (
-    rank_tables,
     get_faction,
     format_results,
     get_json,
@@ -98,12 +101,15 @@ def report_match(tid, rnd, mid, result):
 @app.route("/<int:tid>/<int:rnd>/conclude", methods=["GET", "POST"])
 def conclude_round(tid, rnd):
     tournament = Tournament.query.get(tid)
-    try:
-        t_logic.conclude_round(tournament)
-    except ConclusionError as e:
+    if any(m.result is None for m in tournament.active_matches):
         flash("Not all matches have been reported")
         return redirect_for_round(tid=tournament.id, rnd=rnd)
-    return redirect_for_tournament(tournament.id)
+    try:
+        job = jobs.enqueue(tournament, "conclude_round")
+    except JobException as e:
+        flash(str(e))
+        return redirect_for_round(tid=tournament.id, rnd=rnd)
+    return redirect_for_job(job)
 
 
 @login_required
@@ -111,18 +117,150 @@ def conclude_round(tid, rnd):
 def pair_round(tid):
     tournament = Tournament.query.get(tid)
     try:
-        mm.pair_round(tournament)
+        mm.check_can_pair(tournament)
+        job = jobs.enqueue(tournament, "pair_round")
+    except (PairingException, JobException) as e:
+        flash(str(e))
+        return redirect_for_tournament(tournament.id)
+    return redirect_for_job(job)
+
+
+def redirect_for_job(job: Job):
+    """
+    Sends the TO on from a job that has just been queued (or run, with
+    BACKGROUND_JOBS off). Pages with _job_status.html poll until it's done.
+    """
+    if job.status == JobStatus.FAILED.value:
+        flash(job.message)
+        return redirect_for_tournament(job.tid)
+    if job.message:
+        flash(job.message)
+    if not jobs.is_done(job):
+        if job.kind == "conclude_round":
+            return redirect_for_round(tid=job.tid, rnd=job.tournament.current_round)
+        return redirect_for_tournament(job.tid)
+    return redirect(job_url(job))
+
+
+def job_url(job: Job):
+    if job.kind == "pair_round":
+        return url_for("tournaments.round", tid=job.tid, rnd=job.rnd)
+    return url_for("tournaments.tournament", tid=job.tid)
+
+
+def job_json(job: Job):
+    return {
+        "id": job.id,
+        "tid": job.tid,
+        "kind": job.kind,
+        "status": job.status,
+        "message": job.message,
+        "rnd": job.rnd,
+        "url": job_url(job) if job.status == JobStatus.FINISHED.value else None,
+    }
+
+
+@app.route("/jobs/<int:job_id>", methods=["GET"])
+def job_status(job_id):
+    job = db.get_or_404(Job, job_id)
+    return jsonify(job_json(job))
+
+
+@app.route("/<int:tid>/job", methods=["GET"])
+def tournament_job_status(tid):
+    job = jobs.latest_job(tid)
+    return jsonify(job_json(job) if job is not None else {})
+
+
+@login_required
+@app.route("/<int:tid>/preview_round", methods=["GET"])
+@app.route("/<int:tid>/preview_round.json", methods=["GET"])
+def preview_round(tid):
+    if u_logic.has_admin_rights(current_user, tid) is False:
+        flash("You do not have permission to pair this tournament")
+        return redirect_for_tournament(tid)
+    tournament = Tournament.query.get(tid)
+    try:
+        proposal = mm.propose_round(tournament)
     except PairingException as e:
         flash(str(e))
         return redirect_for_tournament(tournament.id)
+    if request.path.endswith(".json"):
+        return return_json(proposal.to_json())
+    return render_template(
+        "pairing_preview.html",
+        tournament=tournament,
+        proposal=proposal,
+        players={p.id: p for p in tournament.players},
+        admin=True,
+        get_faction=get_faction,
+    )
+
+
+@login_required
+@app.route("/<int:tid>/commit_preview", methods=["POST"])
+def commit_preview(tid):
+    if u_logic.has_admin_rights(current_user, tid) is False:
+        flash("You do not have permission to pair this tournament")
+        return redirect_for_tournament(tid)
+    tournament = Tournament.query.get(tid)
+    try:
+        proposal = mm.PairingProposal.from_json(request.form.get("proposal", ""))
+        jobs.run_now(
+            tournament,
+            "commit_preview",
+            lambda: mm.commit_proposal(tournament, proposal),
+        )
+    except (PairingException, JobException) as e:
+        flash(str(e))
+        return redirect_for_tournament(tournament.id)
     return redirect_for_round(tid=tournament.id, rnd=tournament.current_round)
 
 
+@login_required
+@app.route("/<int:tid>/pairing_runs", methods=["GET"])
+def tournament_pairing_runs(tid):
+    if u_logic.has_admin_rights(current_user, tid) is False:
+        flash("You do not have permission to view this tournament's pairing stats")
+        return redirect_for_tournament(tid)
+    tournament = Tournament.query.get(tid)
+    return pairing_runs_response(
+        telemetry.get_pairing_runs(tid), f"{tid}_pairing_runs.csv", tournament
+    )
+
+
+@login_required
+@app.route("/pairing_runs", methods=["GET"])
+def all_pairing_runs():
+    if current_user.is_anonymous or not current_user.admin_rights:
+        flash("You do not have permission to view pairing stats")
+        return redirect(url_for("index"))
+    return pairing_runs_response(telemetry.get_pairing_runs(), "pairing_runs.csv")
+
+
+def pairing_runs_response(runs, filename, tournament=None):
+    if request.args.get("format") == "csv":
+        response = Response(telemetry.runs_to_csv(runs), mimetype="text/csv")
+        response.headers.set("Content-Disposition", "attachment", filename=filename)
+        return response
+    return render_template(
+        "pairing_runs.html",
+        runs=runs,
+        tournament=tournament,
+        side_imbalance=telemetry.side_imbalance,
+    )
+
+
 @login_required
 @app.route("/<int:tid>/unpair_round", methods=["GET", "POST"])
 def unpair_round(tid):
     tournament = Tournament.query.get(tid)
-    t_logic.unpair_round(tournament)
+    try:
+        jobs.run_now(
+            tournament, "unpair_round", lambda: t_logic.unpair_round(tournament)
+        )
+    except JobException as e:
+        flash(str(e))
     return redirect_for_tournament(tournament.id)
 
 
@@ -208,8 +346,7 @@ def delete_match(mid):
     match = Match.query.get(mid)
     round = match.rnd
     tid = match.tournament.id
-    db.session.delete(match)
-    db.session.commit()
+    m_logic.delete(match)
     flash("Match deleted")
     return redirect(url_for("tournaments.round", tid=tid, rnd=round))
 
@@ -219,8 +356,9 @@ def delete_match(mid):
 def edit_pairings(tid, rnd):
     tournament = Tournament.query.get(tid)
     form = EditMatchesForm()
-    if t_logic.get_unpaired_players(tournament) is not None:
-        form.populate_players(t_logic.get_unpaired_players(tournament))
+    unpaired_players = t_logic.get_unpaired_players(tournament)
+    if unpaired_players is not None:
+        form.populate_players(unpaired_players)
         if form.validate_on_submit():
             is_bye = form.runner_player.data == "None"
             print(is_bye)
@@ -235,31 +373,31 @@ def edit_pairings(tid, rnd):
             )
             print(tournament.active_matches)
 
+            matches = t_logic.get_round(tournament, rnd)
             return render_template(
                 "edit_pairings.html",
                 tournament=tournament,
                 form=form,
                 rnd=rnd,
+                matches=matches,
                 format_results=format_results,
                 admin=u_logic.has_admin_rights(current_user, tid),
-                rank_tables=rank_tables,
                 get_faction=get_faction,
-                t_logic=t_logic,
                 match_report=MatchReport,
-                has_reporting_rights=u_logic.has_reporting_rights,
+                reportable=u_logic.reportable_match_ids(current_user, matches),
             )
+    matches = t_logic.get_round(tournament, rnd)
     return render_template(
         "edit_pairings.html",
         tournament=tournament,
         form=form,
         rnd=rnd,
+        matches=matches,
         format_results=format_results,
         admin=u_logic.has_admin_rights(current_user, tid),
-        rank_tables=rank_tables,
         get_faction=get_faction,
-        t_logic=t_logic,
         match_report=MatchReport,
-        has_reporting_rights=u_logic.has_reporting_rights,
+        reportable=u_logic.reportable_match_ids(current_user, matches),
     )
 
 
@@ -286,16 +424,15 @@ def create_cut(tid):
 
 @app.route("/<int:tid>/cut/<int:rnd>", methods=["GET", "POST"])
 def cut_round(tid, rnd):
-    tournament = Tournament.query.get(tid)
+    tournament = read_model.load_snapshot(tid)
     return render_template(
         "cut_round.html",
         tournament=tournament,
         rnd=rnd,
+        matches=tournament.cut.round(rnd),
         format_results=format_results,
         admin=u_logic.has_admin_rights(current_user, tid),
-        rank_tables=rank_tables,
         get_faction=get_faction,
-        tc_logic=tc_logic,
     )
 
 
@@ -359,7 +496,8 @@ def delete_cut(tid):
 @app.route("/<int:tid>/standings/json", methods=["GET"])
 @app.route("/<int:tid>/standings.json", methods=["GET"])
 def abr_export(tid):
-    response = Response(get_json(tid), mimetype="application/json")
+    rnd = request.args.get("rnd", type=int)
+    response = Response(get_json(tid, rnd), mimetype="application/json")
     response.headers.set("Content-Disposition", "attachment", filename=f"{tid}.json")
     return response
 
@@ -389,6 +527,7 @@ def edit_tournament(tid):
         tournament.require_login = form.require_login.data
         tournament.visible = form.visible.data
         tournament.require_decklist = form.require_decklist.data
+        tournament.solver = form.solver.data or None
         db.session.commit()
         flash(f"{tournament.name} has been edited!", category="success")
         return redirect_for_tournament(tournament.id)
@@ -400,6 +539,7 @@ def edit_tournament(tid):
     form.visible.data = tournament.visible
     form.require_decklist.data = tournament.require_decklist
     form.require_login.data = tournament.require_login
+    form.solver.data = tournament.solver or ""
     return render_template(
         "tournament_creation.html", form=form, tournament=tournament, heading="Edit"
     )
@@ -6,6 +6,8 @@ from data_models.match import Match, MatchResult, convert_result_to_score
 from data_models.players import Player
 from data_models.tournaments import Tournament
 import aesops.business_logic.players as p_logic
+import aesops.business_logic.read_model as read_model
+import aesops.business_logic.snapshots as snapshots
 import aesops.business_logic.top_cut as tc_logic
 import aesops.business_logic.tournament as t_logic
 import aesops.cards as cards
@@ -69,12 +71,26 @@ def format_results(match: Match):
         return "1 - 1"
 
 
-def get_json(tid):
-    t = Tournament.query.get(tid)
+def get_json(tid, rnd=None):
+    """
+    The tournament in ABR's format. Given a round, the standings and matches
+    are as they were when that round was concluded, without the cut.
+    """
+    t = read_model.load_tournament(tid)
+    snapshot = read_model.snapshot_of(t)
+    standings = None
+    if rnd is not None:
+        standings = snapshots.get_standings(t, rnd)
+    if standings is None:
+        rnd = None
+        standings = snapshots.get_standings(t, t_logic.last_concluded_round(snapshot))
+    if standings is None:
+        standings = t_logic.calculate_player_ranks(t)
+    cut = snapshot.cut if rnd is None else None
     t_json = {
         "name": t.name,
-        "cutToTop": t.cut.num_players if t.cut is not None else 0,
-        "preliminaryRounds": t.current_round,
+        "cutToTop": cut.num_players if cut is not None else 0,
+        "preliminaryRounds": t.current_round if rnd is None else rnd,
         "players": [],
         "eliminationPlayers": [],
         "rounds": [],
@@ -89,7 +105,7 @@ def get_json(tid):
         ],
     }
 
-    for i, player_dict in enumerate(t_logic.calculate_player_ranks(t)):
+    for i, player_dict in enumerate(standings):
         t_json["players"].append(
             {
                 "id": player_dict["player"].id,
@@ -98,15 +114,13 @@ def get_json(tid):
                 "corpIdentity": player_dict["player"].corp,
                 "runnerIdentity": player_dict["player"].runner,
                 "matchPoints": player_dict["score"],
-                "strengthOfSchedule": player_dict["player"].sos,
-                "extendedStrengthOfSchedule": player_dict["player"].esos,
+                "strengthOfSchedule": player_dict["sos"],
+                "extendedStrengthOfSchedule": player_dict["esos"],
                 "sideBalance": player_dict["side_bias"],
             }
         )
-    if t.cut is not None:
-        for i, player_dict in enumerate(
-            tc_logic.get_standings(t.cut)["ranked_players"]
-        ):
+    if cut is not None:
+        for i, player_dict in enumerate(tc_logic.get_standings(cut)["ranked_players"]):
             t_json["eliminationPlayers"].append(
                 {
                     "id": player_dict.player.id,
@@ -115,9 +129,9 @@ def get_json(tid):
                     "seed": player_dict.seed,
                 }
             )
-    for rnd in range(1, t.current_round + 1):
+    for swiss_rnd in range(1, t_json["preliminaryRounds"] + 1):
         match_list = []
-        for match in t_logic.get_round(t, rnd):
+        for match in snapshot.round(swiss_rnd):
             if match.concluded:
                 match_list.append(
                     {
@@ -146,10 +160,10 @@ def get_json(tid):
                     }
                 )
         t_json["rounds"].append(match_list)
-    if t.cut is not None:
-        for rnd in range(1, t.cut.rnd + 1):
+    if cut is not None:
+        for cut_rnd in range(1, cut.rnd + 1):
             match_list = []
-            for match in tc_logic.get_round(t.cut, rnd):
+            for match in cut.round(cut_rnd):
                 if match.concluded:
                     match_list.append(
                         {
@@ -230,7 +244,7 @@ def convert_stipped_to_card(stripped_name):
 
 # Modified from https://stackoverflow.com/questions/8694815/removing-accent-and-special-characters
 def remove_accents(data):
-    data = data.replace("\u2019", '\'')
+    data = data.replace("\u2019", "'")
     return "".join(
         x for x in unicodedata.normalize("NFKD", data) if x in string.printable
     )
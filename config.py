@@ -11,3 +11,42 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY") or "a-secret-key"
     LOG_TO_STDOUT = os.environ.get("LOG_TO_STDOUT")
     TOURNAMENTS_PER_PAGE = 20
+    # Which entry of matchmaking.MATCHING_SOLVERS pairs swiss rounds
+    PAIRING_SOLVER = os.environ.get("PAIRING_SOLVER") or "networkx"
+    # Only link players within this many match points of each other when pairing
+    # (widened per player where needed). Unset to always pair on the full graph
+    PAIRING_SCORE_WINDOW = (
+        int(os.environ["PAIRING_SCORE_WINDOW"])
+        if os.environ.get("PAIRING_SCORE_WINDOW")
+        else None
+    )
+    # Pair this many differently shuffled copies of the pool in parallel and keep
+    # the one with the least side imbalance. 1 pairs once, in process
+    PAIRING_SEARCH_SEEDS = int(os.environ.get("PAIRING_SEARCH_SEEDS") or 1)
+    # Worker processes for the above and for PAIRING_SCORE_GROUPS, defaults to
+    # one per CPU
+    PAIRING_SEARCH_WORKERS = (
+        int(os.environ["PAIRING_SEARCH_WORKERS"])
+        if os.environ.get("PAIRING_SEARCH_WORKERS")
+        else None
+    )
+    # Seconds to wait for the extra attempts before going with the best so far
+    PAIRING_SEARCH_TIMEOUT = float(os.environ.get("PAIRING_SEARCH_TIMEOUT") or 10)
+    # Seconds a round's matching may take. Unset to always wait for the exact
+    # matching, set it to fall back to a greedy best-effort pairing on time out
+    PAIRING_DEADLINE = (
+        float(os.environ["PAIRING_DEADLINE"])
+        if os.environ.get("PAIRING_DEADLINE")
+        else None
+    )
+    # Pair and conclude rounds in a background thread pool rather than in the
+    # request. Set BACKGROUND_JOBS=0 to run them in the request again
+    BACKGROUND_JOBS = os.environ.get("BACKGROUND_JOBS", "1") != "0"
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS") or 2)
+    # Seconds after which a job that never finished stops blocking new ones,
+    # counted from when it started, or from when it was queued if it never did
+    JOB_TIMEOUT = int(os.environ.get("JOB_TIMEOUT") or 600)
+    JOB_QUEUE_TIMEOUT = int(os.environ.get("JOB_QUEUE_TIMEOUT") or 3600)
+    # Pair each score group separately (and in parallel), floating odd players
+    # down, rather than solving one matching for the whole field
+    PAIRING_SCORE_GROUPS = os.environ.get("PAIRING_SCORE_GROUPS", "0") != "0"
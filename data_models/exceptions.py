@@ -1,5 +1,10 @@
 class ConclusionError(BaseException):
     pass
 
+
 class PairingException(Exception):
     pass
+
+
+class JobException(Exception):
+    pass
@@ -0,0 +1,35 @@
+from .model_store import db
+from sqlalchemy.orm import Mapped
+import enum
+
+
+class JobStatus(enum.Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    FINISHED = "finished"
+    FAILED = "failed"
+
+
+class Job(db.Model):
+    """A pairing or conclusion run in the background for a tournament"""
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    tid: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("tournament.id"), nullable=False
+    )
+    kind: Mapped[str] = db.Column(db.String, nullable=False)
+    status: Mapped[str] = db.Column(db.String, default=JobStatus.QUEUED.value)
+    # The tournament's id while the job is queued or running, None after. Being
+    # unique, the database refuses a second active job for the same tournament
+    active_tid: Mapped[int] = db.Column(db.Integer, unique=True)
+    # The tournament's round once the job was done
+    rnd: Mapped[int] = db.Column(db.Integer)
+    message: Mapped[str] = db.Column(db.Text)
+    created = db.Column(db.DateTime(timezone=True), default=db.func.now())
+    started = db.Column(db.DateTime(timezone=True))
+    finished = db.Column(db.DateTime(timezone=True))
+
+    tournament = db.relationship("Tournament", back_populates="jobs")
+
+    def __repr__(self) -> str:
+        return f"<Job> {self.kind} TID: {self.tid} - {self.status}"
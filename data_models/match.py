@@ -34,6 +34,14 @@ class MatchReport(enum.Enum):
 
 
 class Match(db.Model):
+    __table_args__ = (
+        # A tournament's matches and a single round of them
+        db.Index("ix_match_tid_rnd", "tid", "rnd"),
+        # The corp_matches and runner_matches of a player
+        db.Index("ix_match_corp_player_id", "corp_player_id"),
+        db.Index("ix_match_runner_player_id", "runner_player_id"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     tid = db.Column(db.Integer, db.ForeignKey("tournament.id"))
     rnd = db.Column(db.Integer)
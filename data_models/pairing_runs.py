@@ -0,0 +1,30 @@
+from .model_store import db
+from sqlalchemy.orm import Mapped
+
+
+class PairingRun(db.Model):
+    """How long pairing a swiss round took, and how good the result was"""
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    tid: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("tournament.id"), nullable=False
+    )
+    rnd: Mapped[int] = db.Column(db.Integer, nullable=False)
+    created = db.Column(db.DateTime(timezone=True), default=db.func.now())
+    solver: Mapped[str] = db.Column(db.String)
+    optimal: Mapped[bool] = db.Column(db.Boolean, default=True)
+    player_count: Mapped[int] = db.Column(db.Integer)
+    edge_count: Mapped[int] = db.Column(db.Integer)
+    # Seconds spent loading history and building costs, matching, and writing
+    cost_time: Mapped[float] = db.Column(db.Float)
+    matching_time: Mapped[float] = db.Column(db.Float)
+    write_time: Mapped[float] = db.Column(db.Float)
+    total_weight: Mapped[int] = db.Column(db.Integer)
+    rematches: Mapped[int] = db.Column(db.Integer)
+    # JSON object of absolute side bias after the round -> number of players
+    side_imbalance: Mapped[str] = db.Column(db.String)
+
+    tournament = db.relationship("Tournament", back_populates="pairing_runs")
+
+    def __repr__(self) -> str:
+        return f"<PairingRun> TID: {self.tid} - RND: {self.rnd}"
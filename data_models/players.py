@@ -3,6 +3,8 @@ from sqlalchemy.orm import Mapped
 
 
 class Player(db.Model):
+    __table_args__ = (db.Index("ix_player_tid_active", "tid", "active"),)
+
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
     name: Mapped[str] = db.Column(db.String, nullable=False)
     pronouns: Mapped[str] = db.Column(db.String)
@@ -22,6 +24,29 @@ class Player(db.Model):
     first_round_bye: Mapped[bool] = db.Column(db.Boolean, default=False)
     fixed_table: Mapped[bool] = db.Column(db.Boolean, default=False)
     table_number: Mapped[int] = db.Column(db.Integer, default=0)
+    # Results of the player's reported swiss matches, kept current alongside
+    # the score by standings.update_standings
+    corp_wins: Mapped[int] = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    corp_losses: Mapped[int] = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    corp_ties: Mapped[int] = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    runner_wins: Mapped[int] = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    runner_losses: Mapped[int] = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    runner_ties: Mapped[int] = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
+    byes: Mapped[int] = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
     uid = db.Column(db.Integer, db.ForeignKey("user.id"))
     user = db.relationship("User", back_populates="players")
 
@@ -32,3 +57,20 @@ class Player(db.Model):
 
     def __len__(self) -> int:
         return 1
+
+    @property
+    def corp_games(self) -> int:
+        return self.corp_wins + self.corp_losses + self.corp_ties
+
+    @property
+    def runner_games(self) -> int:
+        return self.runner_wins + self.runner_losses + self.runner_ties
+
+    @property
+    def games_played(self) -> int:
+        """Games actually played, so not counting byes"""
+        return self.corp_games + self.runner_games
+
+    @property
+    def side_balance(self) -> int:
+        return self.corp_games - self.runner_games
@@ -0,0 +1,35 @@
+from .model_store import db
+from sqlalchemy.orm import Mapped
+
+
+class StandingsSnapshot(db.Model):
+    """A player's place in the standings as a swiss round was concluded"""
+
+    __table_args__ = (
+        db.UniqueConstraint("tid", "rnd", "pid"),
+        db.Index("ix_standings_snapshot_tid_rnd_rank", "tid", "rnd", "rank"),
+    )
+
+    id: Mapped[int] = db.Column(db.Integer, primary_key=True)
+    tid: Mapped[int] = db.Column(
+        db.Integer, db.ForeignKey("tournament.id"), nullable=False
+    )
+    rnd: Mapped[int] = db.Column(db.Integer, nullable=False)
+    pid: Mapped[int] = db.Column(db.Integer, db.ForeignKey("player.id"), nullable=False)
+    rank: Mapped[int] = db.Column(db.Integer, nullable=False)
+    score: Mapped[int] = db.Column(db.Integer, default=0)
+    sos: Mapped[float] = db.Column(db.Numeric, default=0.0)
+    esos: Mapped[float] = db.Column(db.Numeric, default=0.0)
+    side_bias: Mapped[int] = db.Column(db.Integer, default=0)
+    corp_wins: Mapped[int] = db.Column(db.Integer, default=0)
+    corp_losses: Mapped[int] = db.Column(db.Integer, default=0)
+    corp_ties: Mapped[int] = db.Column(db.Integer, default=0)
+    runner_wins: Mapped[int] = db.Column(db.Integer, default=0)
+    runner_losses: Mapped[int] = db.Column(db.Integer, default=0)
+    runner_ties: Mapped[int] = db.Column(db.Integer, default=0)
+
+    tournament = db.relationship("Tournament", back_populates="standings_snapshots")
+    player = db.relationship("Player")
+
+    def __repr__(self) -> str:
+        return f"<StandingsSnapshot> TID: {self.tid} - RND: {self.rnd} - #{self.rank}"
@@ -39,7 +39,15 @@ class CutPlayer(db.Model):
     def __repr__(self) -> str:
         return f"<CutPlayer> ID: {self.id} - {self.player}"
 
+
 class ElimMatch(db.Model):
+    __table_args__ = (
+        # get_match_by_table
+        db.Index("ix_elim_match_cut_id_table_number", "cut_id", "table_number"),
+        # Cut.current_matches
+        db.Index("ix_elim_match_cut_id_rnd", "cut_id", "rnd"),
+    )
+
     id: Mapped[int] = db.Column(db.Integer, primary_key=True)
     cut_id = db.Column(
         db.Integer,
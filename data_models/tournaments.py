@@ -16,6 +16,19 @@ class Tournament(db.Model):
     reveal_cut_decklists: Mapped[bool] = db.Column(db.Boolean, default=False)
     reveal_decklists: Mapped[bool] = db.Column(db.Boolean, default=False)
     require_login: Mapped[bool] = db.Column(db.Boolean, default=False)
+    # Entry of matchmaking.MATCHING_SOLVERS, None for the PAIRING_SOLVER setting
+    solver: Mapped[str] = db.Column(db.String)
+    # played_matrix.PlayedMatrix, the player ids in index order and the packed bits.
+    # Deferred so only pairing pays for loading them
+    played_ids: Mapped[str] = db.deferred(db.Column(db.Text), group="played_matrix")
+    played_bits: Mapped[bytes] = db.deferred(
+        db.Column(db.LargeBinary), group="played_matrix"
+    )
+    # Bumped whenever the tournament, its players or its matches change, see
+    # rank_cache
+    version: Mapped[int] = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
 
     players = db.relationship(
         "Player", back_populates="tournament", cascade="all, delete-orphan"
@@ -34,6 +47,15 @@ class Tournament(db.Model):
         viewonly=True,
     )
     cut = db.relationship("Cut", uselist=False, back_populates="tournament")
+    pairing_runs = db.relationship(
+        "PairingRun", back_populates="tournament", cascade="all, delete-orphan"
+    )
+    jobs = db.relationship(
+        "Job", back_populates="tournament", cascade="all, delete-orphan"
+    )
+    standings_snapshots = db.relationship(
+        "StandingsSnapshot", back_populates="tournament", cascade="all, delete-orphan"
+    )
 
     def __repr__(self) -> str:
         return f"<Tournament> {self.name}: {self.id}"
@@ -0,0 +1,110 @@
+"""
+Quick, approximate pairings for when an exact matching might not finish in time.
+
+greedy_pairing pairs down the standings the way a TO would by hand, and
+improve_pairing then makes local swaps between tables while they lower the
+total cost. Neither is guaranteed optimal, but both work on the same cost
+matrix and allowed edges as the exact solvers, so their results are directly
+comparable. Everything is in terms of positions in the cost matrix, with
+mates[i] the partner of player i or -1 if they are unpaired.
+"""
+
+from typing import Callable
+
+import numpy as np
+
+
+def greedy_pairing(
+    scores: np.ndarray, costs: np.ndarray, allowed: np.ndarray
+) -> np.ndarray:
+    """
+    Works down the players from the highest score, pairing each with the
+    cheapest allowed opponent still available.
+    """
+    n = len(scores)
+    mates = np.full(n, -1, dtype=np.int64)
+    available = np.ones(n, dtype=bool)
+    for i in np.argsort(-np.asarray(scores), kind="stable"):
+        if not available[i]:
+            continue
+        available[i] = False
+        candidates = np.flatnonzero(available & allowed[i])
+        if len(candidates) == 0:
+            continue
+        j = candidates[np.argmin(costs[i, candidates])]
+        mates[i] = j
+        mates[j] = i
+        available[j] = False
+    return fill_unpaired(mates, allowed)
+
+
+def fill_unpaired(mates: np.ndarray, allowed: np.ndarray) -> np.ndarray:
+    """
+    Pairs up players greedy_pairing left behind, either directly or by splitting
+    an existing table between them (an augmenting path of length three).
+    """
+    unpaired = list(np.flatnonzero(mates == -1))
+    while len(unpaired) >= 2:
+        u = unpaired.pop()
+        partners = [v for v in unpaired if allowed[u, v]]
+        if partners:
+            v = partners[0]
+            unpaired.remove(v)
+            mates[u] = v
+            mates[v] = u
+            continue
+        for v in unpaired:
+            a = np.flatnonzero(allowed[u] & (mates >= 0))
+            a = a[allowed[v, mates[a]]]
+            if len(a):
+                a = a[0]
+                b = mates[a]
+                mates[u], mates[a] = a, u
+                mates[v], mates[b] = b, v
+                unpaired.remove(v)
+                break
+    return mates
+
+
+def improve_pairing(
+    mates: np.ndarray,
+    costs: np.ndarray,
+    allowed: np.ndarray,
+    stop: Callable[[], bool],
+) -> np.ndarray:
+    """
+    Swaps opponents between two tables whenever that lowers their combined
+    cost, until no swap helps or stop() says time is up.
+    """
+    mates = mates.copy()
+    big = np.iinfo(np.int64).max // 4
+    blocked = np.where(allowed, costs, big)
+    first = np.flatnonzero(mates > np.arange(len(mates)))
+    second = mates[first]
+    current = costs[first, second]
+    improved = True
+    while improved:
+        improved = False
+        for k in range(len(first)):
+            if stop():
+                return mates
+            a, b = first[k], second[k]
+            crossed = blocked[a, first] + blocked[b, second]
+            swapped = blocked[a, second] + blocked[b, first]
+            gains = current[k] + current - np.minimum(crossed, swapped)
+            gains[k] = 0
+            best = int(np.argmax(gains))
+            if gains[best] <= 0:
+                continue
+            c, d = first[best], second[best]
+            if crossed[best] > swapped[best]:
+                c, d = d, c
+            # Table k becomes a v c and table best becomes b v d
+            second[k], first[best], second[best] = c, b, d
+            for x, y in ((a, c), (b, d)):
+                mates[x] = y
+                mates[y] = x
+            current[k] = costs[a, c]
+            current[best] = costs[b, d]
+            improved = True
+    return mates
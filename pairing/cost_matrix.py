@@ -0,0 +1,286 @@
+from collections import OrderedDict
+import threading
+from typing import Sequence
+
+import numpy as np
+
+# find_min_edge starts from this value, so any pairing that costs more than it
+# (or that is illegal both ways round) is reported as exactly MAX_COST
+MAX_COST = 1000
+
+# How many tournaments keep a PairingState in memory between rounds
+MAX_PAIRING_STATES = 16
+
+# side_cost is 50 ** balance. At a balance of 2 that is already 2500, which is
+# above MAX_COST, so capping the exponent keeps the int64 maths from overflowing
+# without changing any result
+MAX_SIDE_EXPONENT = 2
+
+
+def index_players(players: Sequence) -> dict[int, int]:
+    return {player.id: i for i, player in enumerate(players)}
+
+
+def pack_history(players: Sequence) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Converts the opponent id lists held on each CachedPlayer into two boolean
+    matrices indexed by position in `players`.
+
+    played_corp[i, j] is True when player i has played corp against player j,
+    played_runner[i, j] when player i has played runner against player j.
+    Opponents who are not in `players` (dropped players, byes) are ignored.
+    """
+    index = index_players(players)
+    n = len(players)
+    played_corp = np.zeros((n, n), dtype=bool)
+    played_runner = np.zeros((n, n), dtype=bool)
+    for i, player in enumerate(players):
+        for opponent_id in player.corp_matches:
+            j = index.get(opponent_id)
+            if j is not None:
+                played_corp[i, j] = True
+        for opponent_id in player.runner_matches:
+            j = index.get(opponent_id)
+            if j is not None:
+                played_runner[i, j] = True
+    return played_corp, played_runner
+
+
+def corp_cost_matrix(
+    corp_scores: np.ndarray,
+    corp_bias: np.ndarray,
+    runner_scores: np.ndarray,
+    runner_bias: np.ndarray,
+    has_played: np.ndarray,
+) -> np.ndarray:
+    """
+    costs[i, j] is `calc_cost` with corp player i and runner player j.
+    """
+    balance = np.maximum(
+        np.maximum(corp_bias, 0)[:, None], np.maximum(-runner_bias, 0)[None, :]
+    )
+    side = np.int64(50) ** np.minimum(balance, MAX_SIDE_EXPONENT)
+    score = (corp_scores[:, None] - runner_scores[None, :]) ** 2
+    return side + score + has_played.astype(np.int64) * 5
+
+
+def min_edge_block(
+    rows: np.ndarray,
+    cols: np.ndarray,
+    scores: np.ndarray,
+    side_bias: np.ndarray,
+    played_corp: np.ndarray,
+    played_runner: np.ndarray,
+) -> np.ndarray:
+    """
+    The [rows, cols] block of min_edge_matrix, so that a few players' costs can
+    be recomputed without redoing the whole matrix.
+    """
+    block = np.ix_(rows, cols)
+    flipped = np.ix_(cols, rows)
+    row_corp = corp_cost_matrix(
+        scores[rows],
+        side_bias[rows],
+        scores[cols],
+        side_bias[cols],
+        played_corp[block] | played_runner[block],
+    )
+    # calc_cost(p2, p1) asks p2 whether they've met p1, so the "column player
+    # on corp" costs read the history from the column player's side
+    col_corp = corp_cost_matrix(
+        scores[cols],
+        side_bias[cols],
+        scores[rows],
+        side_bias[rows],
+        played_corp[flipped] | played_runner[flipped],
+    ).T
+    costs = np.minimum(
+        np.where(played_corp[block], MAX_COST, row_corp),
+        np.where(played_runner[block], MAX_COST, col_corp),
+    )
+    costs = np.minimum(costs, MAX_COST)
+    costs[rows[:, None] == cols[None, :]] = MAX_COST
+    return costs
+
+
+def min_edge_matrix(
+    scores: np.ndarray,
+    side_bias: np.ndarray,
+    played_corp: np.ndarray,
+    played_runner: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized `find_min_edge` over every pair of players at once.
+
+    Entry [i, j] is what find_min_edge(players[i], players[j]) returns, which
+    reads the history from player i's lists only. The matrix is therefore only
+    symmetric when the history it was given is consistent.
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    side_bias = np.asarray(side_bias, dtype=np.int64)
+    everyone = np.arange(len(scores))
+    return min_edge_block(
+        everyone, everyone, scores, side_bias, played_corp, played_runner
+    )
+
+
+def build_cost_matrix(players: Sequence, played=None) -> np.ndarray:
+    """
+    Builds the n x n matrix of pairing costs for a list of CachedPlayers, in
+    the order given. Matches find_min_edge for every pair.
+
+    The history comes from each player's opponent lists, or from `played` (a
+    played_matrix.PlayedMatrix) when one is given.
+    """
+    if played is None:
+        played_corp, played_runner = pack_history(players)
+    else:
+        played_corp, played_runner = played.submatrices([p.id for p in players])
+    return min_edge_matrix(
+        scores=np.array([p.score for p in players], dtype=np.int64),
+        side_bias=np.array([p.side_bias for p in players], dtype=np.int64),
+        played_corp=played_corp,
+        played_runner=played_runner,
+    )
+
+
+class PairingState:
+    """
+    A tournament's pairing costs, kept in memory between rounds.
+
+    Every call to update() compares the players it is given against what it saw
+    last time, and only recomputes the rows and columns of the cost matrix for
+    players whose score, side bias or opponents have changed (or who are new).
+    Because the comparison is against the players themselves, the state can
+    never hand back stale costs, it can only do more or less work.
+    """
+
+    def __init__(self):
+        # Pairing can run in background job threads as well as requests
+        self.lock = threading.Lock()
+        self.index = {}
+        self.player_ids = []
+        # What each row was last computed from, to spot players who changed
+        self.inputs = []
+        self.scores = np.zeros(0, dtype=np.int64)
+        self.side_bias = np.zeros(0, dtype=np.int64)
+        self.played_corp = np.zeros((0, 0), dtype=bool)
+        self.played_runner = np.zeros((0, 0), dtype=bool)
+        self.costs = np.zeros((0, 0), dtype=np.int64)
+
+    def add_players(self, player_ids: list[int]):
+        for player_id in player_ids:
+            self.index[player_id] = len(self.inputs)
+            self.player_ids.append(player_id)
+            self.inputs.append(None)
+        extra = len(player_ids)
+        self.scores = np.pad(self.scores, (0, extra))
+        self.side_bias = np.pad(self.side_bias, (0, extra))
+        self.played_corp = np.pad(self.played_corp, (0, extra))
+        self.played_runner = np.pad(self.played_runner, (0, extra))
+        self.costs = np.pad(self.costs, (0, extra), constant_values=MAX_COST)
+
+    def set_history(self, i: int, corp_opponents, runner_opponents):
+        self.played_corp[i, :] = False
+        self.played_runner[i, :] = False
+        self.played_corp[
+            i, [self.index[o] for o in corp_opponents if o in self.index]
+        ] = True
+        self.played_runner[
+            i, [self.index[o] for o in runner_opponents if o in self.index]
+        ] = True
+
+    def update(self, players: Sequence, played=None) -> np.ndarray:
+        """
+        Brings the state up to date with `players` and returns their cost
+        matrix in the order given, identical to build_cost_matrix(players).
+
+        Given the tournament's PlayedMatrix the changed rows of history are
+        copied from it in one go, rather than rebuilt from opponent lists.
+        """
+        with self.lock:
+            return self.locked_update(players, played)
+
+    def locked_update(self, players: Sequence, played=None) -> np.ndarray:
+        new_ids = {p.id for p in players if p.id not in self.index}
+        if new_ids:
+            self.add_players(sorted(new_ids))
+
+        changed = set()
+        for player in players:
+            i = self.index[player.id]
+            inputs = (
+                player.score,
+                player.side_bias,
+                frozenset(player.corp_matches),
+                frozenset(player.runner_matches),
+            )
+            if inputs != self.inputs[i]:
+                self.inputs[i] = inputs
+                self.scores[i] = player.score
+                self.side_bias[i] = player.side_bias
+                changed.add(i)
+        if new_ids:
+            # Opponents we hadn't seen before were left out of these rows
+            for i, inputs in enumerate(self.inputs):
+                if inputs is not None and (inputs[2] | inputs[3]) & new_ids:
+                    changed.add(i)
+        if changed:
+            changed = np.array(sorted(changed))
+            if played is None:
+                for i in changed:
+                    self.set_history(i, self.inputs[i][2], self.inputs[i][3])
+            else:
+                played_corp, played_runner = played.block(
+                    [self.player_ids[i] for i in changed], self.player_ids
+                )
+                self.played_corp[changed, :] = played_corp
+                self.played_runner[changed, :] = played_runner
+            everyone = np.arange(len(self.inputs))
+            history = (
+                self.scores,
+                self.side_bias,
+                self.played_corp,
+                self.played_runner,
+            )
+            self.costs[changed, :] = min_edge_block(changed, everyone, *history)
+            self.costs[:, changed] = min_edge_block(everyone, changed, *history)
+
+        order = np.array([self.index[p.id] for p in players], dtype=np.int64)
+        return self.costs[np.ix_(order, order)]
+
+
+# Most recently used last, so the oldest state is the first to be dropped
+pairing_states = OrderedDict()
+pairing_states_lock = threading.Lock()
+
+
+def get_pairing_state(tid: int) -> PairingState:
+    with pairing_states_lock:
+        state = pairing_states.pop(tid, None) or PairingState()
+        pairing_states[tid] = state
+        while len(pairing_states) > MAX_PAIRING_STATES:
+            pairing_states.popitem(last=False)
+        return state
+
+
+def score_window_mask(
+    scores: np.ndarray, allowed: np.ndarray, score_window: int
+) -> np.ndarray:
+    """
+    Restricts a symmetric boolean matrix of allowed pairings to players whose
+    scores are within `score_window` match points of each other.
+
+    A player with no partner inside the window has their own window widened
+    to their nearest allowed opponent, so nobody is cut off from the graph
+    just because they are alone in their score group.
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    score_gap = np.abs(scores[:, None] - scores[None, :])
+    unreachable = np.iinfo(np.int64).max
+    nearest = np.where(allowed, score_gap, unreachable).min(axis=1, initial=unreachable)
+    windows = np.where(
+        nearest == unreachable, score_window, np.maximum(nearest, score_window)
+    )
+    # A pairing is in range if it sits inside either player's window
+    return allowed & (score_gap <= np.maximum(windows[:, None], windows[None, :]))
@@ -0,0 +1,336 @@
+"""
+Maximum weight matching on a dense weight matrix.
+
+This is the O(n^3) primal-dual blossom algorithm (Edmonds/Gabow) kept entirely
+in NumPy arrays indexed by vertex number, rather than the dictionaries of
+networkx. The per-vertex scans that dominate the runtime (looking along a row
+of the weight matrix for tight edges, and the dual variable updates) are done
+as whole-array operations, which is what makes it quicker than networkx on
+the near-complete graphs that Swiss pairing produces.
+
+Vertices are numbered 1..n internally, 0 means "none", and n+1..2n are used for
+blossoms. Weights must be non-negative integers, 0 meaning there is no edge.
+"""
+
+from collections import deque
+
+import numpy as np
+
+
+class DenseBlossom:
+    def __init__(self, weights: np.ndarray):
+        n = weights.shape[0]
+        size = 2 * n + 1
+        self.n = n
+        self.n_x = n
+        # g[u][v] is the best edge between (possibly blossom) u and v, stored as
+        # its original endpoints and weight
+        index = np.arange(size, dtype=np.int64)
+        self.edge_u = np.repeat(index[:, None], size, axis=1)
+        self.edge_v = np.repeat(index[None, :], size, axis=0)
+        self.edge_w = np.zeros((size, size), dtype=np.int64)
+        self.edge_w[1:, 1:][:n, :n] = weights
+        self.lab = np.zeros(size, dtype=np.int64)
+        self.match = np.zeros(size, dtype=np.int64)
+        self.slack = np.zeros(size, dtype=np.int64)
+        self.st = index.copy()
+        self.pa = np.zeros(size, dtype=np.int64)
+        self.S = np.zeros(size, dtype=np.int64)
+        self.vis = np.zeros(size, dtype=np.int64)
+        self.vis_stamp = 0
+        self.flower_from = np.zeros((size, n + 1), dtype=np.int64)
+        self.flower_from[index[1 : n + 1], index[1 : n + 1]] = index[1 : n + 1]
+        self.flower = [[] for _ in range(size)]
+        self.queue = deque()
+        self.vertices = index[1 : n + 1]
+
+    def e_delta(self, u, v):
+        return (
+            self.lab[self.edge_u[u, v]]
+            + self.lab[self.edge_v[u, v]]
+            - 2 * self.edge_w[u, v]
+        )
+
+    def update_slack(self, u, x):
+        if not self.slack[x] or self.e_delta(u, x) < self.e_delta(self.slack[x], x):
+            self.slack[x] = u
+
+    def set_slack(self, x):
+        vertices = self.vertices
+        candidates = vertices[
+            (self.edge_w[vertices, x] > 0)
+            & (self.st[vertices] != x)
+            & (self.S[self.st[vertices]] == 0)
+        ]
+        if len(candidates) == 0:
+            self.slack[x] = 0
+            return
+        deltas = self.e_delta(candidates, x)
+        self.slack[x] = candidates[np.argmin(deltas)]
+
+    def q_push(self, x):
+        if x <= self.n:
+            self.queue.append(x)
+        else:
+            for member in self.flower[x]:
+                self.q_push(member)
+
+    def set_st(self, x, b):
+        self.st[x] = b
+        if x > self.n:
+            for member in self.flower[x]:
+                self.set_st(member, b)
+
+    def get_pr(self, b, xr):
+        flower = self.flower[b]
+        pr = flower.index(xr)
+        if pr % 2 == 1:
+            flower[1:] = flower[1:][::-1]
+            return len(flower) - pr
+        return pr
+
+    def set_match(self, u, v):
+        self.match[u] = self.edge_v[u, v]
+        if u > self.n:
+            xr = self.flower_from[u, self.edge_u[u, v]]
+            pr = self.get_pr(u, xr)
+            flower = self.flower[u]
+            for i in range(pr):
+                self.set_match(flower[i], flower[i ^ 1])
+            self.set_match(xr, v)
+            self.flower[u] = flower[pr:] + flower[:pr]
+
+    def augment(self, u, v):
+        while True:
+            xnv = self.st[self.match[u]]
+            self.set_match(u, v)
+            if not xnv:
+                return
+            self.set_match(xnv, self.st[self.pa[xnv]])
+            u, v = self.st[self.pa[xnv]], xnv
+
+    def get_lca(self, u, v):
+        self.vis_stamp += 1
+        while u or v:
+            if u:
+                if self.vis[u] == self.vis_stamp:
+                    return u
+                self.vis[u] = self.vis_stamp
+                u = self.st[self.match[u]]
+                if u:
+                    u = self.st[self.pa[u]]
+            u, v = v, u
+        return 0
+
+    def add_blossom(self, u, lca, v):
+        n = self.n
+        b = n + 1
+        while b <= self.n_x and self.st[b]:
+            b += 1
+        if b > self.n_x:
+            self.n_x += 1
+        self.lab[b] = 0
+        self.S[b] = 0
+        self.match[b] = self.match[lca]
+        flower = [lca]
+        x = u
+        while x != lca:
+            y = self.st[self.match[x]]
+            flower += [x, y]
+            self.q_push(y)
+            x = self.st[self.pa[y]]
+        flower[1:] = flower[1:][::-1]
+        x = v
+        while x != lca:
+            y = self.st[self.match[x]]
+            flower += [x, y]
+            self.q_push(y)
+            x = self.st[self.pa[y]]
+        self.flower[b] = flower
+        self.set_st(b, b)
+
+        tops = np.arange(1, self.n_x + 1)
+        self.edge_w[b, tops] = 0
+        self.edge_w[tops, b] = 0
+        self.flower_from[b, :] = 0
+        for xs in flower:
+            better = (self.edge_w[b, tops] == 0) | (
+                self.e_delta(xs, tops) < self.e_delta(b, tops)
+            )
+            targets = tops[better]
+            self.edge_u[b, targets] = self.edge_u[xs, targets]
+            self.edge_v[b, targets] = self.edge_v[xs, targets]
+            self.edge_w[b, targets] = self.edge_w[xs, targets]
+            self.edge_u[targets, b] = self.edge_u[targets, xs]
+            self.edge_v[targets, b] = self.edge_v[targets, xs]
+            self.edge_w[targets, b] = self.edge_w[targets, xs]
+            inherited = self.flower_from[xs, :] != 0
+            self.flower_from[b, inherited] = xs
+        self.set_slack(b)
+
+    def expand_blossom(self, b):
+        flower = self.flower[b]
+        for member in flower:
+            self.set_st(member, member)
+        xr = self.flower_from[b, self.edge_u[b, self.pa[b]]]
+        pr = self.get_pr(b, xr)
+        flower = self.flower[b]
+        for i in range(0, pr, 2):
+            xs = flower[i]
+            xns = flower[i + 1]
+            self.pa[xs] = self.edge_u[xns, xs]
+            self.S[xs] = 1
+            self.S[xns] = 0
+            self.slack[xs] = 0
+            self.set_slack(xns)
+            self.q_push(xns)
+        self.S[xr] = 1
+        self.pa[xr] = self.pa[b]
+        for xs in flower[pr + 1 :]:
+            self.S[xs] = -1
+            self.set_slack(xs)
+        self.st[b] = 0
+
+    def on_found_edge(self, eu, ev):
+        u = self.st[eu]
+        v = self.st[ev]
+        if self.S[v] == -1:
+            self.pa[v] = eu
+            self.S[v] = 1
+            nu = self.st[self.match[v]]
+            self.slack[v] = 0
+            self.slack[nu] = 0
+            self.S[nu] = 0
+            self.q_push(nu)
+        elif self.S[v] == 0:
+            lca = self.get_lca(u, v)
+            if not lca:
+                self.augment(u, v)
+                self.augment(v, u)
+                return True
+            self.add_blossom(u, lca, v)
+        return False
+
+    def scan(self, u):
+        """
+        Looks along u's row for tight edges to grow the forest with, and records
+        the rest as slack. Returns True if an augmenting path was found.
+        """
+        vertices = self.vertices
+        weights = self.edge_w[u, 1 : self.n + 1]
+        deltas = self.lab[u] + self.lab[vertices] - 2 * weights
+        neighbours = (weights > 0) & (self.st[vertices] != self.st[u])
+
+        # Non-tight edges only update the slack of the blossom they lead into
+        loose = vertices[neighbours & (deltas != 0)]
+        if len(loose):
+            tops = np.unique(self.st[loose])
+            current = self.slack[tops]
+            proposed = self.e_delta(u, tops)
+            improves = (current == 0) | (proposed < self.e_delta(current, tops))
+            self.slack[tops[improves]] = u
+
+        for v in vertices[neighbours & (deltas == 0)]:
+            # Earlier edges in this row may have merged v into u's blossom
+            if self.st[u] != self.st[v] and self.on_found_edge(u, v):
+                return True
+        return False
+
+    def tight_slack_edges(self, start):
+        tops = np.arange(start, self.n_x + 1)
+        slack = self.slack[tops]
+        found = (self.st[tops] == tops) & (slack != 0)
+        found &= self.st[slack] != tops
+        found &= self.e_delta(slack, tops) == 0
+        return tops[found]
+
+    def matching(self):
+        n = self.n
+        n_x = self.n_x
+        self.S[1 : n_x + 1] = -1
+        self.slack[1 : n_x + 1] = 0
+        self.queue = deque()
+        for x in range(1, n_x + 1):
+            if self.st[x] == x and not self.match[x]:
+                self.pa[x] = 0
+                self.S[x] = 0
+                self.q_push(x)
+        if not self.queue:
+            return False
+        while True:
+            while self.queue:
+                u = self.queue.popleft()
+                if self.S[self.st[u]] == 1:
+                    continue
+                if self.scan(u):
+                    return True
+
+            n_x = self.n_x
+            tops = np.arange(1, n_x + 1)
+            is_top = self.st[tops] == tops
+            d = None
+            blossoms = tops[n:]
+            outer_blossoms = blossoms[
+                (self.st[blossoms] == blossoms) & (self.S[blossoms] == 1)
+            ]
+            if len(outer_blossoms):
+                d = int(self.lab[outer_blossoms].min() // 2)
+            with_slack = tops[is_top & (self.slack[tops] != 0)]
+            if len(with_slack):
+                deltas = self.e_delta(self.slack[with_slack], with_slack)
+                labels = self.S[with_slack]
+                free = deltas[labels == -1]
+                if len(free):
+                    d = int(free.min()) if d is None else min(d, int(free.min()))
+                even = deltas[labels == 0] // 2
+                if len(even):
+                    d = int(even.min()) if d is None else min(d, int(even.min()))
+
+            vertex_labels = self.S[self.st[self.vertices]]
+            if d is None or (self.lab[self.vertices][vertex_labels == 0] <= d).any():
+                return False
+            self.lab[self.vertices[vertex_labels == 0]] -= d
+            self.lab[self.vertices[vertex_labels == 1]] += d
+            top_blossoms = blossoms[self.st[blossoms] == blossoms]
+            blossom_labels = self.S[top_blossoms]
+            self.lab[top_blossoms[blossom_labels == 0]] += 2 * d
+            self.lab[top_blossoms[blossom_labels == 1]] -= 2 * d
+
+            self.queue = deque()
+            candidates = self.tight_slack_edges(1)
+            while len(candidates):
+                x = candidates[0]
+                if self.on_found_edge(self.slack[x], x):
+                    return True
+                # Growing the forest can create new tight edges further along
+                candidates = self.tight_slack_edges(x + 1)
+
+            for b in range(n + 1, self.n_x + 1):
+                if self.st[b] == b and self.S[b] == 1 and self.lab[b] == 0:
+                    self.expand_blossom(b)
+
+    def solve(self):
+        w_max = int(self.edge_w.max())
+        self.lab[1 : self.n + 1] = w_max
+        while self.matching():
+            pass
+        return self.match[1 : self.n + 1] - 1
+
+
+def max_weight_matching(weights: np.ndarray, maxcardinality=False) -> np.ndarray:
+    """
+    Returns an array mapping each vertex to its partner, or -1 if unmatched.
+
+    With maxcardinality the matching has as many edges as possible, and the most
+    weight among those, the same contract as networkx.max_weight_matching.
+    """
+    weights = np.asarray(weights, dtype=np.int64)
+    n = weights.shape[0]
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    if maxcardinality:
+        # Make every edge worth more than any possible weight difference between
+        # two matchings, so one more edge always beats a heavier smaller matching
+        bonus = (n // 2 + 1) * int(weights.max())
+        weights = np.where(weights > 0, weights + bonus, 0)
+    return DenseBlossom(weights).solve()
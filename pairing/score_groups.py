@@ -0,0 +1,47 @@
+"""
+Splits a pairing pool into score groups that can be matched independently.
+
+In a big field almost every pairing is made inside a score group, so solving
+each group on its own (and in parallel) gives nearly the same result as one
+global matching for a fraction of the work. Groups with an odd number of
+players float one player down into the next group, choosing whoever has the
+cheapest pairing available there. Everything is in terms of positions in the
+cost matrix.
+"""
+
+import numpy as np
+
+
+def score_groups(
+    scores: np.ndarray, costs: np.ndarray, allowed: np.ndarray
+) -> list[np.ndarray]:
+    """
+    Returns the positions of the players in each group, highest scores first.
+    """
+    scores = np.asarray(scores)
+    levels = np.unique(scores)[::-1]
+    members = [list(np.flatnonzero(scores == level)) for level in levels]
+    groups = []
+    floated = []
+    for k, natives in enumerate(members):
+        group = floated + natives
+        floated = []
+        if len(group) % 2 == 1 and k + 1 < len(members):
+            below = np.array(members[k + 1])
+            # Players who already floated in stay, so nobody drops two groups
+            candidates = natives if natives else group
+            floater = min(
+                candidates, key=lambda i: float_cost(i, below, costs, allowed)
+            )
+            group.remove(floater)
+            floated = [floater]
+        if group:
+            groups.append(np.array(group, dtype=np.int64))
+    return groups
+
+
+def float_cost(i: int, below: np.ndarray, costs: np.ndarray, allowed: np.ndarray):
+    options = costs[i, below][allowed[i, below]]
+    if len(options) == 0:
+        return np.iinfo(np.int64).max
+    return options.min()
@@ -0,0 +1,108 @@
+"""
+The exact pairing solvers, and what they need to run in a worker process.
+
+Nothing here imports the app or the database, so pairing_search's fork server
+can preload this module (and cost_matrix, dense_matching, anytime_pairing and
+score_groups alongside it) without starting Flask or refreshing card data.
+Solvers take any sequence of players with an id and a score, and the cost
+matrix in the same order.
+"""
+
+from typing import Iterable, NamedTuple, Sequence
+
+from networkx import Graph, max_weight_matching
+import numpy as np
+
+from pairing.cost_matrix import score_window_mask
+import pairing.dense_matching as dense_matching
+
+
+class SolverPlayer(NamedTuple):
+    id: int
+    score: int
+
+
+def solver_pool(pool: Iterable) -> list[SolverPlayer]:
+    """The pool as the solvers see it, cheap to send to a worker process"""
+    return [SolverPlayer(player.id, player.score) for player in pool]
+
+
+def pairing_edges(
+    pool: Sequence, costs: np.ndarray, score_window: int = None
+) -> np.ndarray:
+    """
+    Returns the upper triangle of which pairs in the pool may be paired.
+
+    Every pair cheaper than 100 is allowed. With a score window only pairs within
+    that many match points of each other are kept (see score_window_mask), which
+    makes the graph much sparser for large events.
+    """
+    allowed = np.triu(costs < 100, k=1)
+    if score_window is not None:
+        allowed = score_window_mask(
+            [player.score for player in pool], allowed | allowed.T, score_window
+        )
+        allowed = np.triu(allowed, k=1)
+    return allowed
+
+
+def build_pairing_graph(
+    pool: Sequence, costs: np.ndarray, score_window: int = None
+) -> Graph:
+    graph = Graph()
+    graph.add_nodes_from(player.id for player in pool)
+    # np.nonzero walks the triangle in the same order itertools.combinations would
+    for i, j in zip(*np.nonzero(pairing_edges(pool, costs, score_window))):
+        graph.add_edge(pool[i].id, pool[j].id, weight=1000 - int(costs[i, j]))
+    return graph
+
+
+def networkx_solver(
+    pool: Sequence, costs: np.ndarray, score_window: int = None
+) -> set[tuple[int, int]]:
+    """The reference solver, networkx's blossom implementation on a Graph"""
+    graph = build_pairing_graph(pool, costs, score_window)
+    return max_weight_matching(graph, maxcardinality=True)
+
+
+def dense_solver(
+    pool: Sequence, costs: np.ndarray, score_window: int = None
+) -> set[tuple[int, int]]:
+    """The same blossom algorithm run directly on the weight matrix"""
+    allowed = pairing_edges(pool, costs, score_window)
+    allowed |= allowed.T
+    mates = dense_matching.max_weight_matching(
+        np.where(allowed, 1000 - costs, 0), maxcardinality=True
+    )
+    return {(pool[i].id, pool[j].id) for i, j in enumerate(mates) if j > i}
+
+
+MATCHING_SOLVERS = {
+    "networkx": networkx_solver,
+    "dense": dense_solver,
+}
+
+
+def seeded_pairings(
+    solve,
+    pool: Sequence,
+    costs: np.ndarray,
+    score_window: int = None,
+    seed: int = 0,
+) -> set[tuple[int, int]]:
+    """
+    Runs the solver on the pool shuffled by `seed`, seed 0 leaving it as it is.
+
+    Runs in worker processes, so `solve` and the pool must be picklable
+    without the app: one of MATCHING_SOLVERS and a solver_pool.
+    """
+    order = np.arange(len(pool))
+    if seed:
+        order = np.random.default_rng(seed).permutation(len(pool))
+    pool = [pool[i] for i in order]
+    costs = costs[np.ix_(order, order)]
+    if score_window is not None:
+        pairings = solve(pool, costs, score_window)
+        if len(pairings) * 2 == len(pool):
+            return pairings
+    return solve(pool, costs)
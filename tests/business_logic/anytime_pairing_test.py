@@ -0,0 +1,80 @@
+import numpy as np
+from flask import current_app
+
+import aesops.business_logic.matchmaking as mm
+import pairing.anytime_pairing as anytime_pairing
+from pairing.cost_matrix import build_cost_matrix
+from tests.conftest import new_tournament
+from tests.pairing_workers import broken_solver
+from tests.simulation_utils import (
+    allowed_edges,
+    random_pairing_pool,
+    total_cost,
+)
+
+
+def test_greedy_pairing_is_perfect_and_improves():
+    for seed in range(5):
+        pool = random_pairing_pool(60, 5, seed)
+        costs = build_cost_matrix(pool)
+        allowed = allowed_edges(pool, costs)
+        scores = np.array([player.score for player in pool])
+        greedy = anytime_pairing.greedy_pairing(scores, costs, allowed)
+        improved = anytime_pairing.improve_pairing(
+            greedy, costs, allowed, stop=lambda: False
+        )
+        for mates in (greedy, improved):
+            assert (mates >= 0).all()
+            assert (mates[mates] == np.arange(60)).all()
+            assert allowed[np.arange(60), mates].all()
+        greedy_cost = costs[np.arange(60), greedy].sum()
+        improved_cost = costs[np.arange(60), improved].sum()
+        optimal = mm.networkx_solver(pool, costs)
+        assert improved_cost <= greedy_cost
+        assert improved_cost // 2 >= total_cost(optimal, pool, costs)
+
+
+def test_fill_unpaired_splits_a_table():
+    # 0-1 are paired, 2 and 3 can only play 0 and 1 respectively
+    allowed = np.zeros((4, 4), dtype=bool)
+    for i, j in ((0, 1), (0, 2), (1, 3)):
+        allowed[i, j] = allowed[j, i] = True
+    mates = anytime_pairing.fill_unpaired(np.array([1, 0, -1, -1]), allowed)
+    assert list(mates) == [2, 3, 0, 1]
+
+
+def test_solve_by_deadline(database):
+    pool = random_pairing_pool(40, 4, 1)
+    costs = build_cost_matrix(pool)
+    pairings, optimal = mm.solve_by_deadline(pool, costs, deadline=60)
+    assert optimal
+    assert total_cost(pairings, pool, costs) == total_cost(
+        mm.networkx_solver(pool, costs), pool, costs
+    )
+    # Small pools are solved in process whatever the deadline
+    assert mm.solve_by_deadline(pool, costs, deadline=0)[1]
+    # No time at all for the exact solver, so the greedy pairing is returned
+    pool = random_pairing_pool(mm.MIN_PARALLEL_POOL, 4, 1)
+    costs = build_cost_matrix(pool)
+    pairings, optimal = mm.solve_by_deadline(pool, costs, deadline=0)
+    assert not optimal
+    assert len(pairings) == mm.MIN_PARALLEL_POOL // 2
+
+
+def test_solve_by_deadline_survives_a_failed_worker(database, monkeypatch, caplog):
+    monkeypatch.setitem(mm.MATCHING_SOLVERS, "broken", broken_solver)
+    pool = random_pairing_pool(mm.MIN_PARALLEL_POOL, 4, 2)
+    costs = build_cost_matrix(pool)
+    pairings, optimal = mm.solve_by_deadline(pool, costs, 60, solver="broken")
+    assert not optimal
+    assert len(pairings) == mm.MIN_PARALLEL_POOL // 2
+    assert "solver fell over" in caplog.text
+
+
+def test_propose_round_reports_best_effort(database, monkeypatch):
+    monkeypatch.setitem(current_app.config, "PAIRING_DEADLINE", 0)
+    t = new_tournament(mm.MIN_PARALLEL_POOL, name="Deadline")
+    proposal = mm.propose_round(t)
+    assert not proposal.optimal
+    assert len(proposal.matches) == mm.MIN_PARALLEL_POOL // 2
+    assert mm.PairingProposal.from_json(proposal.to_json()).optimal is False
@@ -0,0 +1,103 @@
+from random import Random
+
+import numpy as np
+
+from aesops.business_logic.matchmaking import find_min_edge
+from pairing.cost_matrix import (
+    PairingState,
+    build_cost_matrix,
+    score_window_mask,
+)
+from pairing.solvers import dense_solver, pairing_edges
+from tests.simulation_utils import play_random_round, random_pairing_pool
+
+
+def assert_matches_find_min_edge(players):
+    costs = build_cost_matrix(players)
+    for i, p1 in enumerate(players):
+        for j, p2 in enumerate(players):
+            if i == j:
+                continue
+            assert costs[i, j] == find_min_edge(p1, p2), (p1, p2)
+
+
+def test_cost_matrix_matches_find_min_edge():
+    for seed in range(5):
+        assert_matches_find_min_edge(random_pairing_pool(40, 6, seed))
+
+
+def test_cost_matrix_large_side_bias():
+    # Biases this large overflow int64 if 50 ** bias is taken literally
+    players = random_pairing_pool(10, 0, 0)
+    for player in players:
+        player.side_bias = player.id * 3 - 15
+    assert_matches_find_min_edge(players)
+
+
+def test_cost_matrix_one_sided_history():
+    # find_min_edge only reads the first player's lists, the matrix must too
+    players = random_pairing_pool(6, 0, 0)
+    players[0].corp_matches = [2, 3]
+    players[0].runner_matches = [3]
+    players[4].runner_matches = [6]
+    assert_matches_find_min_edge(players)
+
+
+def test_score_window_mask_widens_isolated_players():
+    scores = np.array([9, 9, 6, 6, 0])
+    allowed = ~np.eye(5, dtype=bool)
+    mask = score_window_mask(scores, allowed, score_window=0)
+    assert mask[0, 1] and mask[2, 3]
+    assert not mask[0, 2]
+    # The player on 0 points has nobody on their score, so they reach up to 6
+    assert mask[4, 2] and mask[4, 3]
+    assert not mask[4, 0]
+    assert (mask == mask.T).all()
+
+
+def test_score_window_widens_for_a_player_with_no_legal_partner():
+    players = random_pairing_pool(6, 0, 0)
+    for player, score in zip(players, [6, 6, 3, 3, 0, 0]):
+        player.score = score
+    # The two players on 0 have played each other on both sides
+    p5, p6 = players[4], players[5]
+    p5.corp_matches = p5.runner_matches = [p6.id]
+    p6.corp_matches = p6.runner_matches = [p5.id]
+    costs = build_cost_matrix(players)
+    allowed = pairing_edges(players, costs, score_window=0)
+    allowed |= allowed.T
+    # Nobody on their score is left, so their window reaches the 3s
+    assert list(np.flatnonzero(allowed[4])) == [2, 3]
+    assert list(np.flatnonzero(allowed[5])) == [2, 3]
+    pairings = dense_solver(players, costs, score_window=0)
+    assert len(pairings) == 3
+    paired = {pid: opp for pair in pairings for pid, opp in (pair, pair[::-1])}
+    assert {paired[p5.id], paired[p6.id]} == {3, 4}
+
+
+def test_pairing_state_matches_full_rebuild():
+    rng = Random(7)
+    players = random_pairing_pool(24, 2, 7)
+    state = PairingState()
+    assert (state.update(players) == build_cost_matrix(players)).all()
+    for rnd in range(5):
+        if rnd == 2:
+            # Late joiners arrive with no history
+            for i in range(4):
+                late_joiner = random_pairing_pool(1, 0, 0)[0]
+                late_joiner.id = 100 + i
+                players.append(late_joiner)
+        play_random_round(players, rng)
+        # Some players sit rounds out and come back with new opponents recorded
+        pool = players[3:] if rnd % 2 else players.copy()
+        rng.shuffle(pool)
+        assert (state.update(pool) == build_cost_matrix(pool)).all()
+
+
+def test_pairing_state_sees_opponents_it_has_not_met():
+    players = random_pairing_pool(6, 0, 0)
+    players[0].corp_matches = [6]
+    players[5].runner_matches = [1]
+    state = PairingState()
+    state.update(players[:5])
+    assert (state.update(players) == build_cost_matrix(players)).all()
@@ -0,0 +1,51 @@
+from random import Random
+
+import numpy as np
+from networkx import Graph, max_weight_matching
+
+import pairing.dense_matching as dense_matching
+from pairing.cost_matrix import build_cost_matrix
+from pairing.solvers import dense_solver, networkx_solver
+from tests.simulation_utils import random_pairing_pool
+
+
+def total_weight(pairings, pool, costs):
+    index = {player.id: i for i, player in enumerate(pool)}
+    return sum(1000 - costs[index[p1], index[p2]] for p1, p2 in pairings)
+
+
+def test_dense_solver_matches_networkx_on_random_fields():
+    for seed in range(6):
+        pool = random_pairing_pool(30 + seed * 11, 4 + seed, seed)
+        costs = build_cost_matrix(pool)
+        reference = networkx_solver(pool, costs)
+        result = dense_solver(pool, costs)
+        assert len(result) == len(reference)
+        assert total_weight(result, pool, costs) == total_weight(reference, pool, costs)
+        paired = [pid for pair in result for pid in pair]
+        assert len(paired) == len(set(paired))
+
+
+def test_dense_matching_on_random_graphs():
+    # Sparse, small-weight graphs force lots of blossoms and dual updates
+    rng = Random(0)
+    for _ in range(200):
+        n = rng.randint(1, 24)
+        weights = np.zeros((n, n), dtype=np.int64)
+        graph = Graph()
+        graph.add_nodes_from(range(n))
+        for i in range(n):
+            for j in range(i + 1, n):
+                if rng.random() < 0.4:
+                    weights[i, j] = weights[j, i] = rng.randint(1, 5)
+                    graph.add_edge(i, j, weight=int(weights[i, j]))
+        maxcardinality = rng.random() < 0.5
+        reference = max_weight_matching(graph, maxcardinality=maxcardinality)
+        mates = dense_matching.max_weight_matching(weights, maxcardinality)
+        pairs = [(i, j) for i, j in enumerate(mates) if j > i]
+        assert all(mates[j] == i for i, j in pairs)
+        assert sum(weights[i, j] for i, j in pairs) == sum(
+            weights[i, j] for i, j in reference
+        )
+        if maxcardinality:
+            assert len(pairs) == len(reference)
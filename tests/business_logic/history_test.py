@@ -0,0 +1,17 @@
+import aesops.business_logic.players as p_logic
+from aesops.business_logic.history import load_history
+from tests.simulation_utils import sim_tournament
+
+
+def test_history_matches_player_relationships(database):
+    t = sim_tournament(n_players=15, n_rounds=4, name="History", num_byes=1)
+    history = load_history(t)
+    for player in t.players:
+        for side in ["corp", "runner", None]:
+            assert history.opponent_ids(player.id, side=side) == set(
+                p_logic.get_opponent_ids(player, side=side)
+            )
+        assert history.side_balance(player.id) == p_logic.get_side_balance(player)
+        assert history.received_bye(player.id) == any(
+            m.is_bye for m in player.corp_matches
+        )
@@ -0,0 +1,148 @@
+from concurrent.futures import Future
+
+import pytest
+from flask import current_app
+
+import aesops.business_logic.jobs as jobs
+import aesops.business_logic.matchmaking as mm
+import aesops.business_logic.tournament as t_logic
+from aesops import app
+from data_models.exceptions import JobException, PairingException
+from data_models.jobs import JobStatus
+from data_models.tournaments import Tournament
+from tests.conftest import new_tournament
+from tests.simulation_utils import create_results
+
+
+def test_background_pair_and_conclude(database):
+    t = new_tournament(12)
+    job = jobs.enqueue(t, "pair_round")
+    jobs.wait(job.id, timeout=60)
+    database.session.expire_all()
+    assert job.status == JobStatus.FINISHED.value
+    assert job.active_tid is None
+    assert job.rnd == 1
+    assert len(t.active_matches) == 6
+
+    for match in t.active_matches:
+        create_results(match)
+    database.session.commit()
+    job = jobs.enqueue(t, "conclude_round")
+    jobs.wait(job.id, timeout=60)
+    database.session.expire_all()
+    assert job.status == JobStatus.FINISHED.value
+    assert all(m.concluded for m in t.active_matches)
+    assert jobs.latest_job(t.id).id == job.id
+
+
+def test_one_active_job_per_tournament(database, monkeypatch):
+    monkeypatch.setitem(current_app.config, "BACKGROUND_JOBS", False)
+    t = new_tournament(8)
+    other = new_tournament(8)
+    blocking = jobs.Job(
+        tid=t.id,
+        kind="pair_round",
+        active_tid=t.id,
+        status=JobStatus.RUNNING.value,
+        started=jobs.utc_now(),
+    )
+    database.session.add(blocking)
+    database.session.commit()
+    with pytest.raises(JobException):
+        jobs.enqueue(t, "pair_round")
+    # Other tournaments are unaffected
+    assert jobs.enqueue(other, "pair_round").status == JobStatus.FINISHED.value
+    # A job left behind by a dead worker stops blocking once it's too old
+    monkeypatch.setitem(current_app.config, "JOB_TIMEOUT", -1)
+    job = jobs.enqueue(t, "pair_round")
+    assert job.status == JobStatus.FINISHED.value
+    assert blocking.status == JobStatus.FAILED.value
+
+
+def test_queued_jobs_are_timed_from_when_they_start(database, monkeypatch):
+    monkeypatch.setitem(current_app.config, "BACKGROUND_JOBS", False)
+    monkeypatch.setitem(current_app.config, "JOB_TIMEOUT", -1)
+    t = new_tournament(8)
+    queued = jobs.Job(tid=t.id, kind="pair_round", active_tid=t.id)
+    database.session.add(queued)
+    database.session.commit()
+    # Still waiting for a worker, which is no reason to give up on it
+    with pytest.raises(JobException):
+        jobs.enqueue(t, "pair_round")
+    monkeypatch.setitem(current_app.config, "JOB_QUEUE_TIMEOUT", -1)
+    job = jobs.enqueue(t, "pair_round")
+    assert job.status == JobStatus.FINISHED.value
+    assert queued.status == JobStatus.FAILED.value
+    # A worker getting to the expired job late leaves it be
+    jobs.run_job(current_app._get_current_object(), queued.id)
+    database.session.expire_all()
+    assert queued.status == JobStatus.FAILED.value
+    assert queued.started is None
+    assert t.current_round == 1
+
+
+def test_failed_job_records_the_error(database, monkeypatch):
+    monkeypatch.setitem(current_app.config, "BACKGROUND_JOBS", False)
+    t = new_tournament(8)
+    jobs.enqueue(t, "pair_round")
+    # Nothing has been reported yet
+    job = jobs.enqueue(t, "conclude_round")
+    assert job.status == JobStatus.FAILED.value
+    assert job.message
+    assert job.active_tid is None
+    assert not any(m.concluded for m in t.active_matches)
+
+
+def test_finished_jobs_leave_no_future_behind(database, monkeypatch):
+    class InlineExecutor:
+        # Finishes the job before enqueue has stored its future
+        def submit(self, fn, *args):
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+    monkeypatch.setattr(jobs, "get_executor", InlineExecutor)
+    t = new_tournament(8)
+    job = jobs.enqueue(t, "pair_round")
+    assert job.id not in jobs.futures
+
+
+def test_route_changes_wait_for_active_jobs(database):
+    t = new_tournament(8)
+    mm.pair_round(t)
+    tid = t.id
+    blocking = jobs.Job(
+        tid=tid,
+        kind="conclude_round",
+        active_tid=tid,
+        status=JobStatus.RUNNING.value,
+        started=jobs.utc_now(),
+    )
+    database.session.add(blocking)
+    database.session.commit()
+    assert app.test_client().get(f"/{tid}/unpair_round").status_code == 302
+    t = database.session.get(Tournament, tid)
+    assert t.current_round == 1
+    with pytest.raises(JobException):
+        jobs.run_now(t, "unpair_round", lambda: t_logic.unpair_round(t))
+    assert t.current_round == 1
+
+    blocking.status = JobStatus.FINISHED.value
+    blocking.active_tid = None
+    database.session.commit()
+    jobs.run_now(t, "unpair_round", lambda: t_logic.unpair_round(t))
+    assert t.current_round == 0
+    job = jobs.latest_job(tid)
+    assert job.kind == "unpair_round"
+    assert job.status == JobStatus.FINISHED.value
+    assert job.active_tid is None
+
+    # A change that fails is recorded and its error passed on
+    def broken_change():
+        raise PairingException("Proposal is out of date")
+
+    with pytest.raises(PairingException):
+        jobs.run_now(t, "commit_preview", broken_change)
+    job = jobs.latest_job(tid)
+    assert job.status == JobStatus.FAILED.value
+    assert job.active_tid is None
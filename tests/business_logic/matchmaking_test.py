@@ -0,0 +1,122 @@
+import pytest
+from sqlalchemy import event
+
+import aesops.business_logic.matchmaking as mm
+import aesops.business_logic.players as p_logic
+import aesops.business_logic.tournament as t_logic
+from data_models.exceptions import PairingException
+from data_models.match import Match
+from tests.conftest import new_tournament
+from tests.simulation_utils import create_players, sim_round
+
+
+def test_pair_round_commits_the_round_once(database):
+    t = new_tournament(21, num_byes=2)
+    commits = []
+
+    def count_commit(session):
+        commits.append(session)
+
+    event.listen(database.session, "after_commit", count_commit)
+    try:
+        mm.pair_round(t)
+    finally:
+        event.remove(database.session, "after_commit", count_commit)
+    # The round in one transaction, then the record of how it was paired
+    assert len(commits) == 2
+    assert t.current_round == 1
+    assert len(t.active_matches) == 12
+    assert sorted(m.table_number for m in t.active_matches) == list(range(1, 13))
+    for match in t.active_matches:
+        if match.is_bye:
+            assert match.corp_player.received_bye
+
+
+def test_pair_round_rolls_back_on_failure(database, monkeypatch):
+    t = new_tournament(10)
+    mm.pair_round(t)
+    sim_round(t)
+
+    def broken_solver(*args, **kwargs):
+        raise RuntimeError("solver fell over")
+
+    monkeypatch.setattr(mm, "solve_pairings", broken_solver)
+    with pytest.raises(RuntimeError):
+        mm.pair_round(t)
+    database.session.expire_all()
+    assert t.current_round == 1
+    assert Match.query.filter_by(tid=t.id, rnd=2).count() == 0
+
+
+def test_preview_writes_nothing_and_commits_as_proposed(database):
+    t = new_tournament(15)
+    mm.pair_round(t)
+    sim_round(t)
+    proposal = mm.propose_round(t)
+    assert t.current_round == 1
+    assert Match.query.filter_by(tid=t.id, rnd=2).count() == 0
+    assert proposal.byes == 1
+    # A round trip through the preview form must not change anything
+    proposal = mm.PairingProposal.from_json(proposal.to_json())
+    mm.commit_proposal(t, proposal)
+    assert t.current_round == 2
+    written = {
+        (m.corp_player_id, m.runner_player_id, m.table_number)
+        for m in Match.query.filter_by(tid=t.id, rnd=2)
+    }
+    assert written == {
+        (m.corp_player_id, m.runner_player_id, m.table_number) for m in proposal.matches
+    }
+
+
+def test_commit_rejects_stale_proposal(database):
+    t = new_tournament(10)
+    proposal = mm.propose_round(t)
+    p_logic.drop(t.players[0])
+    with pytest.raises(PairingException):
+        mm.commit_proposal(t, proposal)
+    p_logic.undrop(t.players[0])
+    doubled = mm.PairingProposal.from_json(proposal.to_json())
+    doubled.matches[1].corp_player_id = doubled.matches[0].corp_player_id
+    with pytest.raises(PairingException):
+        mm.commit_proposal(t, doubled)
+    mm.pair_round(t)
+    with pytest.raises(PairingException):
+        mm.commit_proposal(t, proposal)
+    assert t.current_round == 1
+
+
+def test_commit_leaves_players_out_of_the_proposal_unpaired(database):
+    t = new_tournament(10)
+    proposal = mm.propose_round(t)
+    # Registered after the preview, or left out by a partial matching
+    late = t_logic.add_player(t, "Late")
+    left_out = proposal.matches.pop()
+    mm.commit_proposal(t, proposal)
+    assert t.current_round == 1
+    unpaired = {p.id for p in t_logic.get_unpaired_players(t)}
+    assert unpaired == {left_out.corp_player_id, left_out.runner_player_id, late.id}
+
+
+def test_tournament_solver_is_used_unless_one_is_given(database):
+    t = new_tournament(10)
+    assert mm.propose_round(t).stats["solver"] == "networkx"
+    t.solver = "dense"
+    assert mm.propose_round(t).stats["solver"] == "dense"
+    assert mm.propose_round(t, solver="networkx").stats["solver"] == "networkx"
+    t.solver = "missing"
+    with pytest.raises(PairingException):
+        mm.propose_round(t)
+
+
+def test_allocate_tables_orders_by_score():
+    assert mm.allocate_tables([3, 9, 6, -1], [None] * 4, set()) == [3, 1, 2, 4]
+
+
+def test_allocate_tables_skips_reserved_tables():
+    tables = mm.allocate_tables([9, 6, 3, 0], [None, 2, None, None], {2, 3})
+    assert tables == [1, 2, 4, 5]
+
+
+def test_allocate_tables_keeps_ties_in_order():
+    assert mm.allocate_tables([3, 3, 3], [None] * 3, set()) == [1, 2, 3]
@@ -0,0 +1,56 @@
+import multiprocessing
+import subprocess
+import sys
+
+from flask import current_app
+
+import aesops.business_logic.matchmaking as mm
+import aesops.business_logic.pairing_search as pairing_search
+from pairing.cost_matrix import build_cost_matrix
+from tests.pairing_workers import slow_attempt
+from tests.simulation_utils import random_pairing_pool
+
+
+def test_search_stops_attempts_past_the_deadline():
+    # Start the fork server first, so starting it isn't counted in the timeout
+    assert pairing_search.search(slow_attempt, seeds=2, key=lambda seed: -seed) == 1
+    best = pairing_search.search(
+        slow_attempt, seeds=4, key=lambda seed: -seed, workers=3, timeout=0.5
+    )
+    assert best == 2
+    # The slow attempt was stopped rather than left running
+    assert not multiprocessing.active_children()
+
+
+def test_preloaded_modules_do_not_import_the_app():
+    check = (
+        "import sys\n"
+        f"for module in {pairing_search.PRELOAD!r}:\n"
+        "    __import__(module)\n"
+        "assert 'flask' not in sys.modules and 'aesops' not in sys.modules"
+    )
+    subprocess.run([sys.executable, "-c", check], check=True)
+
+
+def test_search_with_one_seed_runs_in_process():
+    assert pairing_search.search(slow_attempt, seeds=1, key=lambda seed: seed) == 0
+
+
+def test_multi_seed_pairing_is_no_worse(database):
+    pool = random_pairing_pool(40, 5, 3)
+    costs = build_cost_matrix(pool)
+    single = mm.solve_pairings(pool, costs, solver="dense")
+    current_app.config["PAIRING_SEARCH_SEEDS"] = 4
+    try:
+        searched = mm.solve_pairings(pool, costs, solver="dense")
+    finally:
+        current_app.config["PAIRING_SEARCH_SEEDS"] = 1
+    assert len(searched) == 20
+    paired = [pid for pair in searched for pid in pair]
+    assert len(set(paired)) == 40
+    single_quality = mm.pairing_quality(pool, costs, single)
+    searched_quality = mm.pairing_quality(pool, costs, searched)
+    # Every attempt is an optimal matching, the search only breaks ties, and
+    # seed 0 is the single attempt so the result can't be worse
+    assert searched_quality[:2] == single_quality[:2]
+    assert searched_quality <= single_quality
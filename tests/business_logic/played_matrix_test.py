@@ -0,0 +1,116 @@
+from random import Random
+
+from sqlalchemy import inspect
+
+import aesops.business_logic.match as m_logic
+import aesops.business_logic.matchmaking as mm
+import aesops.business_logic.played_matrix as played_matrix
+from aesops.business_logic.played_matrix import PlayedMatrix
+from aesops import app
+from pairing.cost_matrix import PairingState, build_cost_matrix
+from data_models.model_store import db
+from data_models.tournaments import Tournament
+from tests.simulation_utils import (
+    play_random_round,
+    random_pairing_pool,
+    sim_round,
+    sim_tournament,
+)
+
+
+def matrix_from_pool(players):
+    played = PlayedMatrix()
+    for player in players:
+        for opponent_id in player.corp_matches:
+            played.record(player.id, opponent_id)
+    return played
+
+
+def test_played_matrix_round_trips_through_bytes():
+    played = matrix_from_pool(random_pairing_pool(37, 5, 2))
+    restored = PlayedMatrix.from_bytes(played.player_ids, played.to_bytes())
+    assert (restored.played_corp == played.played_corp).all()
+    assert (restored.played_runner == played.played_runner).all()
+
+
+def test_played_matrix_agrees_with_opponent_lists():
+    players = random_pairing_pool(30, 6, 4)
+    played = matrix_from_pool(players)
+    for p1 in players:
+        for p2 in players:
+            assert played.has_played(p1.id, p2.id) == mm.has_played(p1, p2)
+            assert played.can_corp(p1.id, p2.id) == mm.legal_options(p1, p2)[0]
+    assert (build_cost_matrix(players, played) == build_cost_matrix(players)).all()
+
+
+def test_pairing_state_reads_history_from_played_matrix():
+    rng = Random(3)
+    players = random_pairing_pool(20, 2, 3)
+    state = PairingState()
+    for rnd in range(4):
+        play_random_round(players, rng)
+        pool = players[rnd:]
+        rng.shuffle(pool)
+        costs = state.update(pool, matrix_from_pool(players))
+        assert (costs == build_cost_matrix(pool)).all()
+
+
+def assert_stored_matches_rebuild(t):
+    assert t.played_bits is not None
+    stored = played_matrix.load_played_matrix(t)
+    rebuilt = played_matrix.rebuild_played_matrix(t)
+    ids = rebuilt.player_ids
+    for stored_side, rebuilt_side in zip(
+        stored.submatrices(ids), rebuilt.submatrices(ids)
+    ):
+        assert (stored_side == rebuilt_side).all()
+
+
+def test_stored_matrix_follows_the_matches(database):
+    t = sim_tournament(16, 3, "Played matrix")
+    assert_stored_matches_rebuild(t)
+    m_logic.delete(next(m for m in t.matches if not m.is_bye))
+    assert t.played_bits is None
+    mm.pair_round(t)
+    sim_round(t)
+    assert_stored_matches_rebuild(t)
+
+
+def test_matrix_is_only_loaded_for_pairing(database):
+    t = sim_tournament(8, 2, "Deferred")
+    tid = t.id
+    db.session.expunge_all()
+    t = db.session.get(Tournament, tid)
+    assert inspect(t).unloaded >= {"played_ids", "played_bits"}
+    stored = played_matrix.load_played_matrix(t)
+    assert stored.player_ids
+    assert not inspect(t).unloaded & {"played_ids", "played_bits"}
+
+
+def test_any_deleted_or_reopened_match_drops_the_matrix(database):
+    t = sim_tournament(12, 2, "Invalidate")
+    tid = t.id
+    matches = [m for m in t.matches if not m.is_bye]
+
+    # From the round page
+    deleted = matches[0]
+    pair = {deleted.corp_player_id, deleted.runner_player_id}
+    assert app.test_client().get(f"/delete_match/{deleted.id}").status_code == 302
+    t = db.session.get(Tournament, tid)
+    assert t.played_bits is None
+    assert not played_matrix.load_played_matrix(t).has_played(*pair)
+    mm.pair_round(t)
+    sim_round(t)
+    assert_stored_matches_rebuild(t)
+
+    # Straight through the session
+    db.session.delete(next(m for m in t.matches if m.concluded and not m.is_bye))
+    db.session.commit()
+    assert t.played_bits is None
+    mm.pair_round(t)
+    sim_round(t)
+    assert_stored_matches_rebuild(t)
+
+    # Reopened
+    m_logic.reset(next(m for m in t.matches if m.concluded and not m.is_bye))
+    assert t.played_bits is None
@@ -0,0 +1,65 @@
+import aesops.business_logic.match as m_logic
+import aesops.business_logic.players as p_logic
+import aesops.business_logic.rank_cache as rank_cache
+import aesops.business_logic.tournament as t_logic
+from aesops.business_logic.matchmaking import pair_round
+from data_models.model_store import db
+from tests.conftest import new_tournament
+from tests.simulation_utils import create_results
+
+
+def counting_tally(monkeypatch):
+    calls = []
+    tally_results = t_logic.tally_results
+
+    def counted(tournament):
+        calls.append(tournament.id)
+        return tally_results(tournament)
+
+    monkeypatch.setattr(t_logic, "tally_results", counted)
+    return calls
+
+
+def fresh_ranks(t):
+    rank_cache.cached_ranks.clear()
+    return t_logic.calculate_player_ranks(t)
+
+
+def test_repeated_reads_hit_the_cache(database, monkeypatch):
+    t = new_tournament(8, name="Cache")
+    calls = counting_tally(monkeypatch)
+    first = t_logic.calculate_player_ranks(t)
+    second = t_logic.calculate_player_ranks(t)
+    assert len(calls) == 1
+    assert [e["id"] for e in first] == [e["id"] for e in second]
+    assert all(e["player"] in db.session for e in second)
+
+
+def test_every_change_invalidates(database):
+    t = new_tournament(9, name="Versions")
+
+    def changes():
+        yield lambda: pair_round(t)
+        for match in t.active_matches:
+            if not match.is_bye:
+                yield lambda match=match: create_results(match)
+        game = next(m for m in t.active_matches if not m.is_bye)
+        yield lambda: m_logic.reset(game)
+        yield lambda: create_results(game)
+        yield lambda: t_logic.conclude_round(t)
+        yield lambda: p_logic.drop(t.players[0])
+        yield lambda: p_logic.undrop(t.players[0])
+
+        def rename():
+            t.players[1].name = "Renamed"
+            db.session.commit()
+
+        yield rename
+        yield lambda: t_logic.unpair_round(t)
+
+    for change in changes():
+        t_logic.calculate_player_ranks(t)
+        version = t.version
+        change()
+        assert t.version > version
+        assert t_logic.calculate_player_ranks(t) == fresh_ranks(t)
@@ -0,0 +1,123 @@
+import aesops.business_logic.elim_match as e_logic
+import aesops.business_logic.read_model as read_model
+import aesops.business_logic.top_cut as tc_logic
+import aesops.business_logic.tournament as t_logic
+import aesops.business_logic.users as u_logic
+from aesops import app
+from aesops.business_logic.matchmaking import pair_round
+from data_models.model_store import db
+from data_models.top_cut import Cut
+from data_models.tournaments import Tournament
+from data_models.users import User
+from tests.simulation_utils import count_queries, create_players, sim_round
+
+
+def cut_tournament(name, count):
+    """Three concluded rounds, a fourth paired and a top 4 cut underway"""
+    t = Tournament(name=name, reveal_cut_decklists=True)
+    db.session.add(t)
+    db.session.commit()
+    create_players(t, count, num_byes=1)
+    for _ in range(3):
+        pair_round(t)
+        sim_round(t)
+    pair_round(t)
+    cut = Cut()
+    tc_logic.create(cut, t, 4, double_elim=False)
+    tc_logic.generate_round(cut)
+    e_logic.corp_win(cut.matches[0])
+    return t
+
+
+def test_snapshot_matches_the_tournament(database):
+    t = cut_tournament("Snapshot", 9)
+    tid = t.id
+    db.session.expire_all()
+    with count_queries() as queries:
+        snapshot = read_model.load_snapshot(tid)
+    assert len(queries) == 6
+
+    assert snapshot.name == t.name
+    assert snapshot.current_round == t.current_round
+    assert {pid: p.name for pid, p in snapshot.players.items()} == {
+        p.id: p.name for p in t.players
+    }
+    for rnd in range(1, t.current_round + 1):
+        original = t_logic.get_round(t, rnd)
+        views = snapshot.round(rnd)
+        assert [m.id for m in views] == [m.id for m in original]
+        for view, match in zip(views, original):
+            assert view.corp_player.id == match.corp_player_id
+            assert view.result == match.result
+            if match.is_bye:
+                assert view.runner_player is None
+            else:
+                assert view.runner_player.id == match.runner_player_id
+
+    assert snapshot.cut.rnd == t.cut.rnd
+    for view in snapshot.cut.round(1):
+        assert view.corp_player.player.cut_player is view.corp_player
+    in_cut = {cp.player_id for cp in t.cut.players}
+    assert {pid for pid, p in snapshot.players.items() if p.cut_player} == in_cut
+    assert t_logic.last_concluded_round(snapshot) == t_logic.last_concluded_round(t)
+
+
+def page_urls(t):
+    return {
+        "tournament": f"/{t.id}",
+        "round": f"/{t.id}/{t.current_round}",
+        "cut": f"/{t.id}/cut/1",
+        "json": f"/{t.id}.json",
+    }
+
+
+def page_queries(pages, client):
+    counts = {}
+    for page, url in pages.items():
+        db.session.remove()
+        with count_queries() as queries:
+            assert client.get(url).status_code == 200
+        counts[page] = len(queries)
+    return counts
+
+
+def log_in_as_player(client, *tournaments):
+    """Logs the client in as a user playing in the current round of each"""
+    user = User(username="player", password_hash="", email="player@example.com")
+    db.session.add(user)
+    for t in tournaments:
+        match = next(m for m in t.active_matches if not m.is_bye)
+        match.runner_player.uid = user.id
+    db.session.commit()
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.id)
+    return user
+
+
+def test_pages_take_the_same_queries_for_any_field_size(database):
+    client = app.test_client()
+    tournaments = [cut_tournament("Small", 8), cut_tournament("Large", 32)]
+    tids = [t.id for t in tournaments]
+    small, large = (page_urls(t) for t in tournaments)
+    assert page_queries(small, client) == page_queries(large, client)
+    log_in_as_player(client, *(db.session.get(Tournament, tid) for tid in tids))
+    assert page_queries(small, client) == page_queries(large, client)
+
+
+def test_round_snapshot_holds_only_the_round(database):
+    t = cut_tournament("Round", 9)
+    user = log_in_as_player(app.test_client(), t)
+    tid, rnd = t.id, t.current_round
+    db.session.expire_all()
+    with count_queries() as queries:
+        snapshot = read_model.load_round_snapshot(tid, rnd)
+    assert len(queries) == 2
+    original = t_logic.get_round(t, rnd)
+    assert [m.id for m in snapshot.round(rnd)] == [m.id for m in original]
+    assert set(snapshot.players) == {
+        pid for m in original for pid in (m.corp_player_id, m.runner_player_id) if pid
+    }
+    assert snapshot.cut.rnd == t.cut.rnd
+    assert u_logic.reportable_match_ids(user, snapshot.round(rnd)) == {
+        m.id for m in original if not m.is_bye and m.runner_player.uid == user.id
+    }
@@ -0,0 +1,52 @@
+import numpy as np
+
+import aesops.business_logic.matchmaking as mm
+import pairing.score_groups as score_groups
+from pairing.cost_matrix import build_cost_matrix
+from tests.simulation_utils import allowed_edges, random_pairing_pool, total_cost
+
+
+def test_score_groups_are_even_and_cover_the_pool():
+    for seed in range(5):
+        pool = random_pairing_pool(60, 4, seed)
+        costs = build_cost_matrix(pool)
+        groups = score_groups.score_groups(
+            [player.score for player in pool], costs, allowed_edges(pool, costs)
+        )
+        assert sorted(np.concatenate(groups)) == list(range(60))
+        assert all(len(group) % 2 == 0 for group in groups)
+        scores = np.array([player.score for player in pool])
+        # Groups run from the highest score down
+        assert [scores[g].max() for g in groups] == sorted(
+            (scores[g].max() for g in groups), reverse=True
+        )
+
+
+def test_odd_group_floats_down():
+    scores = [6, 6, 6, 3, 3, 3, 0, 0]
+    costs = np.ones((8, 8), dtype=np.int64)
+    # Player 1 is the only 6 who can play a 3 cheaply
+    costs[[0, 2], 3:6] = costs[3:6, [0, 2]] = 50
+    groups = score_groups.score_groups(scores, costs, costs < 100)
+    assert [list(g) for g in groups] == [[0, 2], [1, 3, 4, 5], [6, 7]]
+
+
+def test_grouped_pairings_match_global_solve():
+    for seed in range(5):
+        pool = random_pairing_pool(130, 5, seed)
+        costs = build_cost_matrix(pool)
+        allowed = allowed_edges(pool, costs)
+        index = {player.id: i for i, player in enumerate(pool)}
+        grouped = mm.grouped_pairings(pool, costs, mm.dense_solver, workers=1)
+        assert len(grouped) == 65
+        assert all(allowed[index[p1], index[p2]] for p1, p2 in grouped)
+        best = total_cost(mm.dense_solver(pool, costs), pool, costs)
+        assert best <= total_cost(grouped, pool, costs) <= 2 * best
+
+
+def test_grouped_pairings_are_the_same_in_worker_processes():
+    pool = random_pairing_pool(130, 5, 0)
+    costs = build_cost_matrix(pool)
+    assert mm.grouped_pairings(
+        pool, costs, mm.dense_solver, workers=2
+    ) == mm.grouped_pairings(pool, costs, mm.dense_solver, workers=1)
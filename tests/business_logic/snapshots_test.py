@@ -0,0 +1,111 @@
+import json
+
+import aesops.business_logic.match as m_logic
+import aesops.business_logic.snapshots as snapshots
+import aesops.business_logic.standings as standings
+import aesops.business_logic.tiebreaks as tiebreaks
+import aesops.business_logic.tournament as t_logic
+from aesops.business_logic.matchmaking import pair_round
+from aesops.utility import get_json
+from tests.conftest import new_tournament
+from tests.simulation_utils import create_results
+
+
+def summary(standings):
+    return [
+        (
+            entry["id"],
+            entry["score"],
+            float(entry["sos"]),
+            float(entry["esos"]),
+            entry["side_bias"],
+            entry["corp_record"],
+            entry["runner_record"],
+        )
+        for entry in standings
+    ]
+
+
+def play_round(t):
+    pair_round(t)
+    for match in t.active_matches:
+        create_results(match)
+    t_logic.conclude_round(t)
+
+
+def test_snapshots_keep_each_rounds_standings(database):
+    t = new_tournament(13, num_byes=1, name="Snapshots")
+    history = {}
+    for rnd in range(1, 5):
+        play_round(t)
+        history[rnd] = summary(t_logic.calculate_player_ranks(t))
+        assert summary(snapshots.get_standings(t, rnd)) == history[rnd]
+    for rnd, standings in history.items():
+        assert summary(snapshots.get_standings(t, rnd)) == standings
+    assert snapshots.snapshot_rounds(t) == [1, 2, 3, 4]
+    assert snapshots.get_standings(t, 5) is None
+
+    exported = json.loads(get_json(t.id, 2))
+    assert exported["preliminaryRounds"] == 2
+    assert len(exported["rounds"]) == 2
+    assert [p["id"] for p in exported["players"]] == [s[0] for s in history[2]]
+
+
+def test_unpair_discards_latest_snapshot(database):
+    t = new_tournament(10, name="Unpair")
+    play_round(t)
+    play_round(t)
+    before = summary(t_logic.calculate_player_ranks(t))
+    play_round(t)
+    t_logic.unpair_round(t)
+    assert t.current_round == 2
+    assert snapshots.snapshot_rounds(t) == [1, 2]
+    assert summary(t_logic.calculate_player_ranks(t)) == before
+    # A round that was paired but never concluded has no snapshot to discard
+    pair_round(t)
+    t_logic.unpair_round(t)
+    assert summary(t_logic.calculate_player_ranks(t)) == before
+
+
+def test_unpair_keeps_results_corrected_after_the_snapshot(database):
+    t = new_tournament(10, name="Corrected")
+    play_round(t)
+    play_round(t)
+    first = next(m for m in t_logic.get_round(t, 1) if m.result != 1)
+    m_logic.corp_win(first)
+    corrected = summary(t_logic.calculate_player_ranks(t))
+    play_round(t)
+    t_logic.unpair_round(t)
+    assert summary(t_logic.calculate_player_ranks(t)) == corrected
+    assert standings.find_counter_drift(t) == []
+    live = {p.id: (p.score, p.sos, p.esos) for p in t.players}
+    assert live == tiebreaks.compute_tiebreaks(live, t.matches)
+
+
+def test_correcting_a_concluded_result_updates_its_snapshots(database):
+    t = new_tournament(10, name="Correction")
+    play_round(t)
+    play_round(t)
+    first = next(m for m in t_logic.get_round(t, 1) if m.result != 1)
+    m_logic.corp_win(first)
+    live = summary(t_logic.calculate_player_ranks(t))
+    assert summary(snapshots.get_standings(t, 2)) == live
+    exported = json.loads(get_json(t.id))
+    assert [(p["id"], p["matchPoints"]) for p in exported["players"]] == [
+        (entry[0], entry[1]) for entry in live
+    ]
+    corp = next(p for p in exported["players"] if p["id"] == first.corp_player_id)
+    assert corp["matchPoints"] == first.corp_player.score
+    # Round 1 on its own, as if the result had always been a corp win
+    round_one = summary(snapshots.get_standings(t, 1))
+    assert dict((e[0], e[1]) for e in round_one)[first.corp_player_id] == 3
+
+
+def test_late_joiners_are_listed_after_the_snapshot(database):
+    t = new_tournament(6, name="Late")
+    play_round(t)
+    late = t_logic.add_player(t, "Late")
+    standings = snapshots.get_standings(t, 1)
+    assert len(standings) == 7
+    assert standings[-1]["player"] == late
+    assert standings[-1]["score"] == 0
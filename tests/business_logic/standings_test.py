@@ -0,0 +1,201 @@
+from random import Random
+
+from sqlalchemy import event
+
+import aesops.business_logic.match as m_logic
+import aesops.business_logic.players as p_logic
+import aesops.business_logic.standings as standings
+import aesops.business_logic.tournament as t_logic
+from aesops import app
+from aesops.business_logic.matchmaking import pair_round
+from data_models.match import MatchResult
+from data_models.model_store import db
+from data_models.tournaments import Tournament
+from tests.conftest import new_tournament
+from tests.simulation_utils import (
+    create_results,
+    drop_players,
+    sim_tournament,
+)
+
+
+def stored_standings(t):
+    return {p.id: (p.score, float(p.sos), float(p.esos)) for p in t.players}
+
+
+def assert_live_standings(t):
+    assert stored_standings(t) == standings.compute_standings(
+        [p.id for p in t.players], t.matches
+    )
+    assert standings.find_counter_drift(t) == []
+
+
+def assert_concluded_standings(t):
+    # What conclude_round used to compute from scratch
+    players = {p.id: p for p in t.players}
+    matches = {m.id: m for m in t.matches}
+    for player in players.values():
+        assert player.score == t_logic.update_score_from_memory(player, matches)
+        assert float(player.sos) == t_logic.update_sos_from_memory(
+            player, matches, players
+        )
+        # Stored SoS comes back as a Decimal
+        assert float(player.esos) == float(
+            t_logic.update_esos_from_memory(player, matches, players)
+        )
+
+
+def report(match, rng):
+    r = rng.random()
+    if r < 0.45:
+        m_logic.corp_win(match)
+    elif r < 0.5:
+        m_logic.tie(match)
+    elif r < 0.55:
+        m_logic.intentional_draw(match)
+    else:
+        m_logic.runner_win(match)
+
+
+def test_standings_follow_reports(database):
+    rng = Random(7)
+    t = new_tournament(17, num_byes=2, name="Live")
+    for _ in range(5):
+        pair_round(t)
+        matches = [m for m in t.active_matches if not m.is_bye]
+        for match in matches:
+            report(match, rng)
+        assert_live_standings(t)
+        # Corrections after the fact
+        for match in rng.sample(matches, 3):
+            m_logic.reset(match)
+            assert_live_standings(t)
+            report(match, rng)
+        assert_live_standings(t)
+        t_logic.conclude_round(t)
+        assert_concluded_standings(t)
+        drop_players(t, 1, drop_rate=0.5)
+
+
+def test_unpair_restores_standings(database):
+    rng = Random(2)
+    t = new_tournament(11, name="Unpair")
+    for _ in range(2):
+        pair_round(t)
+        for match in t.active_matches:
+            if not match.is_bye:
+                report(match, rng)
+        t_logic.conclude_round(t)
+    before = stored_standings(t)
+    pair_round(t)
+    for match in t.active_matches:
+        if not match.is_bye:
+            report(match, rng)
+    assert stored_standings(t) != before
+    t_logic.unpair_round(t)
+    assert stored_standings(t) == before
+    assert standings.find_counter_drift(t) == []
+
+
+def test_conclude_round_matches_original_calculation(database):
+    commits = []
+
+    def count_commit(session):
+        commits.append(session)
+
+    event.listen(db.session, "after_commit", count_commit)
+    for n_players, num_byes in ((16, 0), (23, 2)):
+        t = new_tournament(n_players, num_byes=num_byes, name="Sim")
+        for _ in range(5):
+            pair_round(t)
+            for match in t.active_matches:
+                create_results(match)
+            commits.clear()
+            t_logic.conclude_round(t)
+            assert len(commits) == 1
+            assert all(m.concluded for m in t.active_matches)
+            assert_concluded_standings(t)
+            drop_players(t, 1)
+    event.remove(db.session, "after_commit", count_commit)
+
+
+def concluded_record(player, side):
+    # As side_record counted them from the matches
+    win = getattr(MatchResult, f"{side.upper()}_WIN").value
+    record = {"W": 0, "L": 0, "T": 0}
+    for match in getattr(player, f"{side}_matches"):
+        if match.is_bye or not match.concluded:
+            continue
+        if match.result == win:
+            record["W"] += 1
+        elif match.result in (MatchResult.CORP_WIN.value, MatchResult.RUNNER_WIN.value):
+            record["L"] += 1
+        else:
+            record["T"] += 1
+    return record
+
+
+def test_tally_counts_concluded_matches_only(database):
+    t = sim_tournament(n_players=15, n_rounds=4, name="Counters", num_byes=2)
+    pair_round(t)
+    balance = {p.id: p_logic.get_side_balance(p) for p in t.players}
+    for match in t.active_matches[:4]:
+        m_logic.corp_win(match)
+    # Results reported this round don't count until it is concluded
+    assert {p.id: p_logic.get_side_balance(p) for p in t.players} == balance
+    matches = {m.id: m for m in t.matches}
+    for entry in t_logic.tally_results(t):
+        player = entry["player"]
+        record = t_logic.get_record_from_memory(player, matches)
+        assert entry["score"] == record["score"]
+        assert entry["games_played"] == record["games_played"] - sum(
+            not m.concluded for m in player.corp_matches + player.runner_matches
+        )
+        assert entry["corp_record"] == concluded_record(player, "corp")
+        assert entry["runner_record"] == concluded_record(player, "runner")
+        assert entry["side_bias"] == sum(entry["corp_record"].values()) - sum(
+            entry["runner_record"].values()
+        )
+        assert entry["byes"] == sum(
+            m.is_bye and m.concluded for m in player.corp_matches
+        )
+    m_logic.delete(next(m for m in t.matches if not m.is_bye and m.concluded))
+    assert standings.find_counter_drift(t) == []
+    for match in t.active_matches:
+        create_results(match)
+    t_logic.conclude_round(t)
+    assert standings.find_counter_drift(t) == []
+    assert {p.id: p_logic.get_side_balance(p) for p in t.players} != balance
+
+
+def test_repair_counters_reports_and_fixes_drift(database):
+    t = sim_tournament(n_players=8, n_rounds=2, name="Drift")
+    tid = t.id
+    player = t.players[0]
+    wins = player.corp_wins
+    player.corp_wins = wins + 2
+    db.session.commit()
+    assert standings.find_counter_drift(t) == [(player, "corp_wins", wins + 2, wins)]
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["repair-counters", "--dry-run"])
+    assert f"corp_wins {wins + 2} -> {wins}" in result.output
+    assert "1 drifted counters found" in result.output
+    result = runner.invoke(args=["repair-counters", "--tid", str(tid)])
+    assert "1 drifted counters repaired" in result.output
+    # The command clears the session as it goes
+    assert standings.find_counter_drift(db.session.get(Tournament, tid)) == []
+
+
+def test_deleting_a_match_from_the_round_page_updates_standings(database):
+    rng = Random(5)
+    t = new_tournament(10, name="Delete")
+    pair_round(t)
+    for match in t.active_matches:
+        report(match, rng)
+    match = next(m for m in t.active_matches if m.result != 0)
+    tid, mid = t.id, match.id
+    assert app.test_client().get(f"/delete_match/{mid}").status_code == 302
+    t = db.session.get(Tournament, tid)
+    assert all(m.id != mid for m in t.matches)
+    assert_live_standings(t)
@@ -0,0 +1,42 @@
+from random import seed
+
+from flask import current_app
+
+import aesops.business_logic.matchmaking as mm
+import aesops.business_logic.telemetry as telemetry
+from tests.conftest import new_tournament
+from tests.simulation_utils import sim_round
+
+
+def test_each_paired_round_is_recorded(database):
+    t = new_tournament(11, name="Telemetry")
+    for _ in range(3):
+        mm.pair_round(t)
+        sim_round(t)
+    # Previews are not recorded, only rounds that are written
+    mm.propose_round(t)
+    runs = telemetry.get_pairing_runs(t.id)
+    assert [run.rnd for run in runs] == [1, 2, 3]
+    for run in runs:
+        assert run.player_count == 11
+        assert run.edge_count > 0
+        assert min(run.cost_time, run.matching_time, run.write_time) >= 0
+        assert 0 < run.total_weight <= 5 * 1000
+        assert sum(telemetry.side_imbalance(run).values()) == 11
+    lines = telemetry.runs_to_csv(runs).splitlines()
+    assert lines[0].split(",") == telemetry.RUN_FIELDS
+    assert len(lines) == 4
+
+
+def test_edge_count_is_the_graph_the_solver_was_given(database, monkeypatch):
+    seed(4)
+    t = new_tournament(20)
+    for _ in range(3):
+        mm.pair_round(t)
+        sim_round(t)
+    full = mm.propose_round(t).stats["edge_count"]
+    monkeypatch.setitem(current_app.config, "PAIRING_SCORE_WINDOW", 3)
+    assert 0 < mm.propose_round(t).stats["edge_count"] < full
+    monkeypatch.setitem(current_app.config, "PAIRING_SCORE_WINDOW", None)
+    monkeypatch.setitem(current_app.config, "PAIRING_SCORE_GROUPS", True)
+    assert 0 < mm.propose_round(t).stats["edge_count"] < full
@@ -0,0 +1,69 @@
+from random import Random
+from types import SimpleNamespace
+
+import aesops.business_logic.standings as standings
+import aesops.business_logic.tiebreaks as tiebreaks
+from data_models.match import MatchResult
+
+
+def random_matches(n_players, n_rounds, seed):
+    """Random rounds with a bye each round for odd fields, the last unreported"""
+    rng = Random(seed)
+    results = [r.value for r in MatchResult]
+    matches = []
+    for rnd in range(1, n_rounds + 1):
+        order = list(range(1, n_players + 1))
+        rng.shuffle(order)
+        if len(order) % 2 == 1:
+            matches.append(
+                SimpleNamespace(
+                    id=len(matches) + 1,
+                    corp_player_id=order.pop(),
+                    runner_player_id=None,
+                    result=MatchResult.CORP_WIN.value,
+                    is_bye=True,
+                    concluded=rnd < n_rounds,
+                )
+            )
+        for corp, runner in zip(order[::2], order[1::2]):
+            matches.append(
+                SimpleNamespace(
+                    id=len(matches) + 1,
+                    corp_player_id=corp,
+                    runner_player_id=runner,
+                    result=rng.choice(results) if rnd < n_rounds else None,
+                    is_bye=False,
+                    concluded=rnd < n_rounds,
+                )
+            )
+    rng.shuffle(matches)
+    return matches
+
+
+def test_tiebreaks_match_per_player_sums(monkeypatch):
+    for seed in range(20):
+        n_players = 11 + seed * 7
+        matches = random_matches(n_players, 2 + seed % 6, seed)
+        player_ids = list(range(1, n_players + 2))  # One player never played
+        expected = standings.compute_standings(player_ids, matches)
+        assert tiebreaks.compute_tiebreaks(player_ids, matches) == expected
+        # Recomputing every SoS the original way changes nothing either
+        monkeypatch.setattr(tiebreaks, "BOUNDARY", 1)
+        assert tiebreaks.compute_tiebreaks(player_ids, matches) == expected
+        monkeypatch.undo()
+
+
+def test_byes_score_but_are_not_games():
+    bye = SimpleNamespace(
+        id=1, corp_player_id=1, runner_player_id=None, result=1, is_bye=True
+    )
+    game = SimpleNamespace(
+        id=2, corp_player_id=1, runner_player_id=2, result=-1, is_bye=False
+    )
+    scores, opponents = tiebreaks.opponent_matrix({1: 0, 2: 1}, [bye, game])
+    assert scores.tolist() == [3, 3]
+    assert opponents.tolist() == [[0, 1], [1, 0]]
+    assert tiebreaks.compute_tiebreaks([1, 2], [bye, game]) == {
+        1: (3, 3.0, 3.0),
+        2: (3, 3.0, 3.0),
+    }
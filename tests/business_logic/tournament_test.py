@@ -0,0 +1,94 @@
+import aesops.business_logic.match as m_logic
+import aesops.business_logic.tournament as t_logic
+from aesops.business_logic.matchmaking import pair_round
+from aesops import app
+from data_models.model_store import db
+from tests.conftest import new_tournament
+from tests.simulation_utils import count_queries, sim_round
+
+
+def test_late_joiner_does_not_get_a_bye(database):
+    t = new_tournament(8, name="Late joiner")
+    for _ in range(2):
+        pair_round(t)
+        sim_round(t)
+    # The late joiner has the lowest score, but no games yet
+    late = t_logic.add_player(t, "Late")
+    pairable, byes = t_logic.bye_setup(t, rnd=3)
+    assert len(byes) == 1
+    assert byes[0] != late
+    assert late in pairable
+    assert byes[0] not in pairable
+    assert len(pairable) == 8
+
+
+def test_bye_goes_to_lowest_ranked_player_without_one(database):
+    t = new_tournament(9, name="Lowest")
+    pair_round(t)
+    sim_round(t)
+    ranks = [p for p in t_logic.calculate_player_ranks(t) if not p["received_bye"]]
+    lowest_score = ranks[-1]["score"]
+    _, byes = t_logic.bye_setup(t, rnd=2)
+    bye = next(p for p in ranks if p["player"] == byes[0])
+    assert not byes[0].received_bye
+    assert bye["score"] == lowest_score
+
+
+def test_everyone_has_had_a_bye(database):
+    t = new_tournament(3, name="All byes")
+    for _ in range(3):
+        pair_round(t)
+        sim_round(t)
+    assert all(p.received_bye for p in t.players)
+    pairable, byes = t_logic.bye_setup(t, rnd=4)
+    assert len(pairable) == 2
+    assert len(byes) == 1
+
+
+def test_unpaired_players_take_constant_queries(database):
+    t = new_tournament(10, name="Unpaired")
+    counts = []
+    for _ in range(4):
+        pair_round(t)
+        db.session.expire_all()
+        with count_queries() as queries:
+            assert t_logic.get_unpaired_players(t) == []
+        counts.append(len(queries))
+        sim_round(t)
+    # Doesn't grow with the number of rounds played
+    assert len(set(counts)) == 1
+    m_logic.delete(next(m for m in t.active_matches if not m.is_bye))
+    assert len(t_logic.get_unpaired_players(t)) == 2
+
+
+def test_get_round_is_one_query_in_table_order(database):
+    t = new_tournament(9, name="Round")
+    for _ in range(3):
+        pair_round(t)
+        sim_round(t)
+    db.session.expire_all()
+    t.id  # Reloaded here so only get_round is counted
+    with count_queries() as queries:
+        matches = t_logic.get_round(t, 2)
+        names = [
+            (m.corp_player.name, m.runner_player and m.runner_player.name)
+            for m in matches
+        ]
+    assert len(queries) == 1
+    assert len(names) == 5
+    assert {m.rnd for m in matches} == {2}
+    assert [m.table_number for m in matches] == sorted(m.table_number for m in matches)
+
+
+def test_round_page_queries_dont_grow_with_rounds(database):
+    t = new_tournament(12, name="Round page")
+    client = app.test_client()
+    counts = []
+    for _ in range(4):
+        pair_round(t)
+        db.session.expire_all()
+        with count_queries() as queries:
+            assert client.get(f"/{t.id}/{t.current_round}").status_code == 200
+        counts.append(len(queries))
+        sim_round(t)
+    assert len(set(counts)) == 1
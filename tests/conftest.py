@@ -0,0 +1,29 @@
+import os
+
+import pytest
+
+# Point the app at a throwaway in-memory database before it is first imported
+os.environ["DATABASE_URL"] = "sqlite://"
+
+from aesops import app
+from data_models.model_store import db
+from data_models.tournaments import Tournament
+from tests.simulation_utils import create_players
+
+
+@pytest.fixture
+def database():
+    with app.app_context():
+        db.create_all()
+        yield db
+        db.session.remove()
+        db.drop_all()
+
+
+def new_tournament(n_players, num_byes=0, name="Test"):
+    """A saved tournament with n_players registered, num_byes of them on a bye"""
+    t = Tournament(name=name)
+    db.session.add(t)
+    db.session.commit()
+    create_players(t, count=n_players, num_byes=num_byes)
+    return t
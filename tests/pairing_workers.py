@@ -0,0 +1,17 @@
+"""
+Functions the pairing tests hand to worker processes. They are kept out of the
+test modules, which import the app, so a worker can load them as quickly as it
+loads the solvers (see pairing_search.PRELOAD).
+"""
+
+import time
+
+
+def slow_attempt(seed):
+    if seed == 3:
+        time.sleep(2)
+    return seed
+
+
+def broken_solver(pool, costs, score_window=None):
+    raise RuntimeError("solver fell over")
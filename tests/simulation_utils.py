@@ -1,5 +1,8 @@
-from random import choices, random, randint
+from contextlib import contextmanager
+from random import Random, choices, random, randint
 from string import ascii_uppercase
+from types import SimpleNamespace
+from sqlalchemy import event
 from aesops import app
 from data_models.model_store import db
 from data_models.tournaments import Tournament
@@ -9,10 +12,26 @@ import aesops.business_logic.match as m_logic
 import aesops.business_logic.tournament as t_logic
 import aesops.business_logic.players as p_logic
 from aesops.business_logic.matchmaking import pair_round
+from pairing.solvers import pairing_edges
 import tqdm
 from timeit import default_timer as timer
 
 
+@contextmanager
+def count_queries():
+    """Collects the statements run against the database inside the block"""
+    queries = []
+
+    def count_query(*args):
+        queries.append(args)
+
+    event.listen(db.engine, "before_cursor_execute", count_query)
+    try:
+        yield queries
+    finally:
+        event.remove(db.engine, "before_cursor_execute", count_query)
+
+
 def create_players(t: Tournament, count: int, num_byes: int = 0):
     for i in range(num_byes):
         t_logic.add_player(t, ascii_uppercase[i], first_round_bye=True)
@@ -100,6 +119,51 @@ def sim_tournament(
     return t
 
 
+def random_pairing_pool(n_players, n_rounds, seed):
+    """
+    Builds CachedPlayer look-alikes with a consistent match history, as if
+    n_rounds of random pairings had been played.
+    """
+    rng = Random(seed)
+    players = [
+        SimpleNamespace(
+            id=i + 1, score=0, side_bias=0, corp_matches=[], runner_matches=[]
+        )
+        for i in range(n_players)
+    ]
+    for _ in range(n_rounds):
+        play_random_round(players, rng)
+    return players
+
+
+def play_random_round(players, rng: Random):
+    order = players.copy()
+    rng.shuffle(order)
+    for corp, runner in zip(order[::2], order[1::2]):
+        corp.corp_matches.append(runner.id)
+        runner.runner_matches.append(corp.id)
+        corp.side_bias += 1
+        runner.side_bias -= 1
+        result = rng.random()
+        if result < 0.45:
+            corp.score += 3
+        elif result < 0.55:
+            corp.score += 1
+            runner.score += 1
+        else:
+            runner.score += 3
+
+
+def total_cost(pairings, pool, costs):
+    index = {player.id: i for i, player in enumerate(pool)}
+    return sum(int(costs[index[p1], index[p2]]) for p1, p2 in pairings)
+
+
+def allowed_edges(pool, costs):
+    allowed = pairing_edges(pool, costs)
+    return allowed | allowed.T
+
+
 def clean_db():
     db.drop_all()
     db.create_all()
@@ -179,6 +243,218 @@ def create_report(t: Tournament):
     )
 
 
+def compare_score_group_pairing(
+    n_players: int = 420, n_rounds: int = 5, seeds: int = 5, workers: int = None
+):
+    """
+    Pairs random pools both globally and per score group, reporting the time,
+    total cost and side imbalance of each so the two can be compared.
+    """
+    from pairing.cost_matrix import build_cost_matrix
+    import aesops.business_logic.matchmaking as mm
+
+    results = []
+    for seed in range(seeds):
+        pool = random_pairing_pool(n_players, n_rounds, seed)
+        costs = build_cost_matrix(pool)
+        modes = {
+            "global": lambda: mm.dense_solver(pool, costs),
+            "score_groups": lambda: mm.grouped_pairings(
+                pool, costs, mm.dense_solver, workers=workers
+            ),
+        }
+        for mode, solve in modes.items():
+            start = timer()
+            pairings = solve()
+            elapsed = timer() - start
+            _, cost, imbalance = mm.pairing_quality(pool, costs, pairings)
+            results.append(
+                {
+                    "seed": seed,
+                    "mode": mode,
+                    "time": elapsed,
+                    "pairs": len(pairings),
+                    "cost": cost,
+                    "imbalance": imbalance,
+                }
+            )
+    return results
+
+
+def benchmark_tiebreaks(n_players: int = 130, n_rounds: int = 5, repeats: int = 5):
+    """
+    Times the per-player SoS/ESoS loops conclude_round used to run against the
+    per-player sums in standings and the matrix products in tiebreaks, on a
+    simulated tournament. Returns the best time of each in seconds.
+    """
+    import aesops.business_logic.standings as standings
+    import aesops.business_logic.tiebreaks as tiebreaks
+
+    clean_db()
+    t = sim_tournament(n_players=n_players, n_rounds=n_rounds, name="Tiebreaks")
+    players = {p.id: p for p in t.players}
+    matches = {m.id: m for m in t.matches}
+
+    def original_loop():
+        for player in players.values():
+            player.score = t_logic.update_score_from_memory(player, matches)
+        for player in players.values():
+            player.sos = t_logic.update_sos_from_memory(player, matches, players)
+        for player in players.values():
+            player.esos = t_logic.update_esos_from_memory(player, matches, players)
+
+    modes = {
+        "original": original_loop,
+        "standings": lambda: standings.compute_standings(players, matches.values()),
+        "tiebreaks": lambda: tiebreaks.compute_tiebreaks(players, matches.values()),
+    }
+    timings = {}
+    for mode, run in modes.items():
+        times = []
+        for _ in range(repeats):
+            start = timer()
+            run()
+            times.append(timer() - start)
+        timings[mode] = min(times)
+    db.session.rollback()
+    return timings
+
+
+def seed_filler_tournaments(
+    n_tournaments: int, n_players: int = 16, n_rounds: int = 5, seed: int = 0
+):
+    """
+    Bulk inserts finished tournaments, each with a top 4 cut, to give the
+    tables a realistic size. Nothing is paired or scored the usual way, so
+    thousands take seconds.
+    """
+    from sqlalchemy import func, insert
+    from data_models.top_cut import Cut, CutPlayer, ElimMatch
+
+    rng = Random(seed)
+    start = {
+        model: (db.session.query(func.max(model.id)).scalar() or 0) + 1
+        for model in (Tournament, Player, Match, Cut, CutPlayer, ElimMatch)
+    }
+    tournaments, players, matches, cuts, cut_players, elim_matches = (
+        [] for _ in range(6)
+    )
+    for i in range(n_tournaments):
+        tid = start[Tournament] + i
+        tournaments.append(
+            {"id": tid, "name": f"Filler_{i}", "current_round": n_rounds}
+        )
+        pids = list(range(len(players), len(players) + n_players))
+        pids = [start[Player] + pid for pid in pids]
+        players.extend({"id": pid, "name": str(pid), "tid": tid} for pid in pids)
+        for rnd in range(1, n_rounds + 1):
+            rng.shuffle(pids)
+            for table, (corp, runner) in enumerate(zip(pids[::2], pids[1::2]), 1):
+                matches.append(
+                    {
+                        "id": start[Match] + len(matches),
+                        "tid": tid,
+                        "rnd": rnd,
+                        "corp_player_id": corp,
+                        "runner_player_id": runner,
+                        "result": rng.choice([1, -1, 0]),
+                        "concluded": True,
+                        "table_number": table,
+                    }
+                )
+        cut_id = start[Cut] + i
+        cuts.append({"id": cut_id, "tid": tid, "num_players": 4})
+        seeds = []
+        for seed_number, pid in enumerate(pids[:4], 1):
+            seeds.append(start[CutPlayer] + len(cut_players))
+            cut_players.append(
+                {
+                    "id": seeds[-1],
+                    "player_id": pid,
+                    "seed": seed_number,
+                    "cut_id": cut_id,
+                }
+            )
+        for table, (higher, lower) in enumerate([(0, 3), (1, 2)], 1):
+            elim_matches.append(
+                {
+                    "id": start[ElimMatch] + len(elim_matches),
+                    "cut_id": cut_id,
+                    "rnd": 1,
+                    "higher_seed_id": seeds[higher],
+                    "lower_seed_id": seeds[lower],
+                    "corp_player_id": seeds[higher],
+                    "runner_player_id": seeds[lower],
+                    "table_number": table,
+                }
+            )
+    for model, rows in [
+        (Tournament, tournaments),
+        (Player, players),
+        (Match, matches),
+        (Cut, cuts),
+        (CutPlayer, cut_players),
+        (ElimMatch, elim_matches),
+    ]:
+        db.session.execute(insert(model), rows)
+    db.session.commit()
+
+
+def benchmark_page_indexes(
+    n_tournaments: int = 2000,
+    n_players: int = 16,
+    n_rounds: int = 5,
+    repeats: int = 20,
+):
+    """
+    Times the tournament, round and cut pages of a simulated tournament, in a
+    database padded out with n_tournaments others, with and without the match,
+    player and elim_match indexes. Returns the best time of each page in
+    seconds, for both.
+    """
+    import aesops.business_logic.top_cut as tc_logic
+    from data_models.top_cut import Cut, ElimMatch
+
+    clean_db()
+    seed_filler_tournaments(n_tournaments, n_players=n_players, n_rounds=n_rounds)
+    t = sim_tournament(n_players=n_players, n_rounds=n_rounds, name="Indexes")
+    cut = Cut()
+    tc_logic.create(cut, t, 4, double_elim=False)
+    tc_logic.generate_round(cut)
+    pages = {
+        "tournament": f"/{t.id}",
+        "round": f"/{t.id}/{t.current_round}",
+        "cut": f"/{t.id}/cut/1",
+    }
+    indexes = [
+        index
+        for model in (Match, Player, ElimMatch)
+        for index in model.__table__.indexes
+    ]
+    client = app.test_client()
+
+    def time_pages():
+        timings = {}
+        for page, url in pages.items():
+            assert client.get(url).status_code == 200
+            times = []
+            for _ in range(repeats):
+                start = timer()
+                client.get(url)
+                times.append(timer() - start)
+            timings[page] = min(times)
+        return timings
+
+    db.session.remove()
+    timings = {"indexed": time_pages()}
+    for index in indexes:
+        index.drop(db.engine)
+    timings["unindexed"] = time_pages()
+    for index in indexes:
+        index.create(db.engine)
+    return timings
+
+
 if __name__ == "__main__":
     # N_PLAYERS = 20
     # N_ROUNDS = 5